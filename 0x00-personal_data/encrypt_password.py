@@ -12,12 +12,46 @@ The `hash_password` function hashes a plain text password using bcrypt.
 
 The `is_valid` function checks if a given plain text password matches
 a hashed password.
+
+The bcrypt cost is set by the `BCRYPT_ROUNDS` environment variable, or
+calibrated offline to a latency budget with `calibrate_rounds` (run
+`./encrypt_password.py calibrate [target_ms]`) and saved in
+`BCRYPT_ROUNDS_FILE`; `load_rounds` reads it, and `current_rounds` keeps
+what it read for the process. `needs_rehash` tells which
+stored hashes use another cost, so they can be rehashed once their password
+is known again, e.g. after a login.
+
+The `hash_passwords` and `verify_many` functions hash and verify many
+passwords at once on a pool of processes, e.g. to import accounts.
+`./encrypt_password.py hash-csv user_data.csv` hashes the password column
+of a CSV file that way.
 """
 
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import (Callable, Deque, Dict, Iterable, Iterator, List, Tuple,
+                    Union)
+
 import bcrypt
 
+DEFAULT_ROUNDS = 12
+DEFAULT_TARGET_MS = 250.0
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+ROUNDS_FILE = '.bcrypt_rounds'
+_PROBE_ROUNDS = 8
+
+_rounds: Union[int, None] = None  # cost read once by `current_rounds`
 
-def hash_password(password: str) -> bytes:
+
+def hash_password(password: str, rounds: Union[int, None] = None) -> bytes:
     """
     Hashes a password using bcrypt.
 
@@ -27,11 +61,14 @@ def hash_password(password: str) -> bytes:
 
     Args:
         password (str): The plain text password to hash.
+        rounds (int): The bcrypt cost, `current_rounds()` by default.
 
     Returns:
         bytes: The hashed password in bytes format, which includes the salt.
     """
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    if rounds is None:
+        rounds = current_rounds()
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds))
     return hashed
 
 
@@ -52,3 +89,328 @@ def is_valid(hashed_password: bytes, password: str) -> bool:
         False otherwise.
     """
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
+
+
+def needs_rehash(hashed_password: bytes,
+                 rounds: Union[int, None] = None) -> bool:
+    """
+    Tells whether a hashed password uses another cost than the current one.
+
+    Args:
+        hashed_password (bytes): The hashed password to check.
+        rounds (int): The current bcrypt cost, `current_rounds()` by
+        default.
+
+    Returns:
+        bool: True if the password should be hashed again, False otherwise.
+    """
+    if rounds is None:
+        rounds = current_rounds()
+    return hash_cost(hashed_password) != rounds
+
+
+def hash_cost(hashed_password: Union[bytes, str]) -> int:
+    """
+    Returns the cost (log2 of the rounds) of a bcrypt hash.
+    """
+    if isinstance(hashed_password, bytes):
+        hashed_password = hashed_password.decode()
+    return int(hashed_password.split('$')[2])
+
+
+def _hash_ms(rounds: int, samples: int = 3) -> float:
+    """
+    Returns the fastest of a few bcrypt hashes at a cost, in ms.
+    """
+    salt = bcrypt.gensalt(rounds)
+    best = float('inf')
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.hashpw(b'calibration', salt)
+        best = min(best, time.perf_counter() - start)
+    return 1000 * best
+
+
+def calibrate_rounds(target_ms: float = DEFAULT_TARGET_MS,
+                     min_rounds: int = MIN_ROUNDS,
+                     max_rounds: int = MAX_ROUNDS
+                     ) -> Dict[str, Union[int, float]]:
+    """
+    Finds the highest bcrypt cost hashing within a target latency.
+
+    The time of a cheap hash is measured and doubled per extra round to
+    estimate the cost, which is then measured to settle it.
+
+    Args:
+        target_ms (float): The latency budget of a hash, in ms.
+        min_rounds (int): The lowest cost, used even if it is too slow.
+        max_rounds (int): The highest cost.
+
+    Returns:
+        dict: The `rounds` chosen, the `target_ms` and the `hash_ms`
+        measured at that cost.
+    """
+    probe_ms = _hash_ms(_PROBE_ROUNDS)
+    rounds = min_rounds
+    while (rounds < max_rounds and
+           probe_ms * 2 ** (rounds + 1 - _PROBE_ROUNDS) <= target_ms):
+        rounds += 1
+
+    hash_ms = _hash_ms(rounds, samples=1)
+    while hash_ms > target_ms and rounds > min_rounds:
+        rounds -= 1
+        hash_ms = _hash_ms(rounds, samples=1)
+
+    return {'rounds': rounds, 'target_ms': target_ms, 'hash_ms': hash_ms}
+
+
+def _target_ms() -> float:
+    """
+    Returns the latency budget of a hash set by `BCRYPT_TARGET_MS`.
+    """
+    try:
+        return float(os.getenv('BCRYPT_TARGET_MS', DEFAULT_TARGET_MS))
+    except ValueError:
+        return DEFAULT_TARGET_MS
+
+
+def save_calibration(calibration: Dict[str, Union[int, float]]) -> None:
+    """
+    Saves a calibration in `BCRYPT_ROUNDS_FILE`.
+    """
+    global _rounds
+    with open(os.getenv('BCRYPT_ROUNDS_FILE', ROUNDS_FILE), 'w') as file:
+        json.dump(calibration, file)
+    _rounds = None
+
+
+def load_rounds(calibrate: bool = True) -> int:
+    """
+    Returns the bcrypt cost to hash passwords with.
+
+    `BCRYPT_ROUNDS` sets the cost. Otherwise it is read from the calibration
+    saved in `BCRYPT_ROUNDS_FILE`, unless `BCRYPT_TARGET_MS` asks for another
+    target. Without a calibration, the cost is calibrated against the target
+    and saved, or is `DEFAULT_ROUNDS` if `calibrate` is False.
+    """
+    try:
+        return int(os.environ['BCRYPT_ROUNDS'])
+    except (KeyError, ValueError):
+        pass
+
+    target_ms = _target_ms()
+    try:
+        with open(os.getenv('BCRYPT_ROUNDS_FILE', ROUNDS_FILE)) as file:
+            calibration = json.load(file)
+        if ('BCRYPT_TARGET_MS' not in os.environ or
+                calibration['target_ms'] == target_ms):
+            return int(calibration['rounds'])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    if not calibrate:
+        return DEFAULT_ROUNDS
+
+    calibration = calibrate_rounds(target_ms)
+    try:
+        save_calibration(calibration)
+    except OSError:
+        pass
+    return calibration['rounds']
+
+
+def current_rounds() -> int:
+    """
+    Returns the bcrypt cost to hash passwords with, `load_rounds(False)`
+    read once per process: hashing a password does not read the
+    calibration file again.
+    """
+    global _rounds
+    if _rounds is None:
+        _rounds = load_rounds(calibrate=False)
+    return _rounds
+
+
+def _hash_chunk(passwords: List[str], rounds: int) -> List[bytes]:
+    """
+    Hashes a chunk of passwords, in a worker process.
+    """
+    return [hash_password(password, rounds) for password in passwords]
+
+
+def _verify_chunk(pairs: List[Tuple[bytes, str]]) -> List[bool]:
+    """
+    Verifies a chunk of hashed and plain text passwords, in a worker
+    process.
+    """
+    return [is_valid(hashed, password) for hashed, password in pairs]
+
+
+def _map_chunks(func: Callable[..., list], items: Iterable,
+                workers: Union[int, None], chunk_size: int,
+                *args) -> Iterator:
+    """
+    Applies a function to chunks of items on a pool of processes.
+
+    At most two chunks per worker are in flight: the next items are only
+    read once the results of the oldest chunk were consumed, so a large or
+    endless input is never read ahead of its consumer.
+
+    Args:
+        func (callable): The function applied to each chunk, and `args`.
+        items (iterable): The items.
+        workers (int): The number of processes, the number of CPUs by
+            default.
+        chunk_size (int): The number of items sent to a process at once.
+
+    Yields:
+        The results of the function, in the order of the items.
+    """
+    workers = workers or os.cpu_count() or 1
+    items = iter(items)
+    pending: Deque[Future] = deque()
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            while len(pending) < 2 * workers:
+                chunk = list(islice(items, chunk_size))
+                if not chunk:
+                    break
+                pending.append(pool.submit(func, chunk, *args))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown()
+
+
+def hash_passwords(passwords: Iterable[str], workers: Union[int, None] = None,
+                   chunk_size: int = 16,
+                   rounds: Union[int, None] = None) -> Iterator[bytes]:
+    """
+    Hashes many passwords using bcrypt, on a pool of processes.
+
+    Args:
+        passwords (iterable): The plain text passwords to hash.
+        workers (int): The number of processes, the number of CPUs by
+            default.
+        chunk_size (int): The number of passwords sent to a process at once.
+        rounds (int): The bcrypt cost, `current_rounds()` by default.
+
+    Yields:
+        bytes: The hashed passwords, in the order of the passwords.
+    """
+    if rounds is None:
+        rounds = current_rounds()
+    return _map_chunks(_hash_chunk, passwords, workers, chunk_size, rounds)
+
+
+def verify_many(pairs: Iterable[Tuple[bytes, str]],
+                workers: Union[int, None] = None,
+                chunk_size: int = 16) -> Iterator[bool]:
+    """
+    Validates many passwords against their hashed passwords, on a pool of
+    processes.
+
+    Args:
+        pairs (iterable): The hashed and plain text passwords to check.
+        workers (int): The number of processes, the number of CPUs by
+            default.
+        chunk_size (int): The number of pairs sent to a process at once.
+
+    Yields:
+        bool: Whether each password matches its hashed password, in the
+        order of the pairs.
+    """
+    return _map_chunks(_verify_chunk, pairs, workers, chunk_size)
+
+
+def hash_csv(source: Iterable[str], output, column: str = 'password',
+             workers: Union[int, None] = None) -> int:
+    """
+    Copies a CSV file, replacing the passwords of a column by their hashes.
+
+    Args:
+        source (iterable): The lines of the CSV file.
+        output (file): The file the hashed CSV is written to.
+        column (str): The name of the password column.
+        workers (int): The number of processes, the number of CPUs by
+            default.
+
+    Raises:
+        ValueError: If the CSV file has no such column.
+
+    Returns:
+        int: The number of passwords hashed.
+    """
+    reader = csv.DictReader(source)
+    if reader.fieldnames is None or column not in reader.fieldnames:
+        raise ValueError('No {} column'.format(column))
+
+    writer = csv.DictWriter(output, reader.fieldnames, quoting=csv.QUOTE_ALL)
+    writer.writeheader()
+    rows: Deque[dict] = deque()  # rows whose password is being hashed
+
+    def passwords() -> Iterator[str]:
+        for row in reader:
+            rows.append(row)
+            yield row[column]
+
+    count = 0
+    for hashed in hash_passwords(passwords(), workers=workers):
+        row = rows.popleft()
+        row[column] = hashed.decode()
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def main(argv: Union[List[str], None] = None) -> None:
+    """
+    Runs the command line interface.
+    """
+    parser = argparse.ArgumentParser(description='bcrypt password utility')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    calibrate = commands.add_parser(
+        'calibrate', help='save the bcrypt cost meeting a target latency')
+    calibrate.add_argument('target_ms', type=float, nargs='?',
+                           default=_target_ms())
+
+    hash_file = commands.add_parser(
+        'hash-csv', help='hash the password column of a CSV file')
+    hash_file.add_argument('file')
+    hash_file.add_argument('--column', default='password')
+    hash_file.add_argument('--workers', type=int)
+    hash_file.add_argument('--output', '-o',
+                           help='the hashed CSV file (default stdout)')
+
+    args = parser.parse_args(argv)
+    if args.command == 'calibrate':
+        calibration = calibrate_rounds(args.target_ms)
+        save_calibration(calibration)
+        print('bcrypt rounds: {} ({:.0f} ms per hash)'.format(
+            calibration['rounds'], calibration['hash_ms']))
+        return
+
+    start = time.perf_counter()
+    with open(args.file, newline='') as source:
+        try:
+            if args.output is None:
+                count = hash_csv(source, sys.stdout, args.column,
+                                 args.workers)
+            else:
+                with open(args.output, 'w', newline='') as output:
+                    count = hash_csv(source, output, args.column,
+                                     args.workers)
+        except ValueError as e:
+            parser.error(str(e))
+    elapsed = time.perf_counter() - start
+    print('hashed {} passwords in {:.1f}s ({:.1f}/s)'.format(
+        count, elapsed, count / elapsed), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+
+"""This module implements the password hashers of the users.
+
+Hashes are stored as `<algorithm>$<parameters>$<salt>$<hash>`, so each one
+is checked with the algorithm and parameters it was made with. Passwords
+are hashed with `PASSWORD_HASHER` (`pbkdf2_sha256` by default, `scrypt` or
+`bcrypt`), whose parameters are set by:
+
+- `PASSWORD_PBKDF2_ITERATIONS` (default 600000)
+- `PASSWORD_SCRYPT_N`, `PASSWORD_SCRYPT_R` and `PASSWORD_SCRYPT_P` (default
+  16384, 8 and 1)
+- `PASSWORD_BCRYPT_ROUNDS` (default 12; requires the `bcrypt` package)
+
+A hash made with another algorithm or parameters, or an unprefixed SHA-256
+hash of the earlier versions, is valid but needs to be updated.
+
+Run `python3 -m models.password [<algorithm>[:<param>=<value>,...] ...]`
+to benchmark hashers, e.g. `python3 -m models.password scrypt:n=32768`.
+The memory of a hash is measured in a fresh process, as the growth of its
+peak resident set size while it hashes a password.
+"""
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from os import getenv
+from typing import Dict, Type, Union
+
+try:
+    import bcrypt
+except ImportError:  # the bcrypt hasher is optional
+    bcrypt = None
+
+HASHERS: Dict[str, Type["PasswordHasher"]] = {}
+
+
+def _getenv_int(name: str, default: int) -> int:
+    """Return an integer environment variable, or `default`."""
+    try:
+        return int(getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _b64encode(data: bytes) -> str:
+    """Encode bytes in unpadded base64."""
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    """Decode unpadded base64."""
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def register_hasher(cls: Type["PasswordHasher"]) -> Type["PasswordHasher"]:
+    """Class decorator registering a hasher under its algorithm."""
+    HASHERS[cls.algorithm] = cls
+    return cls
+
+
+class PasswordHasher(ABC):
+    """Interface of a password hashing algorithm.
+
+    An instance holds the parameters new hashes are made with; hashes are
+    verified with the parameters they carry.
+    """
+
+    algorithm = ""
+
+    @classmethod
+    def from_env(cls) -> "PasswordHasher":
+        """Create a hasher with the parameters set by the environment."""
+        return cls()
+
+    @abstractmethod
+    def encode(self, password: str) -> str:
+        """Hash a password, prefixed with the algorithm and parameters."""
+
+    @abstractmethod
+    def verify(self, password: str, encoded: str) -> bool:
+        """Tell whether a password matches a hash of this algorithm."""
+
+    def needs_update(self, encoded: str) -> bool:
+        """Tell whether a hash was made with other parameters."""
+        return False
+
+    def __repr__(self) -> str:
+        """Return the algorithm and parameters of the hasher."""
+        params = ",".join(
+            "{}={}".format(name, value) for name, value in vars(self).items()
+        )
+        return "{}:{}".format(self.algorithm, params)
+
+
+@register_hasher
+class PBKDF2Hasher(PasswordHasher):
+    """PBKDF2 with HMAC-SHA256."""
+
+    algorithm = "pbkdf2_sha256"
+
+    def __init__(self, iterations: int = 600000):
+        """Initialize the hasher."""
+        self.iterations = iterations
+
+    @classmethod
+    def from_env(cls) -> "PBKDF2Hasher":
+        """Create a hasher with `PASSWORD_PBKDF2_ITERATIONS` iterations."""
+        return cls(_getenv_int("PASSWORD_PBKDF2_ITERATIONS", 600000))
+
+    def _hash(self, password: str, salt: bytes, iterations: int) -> bytes:
+        """Derive the hash of a password."""
+        return hashlib.pbkdf2_hmac(
+            "sha256", password.encode(), salt, iterations
+        )
+
+    def encode(self, password: str) -> str:
+        """Hash a password."""
+        salt = os.urandom(16)
+        digest = self._hash(password, salt, self.iterations)
+        return "{}${}${}${}".format(
+            self.algorithm,
+            self.iterations,
+            _b64encode(salt),
+            _b64encode(digest),
+        )
+
+    def verify(self, password: str, encoded: str) -> bool:
+        """Tell whether a password matches a hash."""
+        _, iterations, salt, digest = encoded.split("$")
+        return hmac.compare_digest(
+            self._hash(password, _b64decode(salt), int(iterations)),
+            _b64decode(digest),
+        )
+
+    def needs_update(self, encoded: str) -> bool:
+        """Tell whether a hash was made with other iterations."""
+        return int(encoded.split("$")[1]) != self.iterations
+
+
+@register_hasher
+class ScryptHasher(PasswordHasher):
+    """scrypt, with a cost `n`, a block size `r` and parallelism `p`."""
+
+    algorithm = "scrypt"
+
+    def __init__(self, n: int = 16384, r: int = 8, p: int = 1):
+        """Initialize the hasher."""
+        self.n = n
+        self.r = r
+        self.p = p
+
+    @classmethod
+    def from_env(cls) -> "ScryptHasher":
+        """Create a hasher with the `PASSWORD_SCRYPT_*` parameters."""
+        return cls(
+            _getenv_int("PASSWORD_SCRYPT_N", 16384),
+            _getenv_int("PASSWORD_SCRYPT_R", 8),
+            _getenv_int("PASSWORD_SCRYPT_P", 1),
+        )
+
+    @staticmethod
+    def _hash(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        """Derive the hash of a password."""
+        return hashlib.scrypt(
+            password.encode(),
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            maxmem=2 * 128 * r * (n + p),
+            dklen=32,
+        )
+
+    def encode(self, password: str) -> str:
+        """Hash a password."""
+        salt = os.urandom(16)
+        digest = self._hash(password, salt, self.n, self.r, self.p)
+        return "{}${}${}${}${}${}".format(
+            self.algorithm,
+            self.n,
+            self.r,
+            self.p,
+            _b64encode(salt),
+            _b64encode(digest),
+        )
+
+    def verify(self, password: str, encoded: str) -> bool:
+        """Tell whether a password matches a hash."""
+        _, n, r, p, salt, digest = encoded.split("$")
+        return hmac.compare_digest(
+            self._hash(password, _b64decode(salt), int(n), int(r), int(p)),
+            _b64decode(digest),
+        )
+
+    def needs_update(self, encoded: str) -> bool:
+        """Tell whether a hash was made with other parameters."""
+        n, r, p = (int(value) for value in encoded.split("$")[1:4])
+        return (n, r, p) != (self.n, self.r, self.p)
+
+
+@register_hasher
+class BCryptHasher(PasswordHasher):
+    """bcrypt, with a cost of `2 ** rounds` iterations."""
+
+    algorithm = "bcrypt"
+
+    def __init__(self, rounds: int = 12):
+        """Initialize the hasher.
+
+        Raises:
+            ImportError: If the bcrypt package is not installed.
+        """
+        if bcrypt is None:
+            raise ImportError("The bcrypt hasher requires bcrypt")
+        self.rounds = rounds
+
+    @classmethod
+    def from_env(cls) -> "BCryptHasher":
+        """Create a hasher with `PASSWORD_BCRYPT_ROUNDS` rounds."""
+        return cls(_getenv_int("PASSWORD_BCRYPT_ROUNDS", 12))
+
+    def encode(self, password: str) -> str:
+        """Hash a password."""
+        salt = bcrypt.gensalt(self.rounds)
+        digest = bcrypt.hashpw(password.encode(), salt)
+        return "{}${}".format(self.algorithm, digest.decode())
+
+    def verify(self, password: str, encoded: str) -> bool:
+        """Tell whether a password matches a hash."""
+        digest = encoded.split("$", 1)[1]
+        return bcrypt.checkpw(password.encode(), digest.encode())
+
+    def needs_update(self, encoded: str) -> bool:
+        """Tell whether a hash was made with other rounds."""
+        return int(encoded.split("$")[3]) != self.rounds
+
+
+_hasher: Union[PasswordHasher, None] = None
+
+
+def default_hasher() -> PasswordHasher:
+    """Return the hasher new passwords are hashed with.
+
+    Raises:
+        ValueError: If `PASSWORD_HASHER` is not a registered algorithm.
+    """
+    global _hasher
+    if _hasher is None:
+        algorithm = getenv("PASSWORD_HASHER", PBKDF2Hasher.algorithm)
+        if algorithm not in HASHERS:
+            raise ValueError("Unknown password hasher {}".format(algorithm))
+        _hasher = HASHERS[algorithm].from_env()
+    return _hasher
+
+
+def make_password(password: str) -> str:
+    """Hash a password with the default hasher."""
+    return default_hasher().encode(password)
+
+
+def needs_update(encoded: str) -> bool:
+    """Tell whether a stored hash should be replaced by one of the default
+    hasher, i.e. was made with another algorithm or other parameters."""
+    hasher = default_hasher()
+    algorithm = encoded.split("$", 1)[0]
+    if algorithm == encoded:  # unprefixed SHA-256 of the earlier versions
+        return True
+
+    try:
+        if algorithm == hasher.algorithm:
+            return hasher.needs_update(encoded)
+    except (IndexError, ValueError):  # malformed hash
+        return False
+
+    return algorithm in HASHERS
+
+
+def check_password(password: str, encoded: str) -> bool:
+    """Tell whether a password matches a stored hash, whatever the hasher
+    it was made with (see `needs_update` to replace the hash)."""
+    hasher = default_hasher()
+    algorithm = encoded.split("$", 1)[0]
+    if algorithm == encoded:  # unprefixed SHA-256 of the earlier versions
+        digest = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(digest, encoded.lower())
+
+    try:
+        if algorithm == hasher.algorithm:
+            return hasher.verify(password, encoded)
+        if algorithm in HASHERS:
+            return HASHERS[algorithm]().verify(password, encoded)
+    # bcrypt missing, or malformed hash
+    except (ImportError, IndexError, ValueError):
+        pass
+
+    return False
+
+
+def benchmark(
+    hasher: PasswordHasher, duration: float = 2.0
+) -> Dict[str, Union[str, int, float]]:
+    """Measure how many passwords a hasher hashes per second.
+
+    Returns:
+        dict: The `hasher`, its `hashes_per_sec`, the `ms_per_hash` and the
+         `memory` (in bytes) one hash takes, see `measure_memory`.
+    """
+    hashes = 0
+    start = time.perf_counter()
+    while hashes == 0 or time.perf_counter() - start < duration:
+        hasher.encode("benchmark")
+        hashes += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "hasher": repr(hasher),
+        "hashes_per_sec": hashes / elapsed,
+        "ms_per_hash": 1000 * elapsed / hashes,
+        "memory": measure_memory(hasher),
+    }
+
+
+def _hash_memory(hasher: PasswordHasher) -> int:
+    """Return the growth of the peak RSS of the process, in bytes, while it
+    hashes a password."""
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    hasher.encode("benchmark")
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return 1024 * (after - before)  # ru_maxrss is in KiB on Linux
+
+
+def measure_memory(hasher: PasswordHasher) -> int:
+    """Measure the memory one hash takes, in bytes, in a process forked by
+    the fork server: the peak RSS of this process, which forked and spawned
+    processes inherit, already covers the hashes it made."""
+    context = multiprocessing.get_context("forkserver")
+    with ProcessPoolExecutor(1, mp_context=context) as executor:
+        return executor.submit(_hash_memory, hasher).result()
+
+
+def _parse_hasher(spec: str) -> PasswordHasher:
+    """Create a hasher from `<algorithm>[:<param>=<value>,...]`."""
+    algorithm, _, params = spec.partition(":")
+    kwargs = {}
+    for param in filter(None, params.split(",")):
+        name, _, value = param.partition("=")
+        kwargs[name] = int(value)
+    return HASHERS[algorithm](**kwargs)
+
+
+if __name__ == "__main__":
+    specs = sys.argv[1:] or [
+        name for name in HASHERS if name != "bcrypt" or bcrypt is not None
+    ]
+    row = "{:<40} {:>10} {:>10} {:>12}"
+    print(row.format("hasher", "hashes/s", "ms/hash", "memory (KiB)"))
+    for spec in specs:
+        result = benchmark(_parse_hasher(spec))
+        print(
+            row.format(
+                result["hasher"],
+                "{:.1f}".format(result["hashes_per_sec"]),
+                "{:.1f}".format(result["ms_per_hash"]),
+                "{:.0f}".format(result["memory"] / 1024),
+            )
+        )
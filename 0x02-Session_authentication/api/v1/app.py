@@ -8,35 +8,14 @@ from typing import Dict, Tuple
 from flask import Flask, abort, jsonify, request
 from flask_cors import CORS
 
+from api.v1.auth import EXCLUDED_PATHS, auth_from_type
+from api.v1.auth.context import start_auth_context
 from api.v1.views import app_views
 
 app = Flask(__name__)
 app.register_blueprint(app_views)
 CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
-auth = None
-
-auth_type = getenv("AUTH_TYPE")
-
-if auth_type == "basic_auth":
-    from api.v1.auth.basic_auth import BasicAuth
-
-    auth = BasicAuth()
-elif auth_type == "auth":
-    from api.v1.auth.auth import Auth
-
-    auth = Auth()
-elif auth_type == "session_auth":
-    from api.v1.auth.session_auth import SessionAuth
-
-    auth = SessionAuth()
-elif auth_type == "session_exp_auth":
-    from api.v1.auth.session_exp_auth import SessionExpAuth
-
-    auth = SessionExpAuth()
-elif auth_type == "session_db_auth":
-    from api.v1.auth.session_db_auth import SessionDBAuth
-
-    auth = SessionDBAuth()
+auth = auth_from_type(getenv("AUTH_TYPE"))
 
 
 @app.errorhandler(404)
@@ -63,18 +42,14 @@ def auth_middleware():
     if auth is None:
         return None
 
-    excluded_paths = [
-        "/api/v1/status/",
-        "/api/v1/unauthorized/",
-        "/api/v1/forbidden/",
-        "/api/v1/auth_session/login/",
-    ]
+    # credentials and user are resolved once, then shared with the views
+    context = start_auth_context(auth, request)
 
-    if not auth.require_auth(request.path, excluded_paths):
+    if not auth.require_auth(request.path, EXCLUDED_PATHS):
         return None
 
-    auth_header = auth.authorization_header(request)
-    session_cookie = auth.session_cookie(request)
+    auth_header = context.authorization_header
+    session_cookie = context.session_cookie
 
     if auth_header and session_cookie:  # one auth type at a time.
         return None
@@ -82,7 +57,7 @@ def auth_middleware():
     if not auth_header and not session_cookie:  # no auth type provided.
         abort(401)
 
-    user = auth.current_user(request)
+    user = context.current_user
     if user is None:
         abort(403)
 
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+
+"""This package implements the API as an ASGI application.
+
+It serves the same routes as the Flask application of `api.v1.app`, with
+the same responses, on an asyncio event loop: run it with
+`python3 -m api.v1.asgi.app` (requires `uvicorn`) or any ASGI server.
+"""
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+ASGI application of the API
+"""
+import traceback
+from os import getenv
+from typing import Callable
+
+from api.v1.asgi.routing import HTTPError, Request, Response, abort, jsonify
+from api.v1.asgi.store import AsyncAuth
+from api.v1.asgi.views import router, writer
+from api.v1.auth import EXCLUDED_PATHS, auth_from_type
+
+_auth = auth_from_type(getenv("AUTH_TYPE"))
+auth = AsyncAuth(_auth) if _auth is not None else None
+
+ERRORS = {401: "Unauthorized", 403: "Forbidden", 404: "Not found"}
+HTTP_REASONS = {405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def error_response(status: int) -> Response:
+    """Return the response of an aborted request."""
+    if status in ERRORS:
+        response = jsonify({"error": ERRORS[status]})
+    else:
+        response = Response(
+            HTTP_REASONS.get(status, "Error").encode(),
+            content_type="text/html; charset=utf-8",
+        )
+    response.status = status
+    return response
+
+
+async def auth_middleware(request: Request) -> None:
+    """Authenticate the request, as the Flask `before_request` handler."""
+    if auth is None:
+        return None
+
+    if not _auth.require_auth(request.path, EXCLUDED_PATHS):
+        return None
+
+    auth_header = _auth.authorization_header(request)
+    session_cookie = _auth.session_cookie(request)
+
+    if auth_header and session_cookie:  # one auth type at a time.
+        return None
+
+    if not auth_header and not session_cookie:  # no auth type provided.
+        abort(401)
+
+    # resolved once, then read by the views from the request
+    user = await auth.current_user(request)
+    if user is None:
+        abort(403)
+
+    request.current_user = user
+
+
+async def _read_body(receive: Callable) -> bytes:
+    """Read the whole body of a request."""
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _lifespan(receive: Callable, send: Callable) -> None:
+    """Run the startup and shutdown of the application."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await writer.close()  # persist the pending writes
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope: dict, receive: Callable, send: Callable) -> None:
+    """ASGI entry point."""
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return None
+
+    request = Request(scope, await _read_body(receive))
+    try:
+        await auth_middleware(request)
+        view, kwargs = router.match(request.method, request.path)
+        response = await view(request, **kwargs)
+        if isinstance(response, tuple):
+            response, response.status = response
+    except HTTPError as e:
+        response = error_response(e.status)
+    except Exception:
+        traceback.print_exc()
+        response = error_response(500)
+
+    if request.path.startswith("/api/v1/"):
+        response.headers.append(("access-control-allow-origin", "*"))
+    await response.send(send, head=request.method == "HEAD")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    host = getenv("API_HOST", "0.0.0.0")
+    port = int(getenv("API_PORT", "5000"))
+    uvicorn.run(app, host=host, port=port)
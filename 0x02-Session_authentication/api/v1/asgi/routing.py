@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+"""This module implements the requests, responses and routing of the ASGI
+application, mirroring the parts of Flask the API uses."""
+import json
+import re
+from email.parser import BytesParser
+from http.cookies import CookieError, SimpleCookie
+from typing import Any, Awaitable, Callable, Dict, List, Pattern, Tuple
+from urllib.parse import parse_qsl
+
+
+class HTTPError(Exception):
+    """Error aborting a request with an HTTP status."""
+
+    def __init__(self, status: int):
+        """Initialize the error with its HTTP status."""
+        super().__init__(status)
+        self.status = status
+
+
+def abort(status: int) -> None:
+    """Abort the request with an HTTP status, like `flask.abort`."""
+    raise HTTPError(status)
+
+
+class Headers:
+    """Case-insensitive headers of a request."""
+
+    def __init__(self, raw: List[Tuple[bytes, bytes]]):
+        """Decode the headers of an ASGI scope."""
+        self._headers: Dict[str, str] = {}
+        for name, value in raw:
+            name = name.decode("latin-1").lower()
+            value = value.decode("latin-1")
+            if name in self._headers:
+                separator = "; " if name == "cookie" else ", "
+                value = self._headers[name] + separator + value
+            self._headers[name] = value
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Return the value of a header, or `default`."""
+        return self._headers.get(name.lower(), default)
+
+
+class Request:
+    """HTTP request, with the attributes of a Flask request the API uses."""
+
+    def __init__(self, scope: dict, body: bytes):
+        """Initialize the request of an ASGI scope.
+
+        Args:
+            scope (dict): The ASGI scope of the request.
+            body (bytes): The body of the request.
+        """
+        self.method: str = scope["method"]
+        self.path: str = scope["path"]
+        self.headers = Headers(scope.get("headers", []))
+        self.body = body
+        self.current_user = None
+        self._form = None
+
+        cookie = SimpleCookie()
+        try:
+            cookie.load(self.headers.get("cookie", ""))
+        except CookieError:
+            pass
+        self.cookies = {name: morsel.value for name, morsel in cookie.items()}
+
+    @property
+    def mimetype(self) -> str:
+        """The media type of the body."""
+        content_type = self.headers.get("content-type", "")
+        return content_type.split(";")[0].strip().lower()
+
+    def get_json(self) -> Any:
+        """Return the JSON body, or None if the body is not JSON.
+
+        Raises:
+            ValueError: If the body is invalid JSON.
+        """
+        mimetype = self.mimetype
+        if mimetype != "application/json" and not (
+            mimetype.startswith("application/") and mimetype.endswith("+json")
+        ):
+            return None
+
+        return json.loads(self.body)
+
+    @property
+    def form(self) -> Dict[str, str]:
+        """The fields of an urlencoded or multipart form body."""
+        if self._form is not None:
+            return self._form
+
+        self._form = {}
+        if self.mimetype == "application/x-www-form-urlencoded":
+            self._form = dict(
+                parse_qsl(self.body.decode("latin-1"), keep_blank_values=True)
+            )
+        elif self.mimetype == "multipart/form-data":
+            header = "Content-Type: {}\r\n\r\n".format(
+                self.headers.get("content-type")
+            )
+            message = BytesParser().parsebytes(header.encode() + self.body)
+            for part in message.get_payload() or []:
+                name = part.get_param("name", header="content-disposition")
+                if name and not part.get_filename():
+                    payload = part.get_payload(decode=True) or b""
+                    self._form[name] = payload.decode()
+
+        return self._form
+
+
+class Response:
+    """HTTP response."""
+
+    def __init__(
+        self,
+        body: bytes = b"",
+        status: int = 200,
+        content_type: str = "application/json",
+    ):
+        """Initialize the response."""
+        self.body = body
+        self.status = status
+        self.headers: List[Tuple[str, str]] = [("content-type", content_type)]
+
+    def set_cookie(self, name: str, value: str) -> None:
+        """Set a cookie on the whole site, like Flask's `set_cookie`."""
+        cookie = SimpleCookie()
+        cookie[name] = value
+        cookie[name]["path"] = "/"
+        self.headers.append(("set-cookie", cookie[name].OutputString()))
+
+    async def send(self, send: Callable, head: bool = False) -> None:
+        """Send the response through an ASGI `send` callable."""
+        headers = self.headers + [("content-length", str(len(self.body)))]
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status,
+                "headers": [
+                    (name.encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers
+                ],
+            }
+        )
+        await send(
+            {"type": "http.response.body", "body": b"" if head else self.body}
+        )
+
+
+def jsonify(data: Any) -> Response:
+    """Return a JSON response, serialized as Flask's `jsonify` does."""
+    body = json.dumps(data, sort_keys=True, separators=(",", ":")) + "\n"
+    return Response(body.encode())
+
+
+View = Callable[..., Awaitable[Any]]
+
+
+class Router:
+    """Map paths and methods to views.
+
+    Rules are written as Flask rules, e.g. `/users/<user_id>`, and match
+    with or without a trailing slash.
+    """
+
+    def __init__(self, prefix: str = ""):
+        """Initialize a router of rules under `prefix`."""
+        self.prefix = prefix
+        self.routes: List[Tuple[Pattern, frozenset, View]] = []
+
+    def route(self, rule: str, methods: Tuple[str, ...] = ("GET",)):
+        """Decorator registering a view for a rule."""
+        pattern = re.sub(
+            r"<(\w+)>", r"(?P<\1>[^/]+)", re.escape(self.prefix + rule)
+        )
+        methods = set(methods)
+        if "GET" in methods:
+            methods.add("HEAD")
+
+        def decorator(view: View) -> View:
+            self.routes.append(
+                (
+                    re.compile("^{}/?$".format(pattern.rstrip("/"))),
+                    frozenset(methods),
+                    view,
+                )
+            )
+            return view
+
+        return decorator
+
+    def match(self, method: str, path: str) -> Tuple[View, Dict[str, str]]:
+        """Return the view of a request and its path parameters.
+
+        Raises:
+            HTTPError: 404 if no rule matches the path, 405 if none allows
+            the method.
+        """
+        allowed = set()
+        for pattern, methods, view in self.routes:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            if method in methods:
+                return view, match.groupdict()
+            allowed |= methods
+
+        if method == "OPTIONS" and allowed:
+            return _options(allowed | {"OPTIONS"}), {}
+        raise HTTPError(405 if allowed else 404)
+
+
+def _options(allowed: set) -> View:
+    """Return the view answering an OPTIONS request, as Flask does."""
+
+    async def options(request: Request) -> Response:
+        response = Response(content_type="text/html; charset=utf-8")
+        response.headers.append(("allow", ", ".join(sorted(allowed))))
+        return response
+
+    return options
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+"""This module implements the asynchronous access to the models and
+sessions of the ASGI application."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, TypeVar, Union
+
+import models.base
+from models.base import Base
+
+User = TypeVar("User")
+
+
+async def _blocking(call: Callable, *args: Any) -> Any:
+    """Run a blocking call in the default executor."""
+    return await asyncio.get_running_loop().run_in_executor(None, call, *args)
+
+
+class ModelWriter:
+    """Task persisting the objects saved or removed, one batch at a time.
+
+    Writes are queued, and the task applies all the queued writes within
+    one `Base.batch()` in its own thread, so the event loop never waits on
+    a file and concurrent requests share one write per model. A request
+    awaiting its write reads it back once it is persisted.
+    """
+
+    def __init__(self):
+        """Initialize the writer; its task starts with the first write."""
+        self._queue: Union[asyncio.Queue, None] = None
+        self._task: Union[asyncio.Task, None] = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def submit(self, write: Callable[[], None]) -> None:
+        """Queue a write (e.g. `user.save`) and wait until it is persisted.
+
+        Raises:
+            Exception: The exception raised by the write, if any.
+        """
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((write, future))
+        await future
+
+    async def _run(self) -> None:
+        """Apply the queued writes, batch after batch."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            errors = await loop.run_in_executor(
+                self._executor, self._apply, [write for write, _ in batch]
+            )
+            for (_, future), error in zip(batch, errors):
+                if future.done():  # the request was cancelled
+                    continue
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+
+            for _ in batch:
+                self._queue.task_done()
+
+    @staticmethod
+    def _apply(
+        writes: List[Callable[[], None]]
+    ) -> List[Union[Exception, None]]:
+        """Apply writes, persisting them once; return their errors."""
+        errors = []
+        try:
+            with Base.batch():
+                for write in writes:
+                    try:
+                        write()
+                    except Exception as e:
+                        errors.append(e)
+                    else:
+                        errors.append(None)
+        except Exception as e:  # persisting failed: every write did
+            return [e] * len(writes)
+
+        return errors
+
+    async def close(self) -> None:
+        """Wait for the queued writes, then stop the task."""
+        if self._task is None:
+            return
+
+        await self._queue.join()
+        self._task.cancel()
+        self._task = None
+
+
+class AsyncModelStore:
+    """Asynchronous access to the objects of a model.
+
+    Objects are read straight from memory, unless the models are stored in
+    SQLite or in files shared with other processes, which a read may load
+    again, in which case reads run in the default executor. Writes go
+    through a `ModelWriter`.
+    """
+
+    def __init__(self, model: type, writer: ModelWriter):
+        """Initialize the store of a model."""
+        self.model = model
+        self.writer = writer
+
+    async def _read(self, call: Callable, *args: Any) -> Any:
+        """Run a read, off the event loop if it may block."""
+        if models.base.STORAGE is None and not models.base.STORAGE_SHARED:
+            return call(*args)
+        return await _blocking(call, *args)
+
+    async def get(self, obj_id: str) -> Union[Base, None]:
+        """Return an object by ID, or None."""
+        return await self._read(self.model.get, obj_id)
+
+    async def all(self) -> List[Base]:
+        """Return every object."""
+        return await self._read(lambda: self.model.query().all())
+
+    async def count(self) -> int:
+        """Return the number of objects."""
+        return await self._read(self.model.count)
+
+    async def first(self, **conditions: Any) -> Union[Base, None]:
+        """Return the first object matching exact conditions, or None."""
+        return await self._read(
+            lambda: self.model.query().where(**conditions).first()
+        )
+
+    async def call(self, call: Callable, *args: Any) -> Any:
+        """Run a slow call, e.g. checking a password, off the event loop."""
+        return await _blocking(call, *args)
+
+    async def save(self, obj: Base) -> None:
+        """Save an object, once persisted."""
+        await self.writer.submit(obj.save)
+
+    async def remove(self, obj: Base) -> None:
+        """Remove an object, once persisted."""
+        await self.writer.submit(obj.remove)
+
+
+class AsyncAuth:
+    """Asynchronous interface of an authentication mechanism.
+
+    Every call runs in the default executor: whatever the session backend,
+    it looks up the user in the models, and may check a password, write a
+    session or take the locks of the session store, so the event loop never
+    blocks on storage or hashing.
+    """
+
+    def __init__(self, auth):
+        """Initialize the interface of an `Auth` object."""
+        self.auth = auth
+
+    async def _call(self, call: Callable, *args: Any) -> Any:
+        """Run a call of the auth."""
+        return await _blocking(call, *args)
+
+    async def current_user(self, request) -> Union[User, None]:
+        """Return the authenticated user of a request."""
+        return await self._call(self.auth.current_user, request)
+
+    async def create_session(self, user_id: str) -> Union[str, None]:
+        """Create a session for a user."""
+        return await self._call(self.auth.create_session, user_id)
+
+    async def destroy_session(self, request) -> bool:
+        """Destroy the session of a request."""
+        return await self._call(self.auth.destroy_session, request)
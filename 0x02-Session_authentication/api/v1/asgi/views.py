@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+"""This module implements the views of the ASGI application, answering as
+the Flask views of `api.v1.views` do."""
+import os
+from typing import Any, Tuple
+
+from api.v1.asgi.routing import Request, Response, Router, abort, jsonify
+from api.v1.asgi.store import AsyncModelStore, ModelWriter
+from models.user import User
+
+router = Router(prefix="/api/v1")
+writer = ModelWriter()
+users = AsyncModelStore(User, writer)
+
+User.load_from_file()
+
+
+@router.route("/status")
+async def status(request: Request) -> Response:
+    """GET /api/v1/status"""
+    return jsonify({"status": "OK"})
+
+
+@router.route("/stats")
+async def stats(request: Request) -> Response:
+    """GET /api/v1/stats"""
+    return jsonify({"users": await users.count()})
+
+
+@router.route("/unauthorized")
+async def unauthorized(request: Request) -> None:
+    """GET /api/v1/unauthorized"""
+    abort(401)
+
+
+@router.route("/forbidden")
+async def forbidden(request: Request) -> None:
+    """GET /api/v1/forbidden"""
+    abort(403)
+
+
+@router.route("/users")
+async def view_all_users(request: Request) -> Response:
+    """GET /api/v1/users"""
+    return jsonify([user.to_json() for user in await users.all()])
+
+
+@router.route("/users/<user_id>")
+async def view_one_user(request: Request, user_id: str) -> Response:
+    """GET /api/v1/users/:id ('me' for the current user)"""
+    current_user = request.current_user
+    if user_id == "me":
+        if current_user is None:
+            abort(404)
+
+        return jsonify(current_user.to_json())
+
+    if current_user is not None and current_user.id == user_id:
+        user = current_user  # already looked up by the auth middleware
+    else:
+        user = await users.get(user_id)
+    if user is None:
+        abort(404)
+    return jsonify(user.to_json())
+
+
+@router.route("/users/<user_id>", methods=("DELETE",))
+async def delete_user(request: Request, user_id: str) -> Tuple[Response, int]:
+    """DELETE /api/v1/users/:id"""
+    user = await users.get(user_id)
+    if user is None:
+        abort(404)
+    await users.remove(user)
+    return jsonify({}), 200
+
+
+@router.route("/users", methods=("POST",))
+async def create_user(request: Request) -> Tuple[Response, int]:
+    """POST /api/v1/users"""
+    rj = None
+    error_msg = None
+    try:
+        rj = request.get_json()
+    except Exception:
+        rj = None
+    if rj is None:
+        error_msg = "Wrong format"
+    if error_msg is None and rj.get("email", "") == "":
+        error_msg = "email missing"
+    if error_msg is None and rj.get("password", "") == "":
+        error_msg = "password missing"
+    if error_msg is None:
+        try:
+            user = User()
+            user.email = rj.get("email")
+            # hashing the password is slow: off the event loop
+            await users.call(setattr, user, "password", rj.get("password"))
+            user.first_name = rj.get("first_name")
+            user.last_name = rj.get("last_name")
+            await users.save(user)
+            return jsonify(user.to_json()), 201
+        except Exception as e:
+            error_msg = "Can't create User: {}".format(e)
+    return jsonify({"error": error_msg}), 400
+
+
+@router.route("/users/<user_id>", methods=("PUT",))
+async def update_user(request: Request, user_id: str) -> Tuple[Any, int]:
+    """PUT /api/v1/users/:id"""
+    user = await users.get(user_id)
+    if user is None:
+        abort(404)
+    rj = None
+    try:
+        rj = request.get_json()
+    except Exception:
+        rj = None
+    if rj is None:
+        return jsonify({"error": "Wrong format"}), 400
+    if rj.get("first_name") is not None:
+        user.first_name = rj.get("first_name")
+    if rj.get("last_name") is not None:
+        user.last_name = rj.get("last_name")
+    await users.save(user)
+    return jsonify(user.to_json()), 200
+
+
+@router.route("/auth_session/login", methods=("POST",))
+async def login(request: Request) -> Any:
+    """POST /api/v1/auth_session/login"""
+    email = request.form.get("email")
+    if not email:
+        return jsonify({"error": "email missing"}), 400
+
+    password = request.form.get("password")
+    if not password:
+        return jsonify({"error": "password missing"}), 400
+
+    user = await users.first(email=email)
+    if user is None:
+        return jsonify({"error": "no user found for this email"}), 404
+
+    if not await users.call(user.is_valid_password, password):
+        return jsonify({"error": "wrong password"}), 401
+
+    if user.password_needs_update():
+        await users.call(setattr, user, "password", password)
+        await users.save(user)
+
+    from api.v1.asgi.app import auth
+
+    session_id = await auth.create_session(user.id)
+
+    data = jsonify(user.to_json())
+    data.set_cookie(os.environ.get("SESSION_NAME"), session_id)
+
+    return data
+
+
+@router.route("/auth_session/logout", methods=("DELETE",))
+async def logout(request: Request) -> Tuple[Response, int]:
+    """DELETE /api/v1/auth_session/logout"""
+    from api.v1.asgi.app import auth
+
+    if not await auth.destroy_session(request):
+        abort(404)
+
+    return jsonify({}), 200
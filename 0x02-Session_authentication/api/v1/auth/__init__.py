@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+"""This package implements the authentication mechanisms of the API."""
+from typing import Union
+
+from api.v1.auth.path_matcher import PathMatcher
+
+# paths any client may request, compiled once for `Auth.require_auth`
+EXCLUDED_PATHS = PathMatcher(
+    [
+        "/api/v1/status/",
+        "/api/v1/unauthorized/",
+        "/api/v1/forbidden/",
+        "/api/v1/auth_session/login/",
+    ]
+)
+
+
+def auth_from_type(auth_type: Union[str, None]):
+    """Return the authentication of an `AUTH_TYPE`, or None if disabled."""
+    if auth_type == "basic_auth":
+        from api.v1.auth.basic_auth import BasicAuth
+
+        return BasicAuth()
+    if auth_type == "auth":
+        from api.v1.auth.auth import Auth
+
+        return Auth()
+    if auth_type == "session_auth":
+        from api.v1.auth.session_auth import SessionAuth
+
+        return SessionAuth()
+    if auth_type == "session_exp_auth":
+        from api.v1.auth.session_exp_auth import SessionExpAuth
+
+        return SessionExpAuth()
+    if auth_type == "session_db_auth":
+        from api.v1.auth.session_db_auth import SessionDBAuth
+
+        return SessionDBAuth()
+    if auth_type == "signed_session_auth":
+        from api.v1.auth.signed_session_auth import SignedSessionAuth
+
+        return SignedSessionAuth()
+
+    return None
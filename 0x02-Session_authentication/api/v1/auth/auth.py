@@ -3,28 +3,39 @@
 """This module implements base class for Authentication mechanisms."""
 
 import os
-from typing import List, TypeVar, Union
+from functools import lru_cache
+from typing import List, Tuple, TypeVar, Union
+
+from api.v1.auth.path_matcher import PathMatcher
 
 User = TypeVar("User")
 
 
+@lru_cache(maxsize=32)
+def _compile(excluded_paths: Tuple[str, ...]) -> PathMatcher:
+    """Return the matcher of excluded paths, compiled once per list."""
+    return PathMatcher(excluded_paths)
+
+
 class Auth:
     """Auth class to manage the API authentication."""
 
     @staticmethod
-    def require_auth(path: str, excluded_paths: List[str]) -> bool:
-        """Require authentication for API paths except for excluded paths."""
+    def require_auth(
+        path: str, excluded_paths: Union[List[str], PathMatcher]
+    ) -> bool:
+        """Require authentication for API paths except for excluded paths.
+
+        `excluded_paths` may be a list of paths or, to skip compiling it on
+        each call, a `PathMatcher` built once.
+        """
         if not path or not excluded_paths:
             return True
 
-        path = path.rstrip("/") + "/"
-
-        for exc_path in excluded_paths:
-            # perform a simple a regex to accept paths matching the pattern
-            if path.startswith(exc_path.rstrip("*")):
-                return False
+        if not isinstance(excluded_paths, PathMatcher):
+            excluded_paths = _compile(tuple(excluded_paths))
 
-        return path not in excluded_paths
+        return not excluded_paths.is_excluded(path)
 
     @staticmethod
     def authorization_header(request=None) -> Union[str, None]:
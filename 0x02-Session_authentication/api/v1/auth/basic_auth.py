@@ -3,9 +3,11 @@
 """This module implements the Basic Authentication mechanism."""
 import base64
 import binascii
+import os
 from typing import Tuple, TypeVar, Union
 
 from api.v1.auth.auth import Auth
+from api.v1.auth.credentials_cache import CredentialsCache
 from models.user import User as DBUser
 
 User = TypeVar("User")
@@ -14,6 +16,23 @@ User = TypeVar("User")
 class BasicAuth(Auth):
     """BasicAuth class to manage the API authentication."""
 
+    def __init__(self):
+        """Initialize the cache of verified credentials.
+
+        Its size and the lifetime of its entries (in seconds) are read from
+        `BASIC_AUTH_CACHE_SIZE` and `BASIC_AUTH_CACHE_TTL`.
+        """
+        try:
+            max_size = int(os.environ.get("BASIC_AUTH_CACHE_SIZE", 1024))
+        except ValueError:
+            max_size = 1024
+        try:
+            ttl = float(os.environ.get("BASIC_AUTH_CACHE_TTL", 300))
+        except ValueError:
+            ttl = 300
+
+        self.credentials_cache = CredentialsCache(max_size=max_size, ttl=ttl)
+
     @staticmethod
     def extract_base64_authorization_header(authorization_header: str):
         """Return the value of the Authorization header."""
@@ -63,7 +82,14 @@ class BasicAuth(Auth):
     def user_object_from_credentials(
         user_email: str, user_pwd: str
     ) -> Union[User, None]:
-        """Return the User instance based on email and password."""
+        """Return the User instance based on email and password.
+
+        Checking the password costs a full hash (about 0.3 s of CPU with
+        the default 600000 iterations of PBKDF2), so each request with a
+        Basic `Authorization` header does. A valid password hashed with
+        other parameters than the default hasher's is hashed again, and the
+        user saved.
+        """
         if not user_email or not isinstance(user_email, str):
             return None
 
@@ -71,12 +97,15 @@ class BasicAuth(Auth):
             return None
 
         try:
-            db_user = DBUser.search({"email": user_email})
+            db_user = DBUser.query().where(email=user_email).first()
         except KeyError:
             return None
 
-        if db_user and db_user[0].is_valid_password(user_pwd):
-            return db_user[0]
+        if db_user and db_user.is_valid_password(user_pwd):
+            if db_user.password_needs_update():
+                db_user.password = user_pwd
+                db_user.save()
+            return db_user
 
         return None
 
@@ -86,6 +115,10 @@ class BasicAuth(Auth):
         if not auth_header:
             return None
 
+        user = self.cached_user(auth_header)
+        if user is not None:
+            return user
+
         base64_auth_header = self.extract_base64_authorization_header(
             auth_header
         )
@@ -105,4 +138,30 @@ class BasicAuth(Auth):
             return None
 
         user_email, user_pwd = user_credentials
-        return self.user_object_from_credentials(user_email, user_pwd)
+        user = self.user_object_from_credentials(user_email, user_pwd)
+        if user is not None:
+            self.credentials_cache.put(auth_header, user.id, user.password)
+
+        return user
+
+    def cached_user(self, auth_header: str) -> Union[User, None]:
+        """Return the user an Authorization header was already verified for.
+
+        The entry is dropped if the user was removed or changed password
+        since.
+        """
+        cached = self.credentials_cache.get(auth_header)
+        if cached is None:
+            return None
+
+        user_id, password = cached
+        try:
+            user = DBUser.get(user_id)
+        except KeyError:
+            user = None
+
+        if user is None or user.password != password:
+            self.credentials_cache.invalidate(auth_header)
+            return None
+
+        return user
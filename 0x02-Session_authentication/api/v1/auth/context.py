@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+"""This module implements the authentication context of a request."""
+from typing import Any, Callable, Union
+
+from flask import g, has_request_context
+from flask import request as flask_request
+
+
+class AuthContext:
+    """Authentication results of a request, each computed at most once.
+
+    The auth middleware starts a context for every request and keeps it on
+    `flask.g`; views and auth classes get it with `auth_context()` rather
+    than reading the credentials or looking the user up again.
+    """
+
+    def __init__(self, auth, request):
+        """Read the credentials of a request.
+
+        Args:
+            auth (Auth): The authentication of the API.
+            request (Request): The request.
+        """
+        self.auth = auth
+        self.request = request
+        self.authorization_header = auth.authorization_header(request)
+        self.session_cookie = auth.session_cookie(request)
+        self._results = {}
+
+    def memoize(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the result of `compute()`, computed once per request."""
+        if key not in self._results:
+            self._results[key] = compute()
+        return self._results[key]
+
+    def forget(self, *keys: str) -> None:
+        """Drop results that no longer hold, e.g. once logged out."""
+        for key in keys:
+            self._results.pop(key, None)
+
+    @property
+    def current_user(self):
+        """The authenticated user of the request, or None."""
+        return self.memoize(
+            "current_user", lambda: self.auth.current_user(self.request)
+        )
+
+
+def start_auth_context(auth, request) -> AuthContext:
+    """Start the authentication context of the current request."""
+    g.auth_context = AuthContext(auth, request)
+    return g.auth_context
+
+
+def auth_context(request=None) -> Union[AuthContext, None]:
+    """Return the authentication context of the current request.
+
+    Args:
+        request (Request): If given, the context is only returned if it is
+        the current request, so auth classes can be used outside of one.
+
+    Returns:
+        None outside of a request, or if authentication is disabled.
+    """
+    if not has_request_context():
+        return None
+
+    # `flask.request` is a proxy of the current request
+    if request is not None and request is not flask_request:
+        if request is not flask_request._get_current_object():
+            return None
+
+    return g.get("auth_context")
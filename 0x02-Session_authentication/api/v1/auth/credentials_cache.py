@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""This module implements a cache of verified credentials."""
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple, Union
+
+
+class CredentialsCache:
+    """TTL and LRU bounded cache of verified Authorization headers.
+
+    Headers are never kept in memory: entries are keyed on an HMAC of the
+    header under a key drawn at startup, and map to the ID of the user and
+    the password hash that was verified, so a cached entry can be checked
+    against the current password of the user.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300):
+        """Initialize the cache.
+
+        Args:
+            max_size (int): The maximum number of entries (0 disables it).
+            ttl (float): The number of seconds an entry stays valid.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._key = os.urandom(32)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _digest(self, header: str) -> bytes:
+        """Return the keyed digest of a header."""
+        return hmac.new(self._key, header.encode(), hashlib.sha256).digest()
+
+    def get(self, header: str) -> Union[Tuple[str, str], None]:
+        """Return the (user ID, password hash) verified for a header."""
+        if self.max_size <= 0:
+            return None
+
+        digest = self._digest(header)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry[2] < time.monotonic():
+                if entry is not None:
+                    del self._entries[digest]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, header: str, user_id: str, password: str) -> None:
+        """Remember that a header was verified for a user."""
+        if self.max_size <= 0:
+            return
+
+        digest = self._digest(header)
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[digest] = (user_id, password, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, header: str) -> None:
+        """Forget a header, e.g. once the password of its user changed."""
+        digest = self._digest(header)
+        with self._lock:
+            if self._entries.pop(digest, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return the cache counters."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
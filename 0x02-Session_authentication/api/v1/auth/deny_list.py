@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+"""This module implements a deny-list of revoked tokens."""
+from datetime import datetime
+
+from api.v1.auth.session_backend import SessionBackend
+
+
+class DenyList:
+    """Set of revoked token IDs, each kept until its token expires.
+
+    Once a token has expired it is rejected anyway, so the list only holds
+    the tokens revoked while still valid. Entries are stored in a session
+    backend as sessions expiring with their token, so the backend evicts
+    them, and revocations are shared by every process using the same
+    backend: with the `memory` backend they are only known to the current
+    process and lost when it exits, while the `sqlite` and `redis` backends
+    share them between processes and keep them across restarts.
+    """
+
+    prefix = "revoked:"  # keeps the entries apart from the session IDs
+
+    def __init__(self, backend: SessionBackend):
+        """Initialize a deny-list kept in a session backend."""
+        self.backend = backend
+
+    def __contains__(self, token_id: object) -> bool:
+        """Tell whether a token is revoked."""
+        if not isinstance(token_id, str):
+            return False
+        return self.backend.get(self.prefix + token_id) is not None
+
+    def add(self, token_id: str, expires_at: float) -> bool:
+        """Revoke a token.
+
+        Args:
+            token_id (str): The ID of the token.
+            expires_at (float): When the token expires.
+
+        Returns:
+            bool: False if the token was already revoked.
+        """
+        if token_id in self:
+            return False
+
+        # not a session of the user: deleting them keeps the revocations
+        self.backend.create_entry(
+            self.prefix + token_id, datetime.fromtimestamp(expires_at)
+        )
+        return True
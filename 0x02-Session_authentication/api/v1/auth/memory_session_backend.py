@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+"""This module implements the in-memory session backend."""
+import heapq
+import threading
+from datetime import datetime
+from typing import Dict, List, Tuple, Union
+
+from api.v1.auth.session_backend import SessionBackend
+from api.v1.auth.session_store import SessionStore
+
+
+class MemorySessionBackend(SessionBackend):
+    """Keep the sessions in a thread-safe in-memory store.
+
+    Expiring sessions are pushed on a min-heap ordered by expiry date, from
+    which the expired ones are evicted whenever a session is created or
+    looked up: each eviction costs O(log n), and checking that nothing has
+    expired O(1). Sessions are only shared by the threads of a process.
+    """
+
+    def __init__(self):
+        """Initialize an empty backend."""
+        self.sessions = SessionStore()
+        self.evicted = 0
+        self._expiry_heap: List[Tuple[datetime, str]] = []
+        self._expiry_lock = threading.Lock()
+
+    def create(
+        self,
+        session_id: str,
+        user_id: str,
+        created_at: datetime,
+        expires_at: Union[datetime, None] = None,
+    ) -> None:
+        """Store a new session."""
+        self.sessions[session_id] = {
+            "user_id": user_id,
+            "created_at": created_at,
+            "expires_at": expires_at,
+        }
+        if expires_at is not None:
+            with self._expiry_lock:
+                heapq.heappush(self._expiry_heap, (expires_at, session_id))
+
+        self.purge_expired()
+
+    def get(self, session_id: str) -> Union[dict, None]:
+        """Return a session, or None if it does not exist or expired."""
+        self.purge_expired()
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+
+        # the session may expire before it is evicted
+        expires_at = session["expires_at"]
+        if expires_at is not None and expires_at < datetime.now():
+            return None
+
+        return dict(session)
+
+    def touch(self, session_id: str, expires_at: datetime) -> bool:
+        """Change the expiry date of a session."""
+        session = self.get(session_id)
+        if session is None:
+            return False
+
+        session["expires_at"] = expires_at
+        self.sessions[session_id] = session
+        with self._expiry_lock:
+            heapq.heappush(self._expiry_heap, (expires_at, session_id))
+
+        return True
+
+    def delete(self, session_id: str) -> bool:
+        """Delete a session."""
+        return self.sessions.pop(session_id, None) is not None
+
+    def delete_for_user(self, user_id: str) -> int:
+        """Delete every session of a user, scanning every session."""
+        deleted = 0
+        for session_id in self.sessions:
+            session = self.sessions.get(session_id)
+            if session is not None and session["user_id"] == user_id:
+                deleted += self.delete(session_id)
+
+        return deleted
+
+    def purge_expired(self, now: datetime = None) -> int:
+        """Delete the expired sessions and return how many there were.
+
+        Args:
+            now (datetime): The current date, `datetime.now()` by default.
+        """
+        heap = self._expiry_heap
+        now = now or datetime.now()
+        # fast path, without the lock: nothing has expired yet. A racy read
+        # only defers the purge, or checks again under the lock
+        try:
+            if heap[0][0] >= now:
+                return 0
+        except IndexError:
+            return 0
+
+        evicted = 0
+        with self._expiry_lock:
+            while heap and heap[0][0] < now:
+                expires_at, session_id = heapq.heappop(heap)
+                session = self.sessions.get(session_id)
+                # the session may be destroyed, or touched since pushed
+                if session is None or session["expires_at"] != expires_at:
+                    continue
+                if self.sessions.pop(session_id, None) is not None:
+                    evicted += 1
+
+            self.evicted += evicted
+
+        return evicted
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of live and evicted sessions."""
+        return {"live": len(self.sessions), "evicted": self.evicted}
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+"""This module implements the matcher of the paths excluded from auth."""
+from functools import lru_cache
+from typing import Iterable
+
+_END = ""  # key of the nodes where an excluded prefix ends
+
+
+class PathMatcher:
+    """Excluded paths compiled into a prefix trie.
+
+    As with `Auth.require_auth`, paths are compared with a trailing slash
+    and every excluded path matches the paths it prefixes, a trailing `*`
+    being dropped: `/api/v1/stat*` excludes `/api/v1/status/`. Matching a
+    path walks the trie once, whatever the number of excluded paths, and
+    the decisions for the most recent paths are cached.
+    """
+
+    def __init__(self, excluded_paths: Iterable[str], cache_size: int = 1024):
+        """Compile excluded paths.
+
+        Args:
+            excluded_paths (Iterable[str]): The excluded paths, exact or
+                ending with `*`.
+            cache_size (int): The number of paths whose decision is cached.
+        """
+        self.excluded_paths = tuple(excluded_paths)
+        self._trie: dict = {}
+        for exc_path in self.excluded_paths:
+            node = self._trie
+            for char in exc_path.rstrip("*"):
+                node = node.setdefault(char, {})
+            node[_END] = True
+
+        self.is_excluded = lru_cache(maxsize=cache_size)(self._is_excluded)
+
+    def __len__(self) -> int:
+        """Return the number of excluded paths."""
+        return len(self.excluded_paths)
+
+    def _is_excluded(self, path: str) -> bool:
+        """Tell whether a path is excluded from authentication."""
+        path = path.rstrip("/") + "/"
+
+        node = self._trie
+        if _END in node:
+            return True
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                return False
+            if _END in node:
+                return True
+
+        return False
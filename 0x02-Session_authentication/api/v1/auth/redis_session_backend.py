@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+"""This module implements the Redis session backend."""
+from datetime import datetime
+from typing import Dict, Union
+
+from api.v1.auth.resp_client import RESPClient
+from api.v1.auth.session_backend import SessionBackend
+
+
+class RedisSessionBackend(SessionBackend):
+    """Keep the sessions on a Redis server, shared by every API node.
+
+    A session is the hash `session:<id>`, which Redis deletes itself when it
+    expires, and the IDs of the sessions of a user are kept in the set
+    `user_sessions:<user_id>`, the users having one in the set
+    `session_users`. `create`, `get` and `touch` are one pipelined round
+    trip; `delete` and `delete_for_user` take two, the second one updating
+    the sets.
+    """
+
+    users_key = "session_users"
+
+    def __init__(self, url: str, pool_size: int = 10):
+        """Initialize the backend.
+
+        Args:
+            url (str): The URL of the server, `redis://host:port/db`.
+            pool_size (int): The maximum number of connections.
+        """
+        self.client = RESPClient(url, pool_size=pool_size)
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        """Return the key of a session."""
+        return "session:{}".format(session_id)
+
+    @staticmethod
+    def _user_key(user_id: str) -> str:
+        """Return the key of the sessions of a user."""
+        return "user_sessions:{}".format(user_id)
+
+    def create(
+        self,
+        session_id: str,
+        user_id: str,
+        created_at: datetime,
+        expires_at: Union[datetime, None] = None,
+    ) -> None:
+        """Store a new session."""
+        key = self._key(session_id)
+        fields = ["user_id", user_id, "created_at", created_at.timestamp()]
+        if expires_at is not None:
+            fields += ["expires_at", expires_at.timestamp()]
+
+        commands = [("DEL", key), ("HSET", key, *fields)]
+        if expires_at is not None:
+            commands.append(
+                ("PEXPIREAT", key, int(expires_at.timestamp() * 1000))
+            )
+        commands.append(("SADD", self._user_key(user_id), session_id))
+        commands.append(("SADD", self.users_key, user_id))
+        self.client.pipeline(commands)
+
+    def create_entry(self, key: str, expires_at: datetime) -> None:
+        """Store an expiring entry, with no user and in no user's set."""
+        key = self._key(key)
+        self.client.pipeline(
+            [
+                ("DEL", key),
+                (
+                    "HSET",
+                    key,
+                    "user_id",
+                    "",
+                    "created_at",
+                    datetime.now().timestamp(),
+                    "expires_at",
+                    expires_at.timestamp(),
+                ),
+                ("PEXPIREAT", key, int(expires_at.timestamp() * 1000)),
+            ]
+        )
+
+    def get(self, session_id: str) -> Union[dict, None]:
+        """Return a session, or None if it does not exist or expired."""
+        reply = self.client.execute("HGETALL", self._key(session_id))
+        fields = dict(zip(reply[::2], reply[1::2])) if reply else {}
+        # a hash without `created_at` is a `touch` of a missing session
+        if "created_at" not in fields:
+            return None
+
+        expires_at = fields.get("expires_at")
+        session = {
+            "user_id": fields["user_id"],
+            "created_at": datetime.fromtimestamp(float(fields["created_at"])),
+            "expires_at": expires_at
+            and datetime.fromtimestamp(float(expires_at)),
+        }
+        if session["expires_at"] and session["expires_at"] < datetime.now():
+            return None
+
+        return session
+
+    def touch(self, session_id: str, expires_at: datetime) -> bool:
+        """Change the expiry date of a session."""
+        key = self._key(session_id)
+        found, _, _ = self.client.pipeline(
+            [
+                ("HEXISTS", key, "created_at"),
+                ("HSET", key, "expires_at", expires_at.timestamp()),
+                ("PEXPIREAT", key, int(expires_at.timestamp() * 1000)),
+            ]
+        )
+        if not found:
+            # HSET created the hash: drop it (it expires anyway)
+            self.client.execute("DEL", key)
+            return False
+
+        return True
+
+    def delete(self, session_id: str) -> bool:
+        """Delete a session."""
+        key = self._key(session_id)
+        user_id, deleted = self.client.pipeline(
+            [("HGET", key, "user_id"), ("DEL", key)]
+        )
+        if user_id is not None:
+            self.client.execute("SREM", self._user_key(user_id), session_id)
+
+        return deleted > 0
+
+    def delete_for_user(self, user_id: str) -> int:
+        """Delete every session of a user."""
+        user_key = self._user_key(user_id)
+        session_ids = self.client.execute("SMEMBERS", user_key)
+        if not session_ids:
+            return 0
+
+        replies = self.client.pipeline(
+            [("DEL", self._key(session_id)) for session_id in session_ids]
+            + [("DEL", user_key), ("SREM", self.users_key, user_id)]
+        )
+        return sum(replies[:-2])
+
+    def purge_expired(self) -> int:
+        """Forget the expired sessions of the users' sets.
+
+        Redis deletes expired sessions itself; this only trims the sets of
+        sessions of the users listed in `session_users`, so it never scans
+        the keyspace, and returns 0.
+        """
+        cursor = "0"
+        while True:
+            cursor, user_ids = self.client.execute(
+                "SSCAN", self.users_key, cursor, "COUNT", 100
+            )
+            for user_id in user_ids:
+                user_key = self._user_key(user_id)
+                session_ids = self.client.execute("SMEMBERS", user_key)
+                exists = self.client.pipeline(
+                    [("EXISTS", self._key(sid)) for sid in session_ids]
+                )
+                gone = [
+                    sid for sid, found in zip(session_ids, exists) if not found
+                ]
+                if not gone:
+                    continue
+                # Redis deletes the set of the user once it is empty
+                _, left = self.client.pipeline(
+                    [("SREM", user_key, *gone), ("EXISTS", user_key)]
+                )
+                if not left:  # the next session of the user adds it back
+                    self.client.execute("SREM", self.users_key, user_id)
+            if cursor == "0":
+                return 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return nothing: counting keys would scan the whole server."""
+        return {}
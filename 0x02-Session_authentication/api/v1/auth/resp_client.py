@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+"""This module implements a minimal client of the Redis protocol (RESP2)."""
+import queue
+import socket
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Sequence, Union
+from urllib.parse import urlparse
+
+
+class RESPError(Exception):
+    """Error replied by the server."""
+
+
+class RESPConnection:
+    """Connection to a server speaking the Redis protocol."""
+
+    def __init__(self, host: str, port: int, timeout: float = 5.0):
+        """Open a connection.
+
+        Args:
+            host (str): The host of the server.
+            port (int): The port of the server.
+            timeout (float): Seconds before a socket operation fails.
+        """
+        self.sock = socket.create_connection((host, port), timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile("rb")
+
+    @staticmethod
+    def encode(args: Sequence[Any]) -> bytes:
+        """Encode a command as an array of bulk strings."""
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    def send(self, commands: Sequence[Sequence[Any]]) -> None:
+        """Send commands in one write."""
+        self.sock.sendall(b"".join(self.encode(args) for args in commands))
+
+    def read(self) -> Any:
+        """Read a reply; an error reply is returned as a RESPError."""
+        line = self.file.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by the server")
+
+        kind, value = line[:1], line[1:-2]
+        if kind == b"+":
+            return value.decode()
+        if kind == b"-":
+            return RESPError(value.decode())
+        if kind == b":":
+            return int(value)
+        if kind == b"$":
+            length = int(value)
+            if length < 0:
+                return None
+            return self.file.read(length + 2)[:-2].decode()
+        if kind == b"*":
+            length = int(value)
+            if length < 0:
+                return None
+            return [self.read() for _ in range(length)]
+
+        raise ConnectionError("Invalid reply {!r}".format(line))
+
+    def close(self) -> None:
+        """Close the connection."""
+        self.file.close()
+        self.sock.close()
+
+
+class RESPClient:
+    """Pool of connections to a server speaking the Redis protocol.
+
+    Connections are opened when needed, up to `pool_size` of them, and
+    reused by the following commands. A pipeline sends several commands in
+    one write and then reads all of their replies, in one round trip.
+    """
+
+    def __init__(self, url: str, pool_size: int = 10, timeout: float = 5.0):
+        """Initialize the client.
+
+        Args:
+            url (str): The URL of the server, `redis://host:port/db`.
+            pool_size (int): The maximum number of connections.
+            timeout (float): Seconds before a socket operation fails.
+        """
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self._pool = queue.LifoQueue()
+        self._slots = queue.Queue()
+        for _ in range(max(pool_size, 1)):
+            self._slots.put(None)
+
+    def _connect(self) -> RESPConnection:
+        """Open a connection and select the database."""
+        conn = RESPConnection(self.host, self.port, self.timeout)
+        commands = []
+        if self.password:
+            commands.append(("AUTH", self.password))
+        if self.db:
+            commands.append(("SELECT", self.db))
+        if commands:
+            conn.send(commands)
+            for reply in [conn.read() for _ in commands]:
+                if isinstance(reply, RESPError):
+                    conn.close()
+                    raise reply
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[RESPConnection]:
+        """Borrow a connection from the pool, waiting for one if needed."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            self._slots.get(timeout=self.timeout)
+            try:
+                conn = self._connect()
+            except BaseException:
+                self._slots.put(None)
+                raise
+
+        released = False
+        try:
+            yield conn
+            self._pool.put(conn)
+            released = True
+        finally:
+            if not released:
+                # replies may be left unread on the connection: drop it
+                conn.close()
+                self._slots.put(None)
+
+    def pipeline(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        """Run commands in one round trip and return their replies.
+
+        Raises:
+            RESPError: If the server replied an error to a command.
+        """
+        with self.connection() as conn:
+            conn.send(commands)
+            replies = [conn.read() for _ in commands]
+
+        for reply in replies:
+            if isinstance(reply, RESPError):
+                raise reply
+        return replies
+
+    def execute(self, *args: Any) -> Union[Any, None]:
+        """Run a command and return its reply."""
+        return self.pipeline([args])[0]
+
+    def close(self) -> None:
+        """Close the idle connections."""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+            self._slots.put(None)
@@ -1,17 +1,20 @@
 #!/usr/bin/env python3
 
 """This module implements the Session Authentication mechanism."""
+from datetime import datetime
 from typing import Union
 from uuid import uuid4
 
 from api.v1.auth.auth import Auth, User
+from api.v1.auth.context import auth_context
+from api.v1.auth.session_backend import session_backend
 from models.user import User as DBUser
 
 
 class SessionAuth(Auth):
     """Implement Session Auth class."""
 
-    user_id_by_session_id = {}  # keeps track of user sessions
+    backend = session_backend()  # keeps track of user sessions
 
     @staticmethod
     def create_session(user_id: str = None) -> Union[str, None]:
@@ -27,7 +30,7 @@ class SessionAuth(Auth):
             return None
 
         session_id = str(uuid4())
-        SessionAuth.user_id_by_session_id[session_id] = user_id
+        SessionAuth.backend.create(session_id, user_id, datetime.now())
 
         return session_id
 
@@ -46,15 +49,32 @@ class SessionAuth(Auth):
         if not session_id or not isinstance(session_id, str):
             return None
 
-        return SessionAuth.user_id_by_session_id.get(session_id)
+        session = SessionAuth.backend.get(session_id)
+        if session is None:
+            return None
+
+        return session["user_id"]
 
     def current_user(self, request=None) -> User:
         """Return the current authenticated user."""
-        cookie = self.session_cookie(request)
-        user_id = self.user_id_for_session_id(session_id=cookie)
+        user_id = self.session_user_id(request)
 
         return DBUser.get(id=user_id)
 
+    def session_user_id(self, request=None) -> Union[str, None]:
+        """Return the User ID of the session of a request.
+
+        The session is looked up once per request, whoever asks for it.
+        """
+        context = auth_context(request)
+        if context is None:
+            return self.user_id_for_session_id(self.session_cookie(request))
+
+        return context.memoize(
+            "session_user_id",
+            lambda: self.user_id_for_session_id(context.session_cookie),
+        )
+
     def destroy_session(self, request=None) -> bool:
         """Destroy a session."""
         if not request:
@@ -64,9 +84,17 @@ class SessionAuth(Auth):
         if not session_id:
             return False
 
-        user_id = self.user_id_for_session_id(session_id=session_id)
+        user_id = self.session_user_id(request)
         if not user_id:
             return False
 
-        del SessionAuth.user_id_by_session_id[session_id]
-        return True
+        self.forget_session(request)
+        # another request may have destroyed the session in the meantime
+        return SessionAuth.backend.delete(session_id)
+
+    @staticmethod
+    def forget_session(request=None) -> None:
+        """Drop what the request context knows of a destroyed session."""
+        context = auth_context(request)
+        if context is not None:
+            context.forget("session_user_id", "current_user")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""This module defines the interface of the session backends."""
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Union
+
+
+class SessionBackend(ABC):
+    """Store the sessions of the session authentication classes.
+
+    A session is returned as a dictionary holding its `user_id`, its
+    `created_at` date and its `expires_at` date (None if it never expires).
+    Expired sessions are never returned, whether they were purged or not.
+    """
+
+    @abstractmethod
+    def create(
+        self,
+        session_id: str,
+        user_id: str,
+        created_at: datetime,
+        expires_at: Union[datetime, None] = None,
+    ) -> None:
+        """Store a new session."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, session_id: str) -> Union[dict, None]:
+        """Return a session, or None if it does not exist or expired."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def touch(self, session_id: str, expires_at: datetime) -> bool:
+        """Change the expiry date of a session.
+
+        Returns:
+            bool: False if there is no such session.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Delete a session.
+
+        Returns:
+            bool: False if there was no such session, e.g. because another
+            request deleted it already.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_for_user(self, user_id: str) -> int:
+        """Delete every session of a user and return how many there were."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Delete the expired sessions and return how many there were."""
+        raise NotImplementedError
+
+    def create_entry(self, key: str, expires_at: datetime) -> None:
+        """Store an expiring entry that belongs to no user, e.g. a revoked
+        token: it is looked up with `get` like a session, but left out of
+        the sessions of the users."""
+        self.create(key, "", datetime.now(), expires_at)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of live and evicted sessions, if known."""
+        return {}
+
+
+def session_backend() -> SessionBackend:
+    """Build the session backend configured by the environment.
+
+    `SESSION_BACKEND` is `memory` (default), `sqlite` (the database at
+    `SESSION_SQLITE_PATH`) or `redis` (the server at `SESSION_REDIS_URL`,
+    with at most `SESSION_REDIS_POOL_SIZE` connections).
+    """
+    backend = os.environ.get("SESSION_BACKEND", "memory")
+
+    if backend == "sqlite":
+        from api.v1.auth.sqlite_session_backend import SQLiteSessionBackend
+
+        return SQLiteSessionBackend(
+            os.environ.get("SESSION_SQLITE_PATH", ".sessions.sqlite3")
+        )
+
+    if backend == "redis":
+        from api.v1.auth.redis_session_backend import RedisSessionBackend
+
+        try:
+            pool_size = int(os.environ.get("SESSION_REDIS_POOL_SIZE", 10))
+        except ValueError:
+            pool_size = 10
+
+        return RedisSessionBackend(
+            os.environ.get("SESSION_REDIS_URL", "redis://localhost:6379/0"),
+            pool_size=pool_size,
+        )
+
+    from api.v1.auth.memory_session_backend import MemorySessionBackend
+
+    return MemorySessionBackend()
@@ -1,17 +1,47 @@
 #!/usr/bin/env python3
 
 """This module implements session authentication that is saved in database."""
+import os
 from datetime import datetime, timedelta
 from typing import TypeVar, Union
+from uuid import uuid4
 
 from api.v1.auth.session_exp_auth import SessionExpAuth
+from api.v1.auth.session_writer import SessionWriter
 from models.user_session import UserSession as DBUserSession
 
 UserSession = TypeVar("UserSession")
 
 
+def _session_writer() -> SessionWriter:
+    """Build the session writer configured by the environment.
+
+    `SESSION_WRITE_INTERVAL` is the number of milliseconds between two
+    writes of the sessions (0 writes them synchronously) and
+    `SESSION_WRITE_BATCH_SIZE` the number of pending sessions that triggers
+    a write.
+    """
+    try:
+        interval = int(os.environ.get("SESSION_WRITE_INTERVAL", 100)) / 1000
+    except ValueError:
+        interval = 0.1
+    try:
+        batch_size = int(os.environ.get("SESSION_WRITE_BATCH_SIZE", 100))
+    except ValueError:
+        batch_size = 100
+
+    return SessionWriter(DBUserSession, interval, batch_size)
+
+
 class SessionDBAuth(SessionExpAuth):
-    """Implement Session Authentication with data persistence."""
+    """Implement Session Authentication with data persistence.
+
+    The session backend is a write-through cache of the database: sessions
+    are looked up in the backend first, and saved or removed in the
+    database in the background by `session_writer`.
+    """
+
+    session_writer = _session_writer()
 
     @staticmethod
     def get_db_session(session_id: str) -> Union[UserSession, None]:
@@ -19,11 +49,12 @@ class SessionDBAuth(SessionExpAuth):
         if not session_id:
             return None
 
+        if SessionDBAuth.session_writer.is_removed(session_id):
+            return None
+
         try:
-            session: UserSession = DBUserSession.search(
-                {"session_id": session_id}
-            )[0]
-        except (KeyError, IndexError):
+            session: UserSession = DBUserSession.get(session_id)
+        except KeyError:
             return None
 
         return session
@@ -40,14 +71,13 @@ class SessionDBAuth(SessionExpAuth):
             str | None: The session ID is returned if everything goes
             alright, else None is returned if an invalid user ID was given.
         """
-        session_id: Union[str, None] = super().create_session(user_id=user_id)
-        if not session_id:
+        if not user_id or not isinstance(user_id, str):
             return None
 
-        session = DBUserSession(
-            session_id=session_id, user_id=user_id, id=session_id
-        )
-        session.save()
+        session = DBUserSession(session_id=str(uuid4()), user_id=user_id)
+        # the cached session expires when the stored one does
+        self.track_session(session.session_id, user_id, session.created_at)
+        SessionDBAuth.session_writer.save(session)
 
         return session.session_id
 
@@ -56,21 +86,26 @@ class SessionDBAuth(SessionExpAuth):
     ) -> Union[str, None]:
         """Return the User ID representing the UserSession in the database
         based on the `session_id`."""
+        if not session_id:
+            return None
+
+        user_id = super().user_id_for_session_id(session_id=session_id)
+        if user_id is not None:
+            return user_id
+
         session = self.get_db_session(session_id=session_id)
         if not session:
             return None
 
-        if self.session_duration <= 0:
-            return session.user_id
-
         if not session.created_at:
             return None
 
-        if datetime.now() > session.created_at + timedelta(
-            seconds=self.session_duration
+        if self.session_duration > 0 and datetime.now() > (
+            session.created_at + timedelta(seconds=self.session_duration)
         ):
             return None
 
+        self.track_session(session_id, session.user_id, session.created_at)
         return session.user_id
 
     def destroy_session(self, request=None) -> bool:
@@ -82,13 +117,10 @@ class SessionDBAuth(SessionExpAuth):
         if not session_id:
             return False
 
-        user_id = self.user_id_for_session_id(session_id=session_id)
+        user_id = self.session_user_id(request)
         if not user_id:
             return False
 
-        session = self.get_db_session(session_id=session_id)
-        if not session:
-            return False
-
-        session.remove()
-        return True
+        self.forget_session(request)
+        SessionDBAuth.backend.delete(session_id)
+        return SessionDBAuth.session_writer.remove(session_id)
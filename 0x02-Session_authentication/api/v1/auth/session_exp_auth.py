@@ -3,13 +3,19 @@
 """This module defines a class for expiring sessions"""
 import os
 from datetime import datetime, timedelta
-from typing import Union
+from typing import Dict, Union
+from uuid import uuid4
 
 from api.v1.auth.session_auth import SessionAuth
 
 
 class SessionExpAuth(SessionAuth):
-    """Implement Session Expiry Authentication class."""
+    """Implement Session Expiry Authentication class.
+
+    Sessions are stored with their expiry date, so the backend never
+    returns an expired session and evicts them (the in-memory backend as
+    they expire, see `MemorySessionBackend`).
+    """
 
     def __init__(self):
         """Initialize the session expiration object."""
@@ -20,17 +26,39 @@ class SessionExpAuth(SessionAuth):
 
     def create_session(self, user_id: str = None) -> Union[str, None]:
         """Create an expirable session."""
-        session_id = super().create_session(user_id=user_id)
-        if not session_id:
+        if not user_id or not isinstance(user_id, str):
             return None
 
-        SessionExpAuth.user_id_by_session_id[session_id] = {
-            "user_id": user_id,
-            "created_at": datetime.now(),
-        }
-
+        session_id = str(uuid4())
+        self.track_session(session_id, user_id, datetime.now())
         return session_id
 
+    def track_session(
+        self, session_id: str, user_id: str, created_at: datetime
+    ) -> None:
+        """Store a session until it expires."""
+        expires_at = None
+        if self.session_duration > 0:
+            expires_at = created_at + timedelta(seconds=self.session_duration)
+
+        SessionExpAuth.backend.create(
+            session_id, user_id, created_at, expires_at
+        )
+
+    @staticmethod
+    def evict_expired_sessions() -> int:
+        """Remove the sessions that have expired.
+
+        Returns:
+            int: The number of sessions evicted.
+        """
+        return SessionExpAuth.backend.purge_expired()
+
+    @staticmethod
+    def session_stats() -> Dict[str, int]:
+        """Return the number of live and evicted sessions."""
+        return SessionExpAuth.backend.stats()
+
     def user_id_for_session_id(
         self, session_id: str = None
     ) -> Union[str, None]:
@@ -38,19 +66,8 @@ class SessionExpAuth(SessionAuth):
         if not session_id:
             return None
 
-        session = SessionExpAuth.user_id_by_session_id.get(session_id, {})
-
-        if "created_at" not in session:
-            return None
-
-        if self.session_duration <= 0:  # non-expiry session
-            return session.get("user_id")
-
-        if (
-            session.get("created_at")
-            + timedelta(seconds=self.session_duration)
-            < datetime.now()
-        ):  # the session has expired
+        session = SessionExpAuth.backend.get(session_id)
+        if session is None:  # no such session, or it has expired
             return None
 
-        return session.get("user_id")
+        return session["user_id"]
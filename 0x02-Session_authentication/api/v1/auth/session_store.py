@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+"""This module implements a thread-safe in-memory session store."""
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator
+
+_MISSING = object()
+
+
+class SessionStore(MutableMapping):
+    """Mapping of session IDs behind a lock.
+
+    Single operations are atomic; `pop` is the one to use to check and
+    delete a session at once. A single lock is as fast as one per shard of
+    the sessions under the GIL, which serializes the operations anyway (see
+    `benchmarks/session_store_contention.py`), and costs less per call.
+    """
+
+    def __init__(self):
+        """Initialize an empty store."""
+        self._sessions: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, session_id: str) -> Any:
+        """Return the session of a session ID."""
+        with self._lock:
+            return self._sessions[session_id]
+
+    def get(self, session_id: str, default: Any = None) -> Any:
+        """Return the session of a session ID, or `default`."""
+        with self._lock:
+            return self._sessions.get(session_id, default)
+
+    def __setitem__(self, session_id: str, session: Any) -> None:
+        """Set the session of a session ID."""
+        with self._lock:
+            self._sessions[session_id] = session
+
+    def __delitem__(self, session_id: str) -> None:
+        """Delete a session."""
+        with self._lock:
+            del self._sessions[session_id]
+
+    def pop(self, session_id: str, default: Any = _MISSING) -> Any:
+        """Delete a session and return it, atomically.
+
+        Raises:
+            KeyError: If there is no such session and no default is given.
+        """
+        with self._lock:
+            if default is _MISSING:
+                return self._sessions.pop(session_id)
+            return self._sessions.pop(session_id, default)
+
+    def __contains__(self, session_id: object) -> bool:
+        """Tell whether a session exists."""
+        with self._lock:
+            return session_id in self._sessions
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over a snapshot of the session IDs."""
+        with self._lock:
+            session_ids = list(self._sessions)
+        yield from session_ids
+
+    def __len__(self) -> int:
+        """Return the number of sessions."""
+        return len(self._sessions)
+
+    def clear(self) -> None:
+        """Delete every session."""
+        with self._lock:
+            self._sessions.clear()
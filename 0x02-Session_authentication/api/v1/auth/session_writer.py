@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+"""This module implements the asynchronous writer of database sessions."""
+import atexit
+import threading
+from typing import Union
+
+
+class SessionWriter:
+    """Persist the sessions saved and removed in the background, in batches.
+
+    Pending writes are kept as ``{session_id: session}`` (``None`` for a
+    removed session), so a session created then destroyed before a flush
+    is never written. Each flush persists its batch within one
+    `model.batch()`, i.e. with one write of the model's storage.
+    """
+
+    def __init__(
+        self, model: type, interval: float = 0.1, batch_size: int = 100
+    ):
+        """Initialize the writer.
+
+        Args:
+            model (type): The model of the sessions.
+            interval (float): Seconds a write waits to be flushed with
+            the next ones (0 writes synchronously).
+            batch_size (int): Number of pending sessions that triggers a
+            flush (0 means no limit).
+        """
+        self.model = model
+        self.interval = interval
+        self.batch_size = batch_size
+        self._pending = {}
+        self._removing = set()  # removed, until the removal is persisted
+        self._cond = threading.Condition()
+        self._flushing = threading.Lock()
+        self._writer: Union[threading.Thread, None] = None
+        atexit.register(self.flush)
+
+    def save(self, session) -> None:
+        """Schedule the write of a session."""
+        self._add(session.id, session)
+
+    def remove(self, session_id: str) -> bool:
+        """Schedule the removal of a session.
+
+        Returns:
+            bool: False if its removal was already scheduled.
+        """
+        with self._cond:
+            if session_id in self._removing:
+                return False
+            self._removing.add(session_id)
+
+        self._add(session_id, None)
+        return True
+
+    def is_removed(self, session_id: str) -> bool:
+        """Tell whether a session is removed but may still be stored."""
+        with self._cond:
+            return session_id in self._removing
+
+    def _add(self, session_id: str, session) -> None:
+        """Record a pending write."""
+        if self.interval <= 0:
+            self._persist({session_id: session})
+            return
+
+        with self._cond:
+            self._pending[session_id] = session
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, daemon=True)
+                self._writer.start()
+            if len(self._pending) == 1 or self._batch_full():
+                self._cond.notify()
+
+    def _batch_full(self) -> bool:
+        """Tell whether enough writes are pending to flush them at once."""
+        return 0 < self.batch_size <= len(self._pending)
+
+    def flush(self) -> None:
+        """Persist every pending write."""
+        with self._flushing:
+            with self._cond:
+                pending, self._pending = self._pending, {}
+
+            if pending:
+                self._persist(pending)
+
+    def _persist(self, changes: dict) -> None:
+        """Save or remove sessions with one write of the storage."""
+        with self.model.batch():
+            for session_id, session in changes.items():
+                if session is not None:
+                    session.save()
+                    continue
+
+                try:
+                    session = self.model.get(session_id)
+                except KeyError:  # nothing stored yet
+                    session = None
+                if session is not None:
+                    session.remove()
+
+        with self._cond:
+            self._removing.difference_update(
+                session_id
+                for session_id, session in changes.items()
+                if session is None
+            )
+
+    def _run(self) -> None:
+        """Flush pending writes `interval` seconds after the first one, or
+        as soon as a batch is full; sleep until a write is pending."""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                self._cond.wait_for(self._batch_full, self.interval)
+
+            self.flush()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+"""This module implements stateless sessions carried by signed tokens."""
+import os
+import time
+from typing import Union
+
+from api.v1.auth.deny_list import DenyList
+from api.v1.auth.session_auth import SessionAuth
+from api.v1.auth.token_signer import TokenSigner
+
+
+class SignedSessionAuth(SessionAuth):
+    """Implement Session Authentication with signed session tokens.
+
+    The session cookie is a token signed by `TokenSigner`, so a session is
+    checked with its signature alone and any API node sharing the signing
+    keys accepts it, with no session store. Destroyed sessions are kept in
+    a deny-list, held by the session backend, until their token expires;
+    tokens live at most `SESSION_MAX_AGE` seconds so the list is bounded.
+    """
+
+    signer = TokenSigner.from_environment()
+    revoked = DenyList(SessionAuth.backend)
+
+    def __init__(self):
+        """Initialize the session duration from `SESSION_DURATION`, capped
+        by `SESSION_MAX_AGE` (one day by default), which is also the
+        duration of the sessions when `SESSION_DURATION` is 0."""
+        try:
+            self.max_age = int(os.environ.get("SESSION_MAX_AGE", 86400))
+        except ValueError:
+            self.max_age = 86400
+        if self.max_age <= 0:
+            self.max_age = 86400
+
+        try:
+            self.session_duration = int(os.environ.get("SESSION_DURATION", 0))
+        except ValueError:
+            self.session_duration = 0
+        if not 0 < self.session_duration <= self.max_age:
+            self.session_duration = self.max_age
+
+    def create_session(self, user_id: str = None) -> Union[str, None]:
+        """Return a signed session token for the user."""
+        if not user_id or not isinstance(user_id, str):
+            return None
+
+        return SignedSessionAuth.signer.sign(user_id, self.session_duration)
+
+    def _claims(self, token: str) -> Union[dict, None]:
+        """Return the claims of a valid token, expiring the tokens signed
+        with no expiry time `SESSION_MAX_AGE` seconds after their issue."""
+        claims = SignedSessionAuth.signer.verify(token)
+        if claims is None:
+            return None
+
+        if not claims["expires_at"]:
+            claims["expires_at"] = claims["issued_at"] + self.max_age
+            if claims["expires_at"] < time.time():
+                return None
+
+        return claims
+
+    def user_id_for_session_id(
+        self, session_id: str = None
+    ) -> Union[str, None]:
+        """Return the User ID of a valid session token."""
+        claims = self._claims(session_id)
+        if claims is None or claims["token_id"] in SignedSessionAuth.revoked:
+            return None
+
+        return claims["user_id"]
+
+    def destroy_session(self, request=None) -> bool:
+        """Revoke the session token of the request."""
+        if not request:
+            return False
+
+        claims = self._claims(self.session_cookie(request))
+        if claims is None:
+            return False
+
+        self.forget_session(request)
+        return SignedSessionAuth.revoked.add(
+            claims["token_id"], claims["expires_at"]
+        )
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+"""This module implements the SQLite session backend."""
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Union
+
+from api.v1.auth.session_backend import SessionBackend
+
+
+def _timestamp(value: Union[datetime, None]) -> Union[float, None]:
+    """Return the POSIX timestamp of a date, if any."""
+    return None if value is None else value.timestamp()
+
+
+def _date(value: Union[float, None]) -> Union[datetime, None]:
+    """Return the date of a POSIX timestamp, if any."""
+    return None if value is None else datetime.fromtimestamp(value)
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """Keep the sessions in a table of a SQLite database.
+
+    The database can be shared by the processes of a host, e.g. gunicorn
+    workers. Sessions are indexed by user and by expiry date, so deleting
+    the sessions of a user or the expired ones does not scan the table;
+    the expired ones are deleted once every `purge_every` creations.
+    """
+
+    def __init__(self, file_path: str, purge_every: int = 100):
+        """Initialize the backend, creating the table if needed.
+
+        Args:
+            file_path (str): The path of the SQLite database.
+            purge_every (int): Number of sessions created between two
+            purges of the expired ones.
+        """
+        self.file_path = file_path
+        self.purge_every = purge_every
+        self.evicted = 0
+        self._created = 0
+        self._local = threading.local()
+
+        with self.connection as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, "
+                "user_id TEXT NOT NULL, created_at REAL NOT NULL, "
+                "expires_at REAL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_user_id "
+                "ON sessions (user_id)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_expires_at "
+                "ON sessions (expires_at)"
+            )
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Return the connection of the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.file_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(
+        self,
+        session_id: str,
+        user_id: str,
+        created_at: datetime,
+        expires_at: Union[datetime, None] = None,
+    ) -> None:
+        """Store a new session."""
+        with self.connection as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?)",
+                (
+                    session_id,
+                    user_id,
+                    _timestamp(created_at),
+                    _timestamp(expires_at),
+                ),
+            )
+
+        self._created += 1
+        if self._created % self.purge_every == 0:
+            self.purge_expired()
+
+    def get(self, session_id: str) -> Union[dict, None]:
+        """Return a session, or None if it does not exist or expired."""
+        row = self.connection.execute(
+            "SELECT user_id, created_at, expires_at FROM sessions "
+            "WHERE id = ? AND (expires_at IS NULL OR expires_at >= ?)",
+            (session_id, datetime.now().timestamp()),
+        ).fetchone()
+        if row is None:
+            return None
+
+        return {
+            "user_id": row[0],
+            "created_at": _date(row[1]),
+            "expires_at": _date(row[2]),
+        }
+
+    def touch(self, session_id: str, expires_at: datetime) -> bool:
+        """Change the expiry date of a session."""
+        with self.connection as conn:
+            cursor = conn.execute(
+                "UPDATE sessions SET expires_at = ? WHERE id = ? "
+                "AND (expires_at IS NULL OR expires_at >= ?)",
+                (
+                    _timestamp(expires_at),
+                    session_id,
+                    datetime.now().timestamp(),
+                ),
+            )
+        return cursor.rowcount > 0
+
+    def delete(self, session_id: str) -> bool:
+        """Delete a session."""
+        with self.connection as conn:
+            cursor = conn.execute(
+                "DELETE FROM sessions WHERE id = ?", (session_id,)
+            )
+        return cursor.rowcount > 0
+
+    def delete_for_user(self, user_id: str) -> int:
+        """Delete every session of a user."""
+        with self.connection as conn:
+            cursor = conn.execute(
+                "DELETE FROM sessions WHERE user_id = ?", (user_id,)
+            )
+        return cursor.rowcount
+
+    def purge_expired(self) -> int:
+        """Delete the expired sessions and return how many there were."""
+        with self.connection as conn:
+            cursor = conn.execute(
+                "DELETE FROM sessions WHERE expires_at < ?",
+                (datetime.now().timestamp(),),
+            )
+        self.evicted += cursor.rowcount
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of live sessions and of those purged here."""
+        (live,) = self.connection.execute(
+            "SELECT COUNT(*) FROM sessions "
+            "WHERE expires_at IS NULL OR expires_at >= ?",
+            (datetime.now().timestamp(),),
+        ).fetchone()
+        return {"live": live, "evicted": self.evicted}
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+"""This module implements signed session tokens."""
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import time
+from typing import Dict, List, Tuple, Union
+
+
+def _b64encode(data: bytes) -> str:
+    """Encode bytes as unpadded URL-safe base64."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    """Decode unpadded URL-safe base64."""
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class TokenSigner:
+    """Sign and verify session tokens with a ring of HMAC-SHA256 keys.
+
+    A token is `<key ID>.<claims>.<signature>`, the claims being the user
+    ID, the issue time, the expiry time (0 if it never expires) and a
+    random token ID, joined by `:` and base64 encoded. Tokens are signed
+    with the first key of the ring and verified with the key they name, so
+    keys are rotated by putting a new key first and dropping the old one
+    once the tokens it signed have expired.
+    """
+
+    def __init__(self, keys: List[Tuple[str, bytes]]):
+        """Initialize the signer.
+
+        Args:
+            keys (list): The (key ID, secret) pairs, the signing key first.
+
+        Raises:
+            ValueError: If there is no key.
+        """
+        if not keys:
+            raise ValueError("A signing key is required")
+
+        self.signing_key_id = keys[0][0]
+        self.keys: Dict[str, bytes] = dict(keys)
+
+    @classmethod
+    def from_environment(cls) -> "TokenSigner":
+        """Build the signer of the keys in `SESSION_SIGNING_KEYS`.
+
+        The variable lists `<key ID>:<secret>` pairs separated by commas,
+        key IDs having no `.` in them. Without it, a random key is used, so
+        tokens are only valid for the current process.
+        """
+        keys = []
+        for entry in os.environ.get("SESSION_SIGNING_KEYS", "").split(","):
+            key_id, _, secret = entry.strip().partition(":")
+            if key_id and secret:
+                keys.append((key_id, secret.encode()))
+
+        return cls(keys or [(_b64encode(os.urandom(6)), os.urandom(32))])
+
+    def _signature(self, key: bytes, message: str) -> str:
+        """Return the signature of a message."""
+        return _b64encode(
+            hmac.new(key, message.encode(), hashlib.sha256).digest()
+        )
+
+    def sign(self, user_id: str, duration: int = 0) -> str:
+        """Return a token for a user.
+
+        Args:
+            user_id (str): The ID of the user.
+            duration (int): Seconds the token is valid (0 for ever).
+        """
+        issued_at = int(time.time())
+        expires_at = issued_at + duration if duration > 0 else 0
+        token_id = _b64encode(os.urandom(9))
+        claims = _b64encode(
+            "{}:{}:{}:{}".format(
+                user_id, issued_at, expires_at, token_id
+            ).encode()
+        )
+
+        message = "{}.{}".format(self.signing_key_id, claims)
+        key = self.keys[self.signing_key_id]
+        return "{}.{}".format(message, self._signature(key, message))
+
+    def verify(self, token: str) -> Union[dict, None]:
+        """Return the claims of a token.
+
+        Returns:
+            None if the token is malformed, signed with an unknown key,
+            forged or expired. Otherwise a dictionary of `user_id`,
+            `issued_at`, `expires_at` and `token_id`.
+        """
+        if not token or not isinstance(token, str):
+            return None
+
+        message, _, signature = token.rpartition(".")
+        key_id, _, claims = message.partition(".")
+        key = self.keys.get(key_id)
+        # compared as bytes, as a forged token may not be ASCII
+        if key is None or not hmac.compare_digest(
+            signature.encode(), self._signature(key, message).encode()
+        ):
+            return None
+
+        try:
+            user_id, issued_at, expires_at, token_id = (
+                _b64decode(claims).decode().split(":")
+            )
+            issued_at, expires_at = int(issued_at), int(expires_at)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+
+        if expires_at and expires_at < time.time():
+            return None
+
+        return {
+            "user_id": user_id,
+            "issued_at": issued_at,
+            "expires_at": expires_at,
+            "token_id": token_id,
+        }
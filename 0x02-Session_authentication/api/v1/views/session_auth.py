@@ -22,14 +22,17 @@ def login():
     if not password:
         return jsonify({"error": "password missing"}), 400
 
-    try:
-        user: DBUser = DBUser.search({"email": email})[0]
-    except IndexError:
+    user: DBUser = DBUser.query().where(email=email).first()
+    if user is None:
         return jsonify({"error": "no user found for this email"}), 404
 
     if not user.is_valid_password(password):
         return jsonify({"error": "wrong password"}), 401
 
+    if user.password_needs_update():
+        user.password = password
+        user.save()
+
     from api.v1.app import auth
 
     session_id = auth.create_session(user.id)
@@ -3,6 +3,7 @@
 """
 from typing import Any, Tuple
 
+from api.v1.auth.context import auth_context
 from api.v1.views import app_views
 from flask import abort, jsonify, request
 from models.user import User
@@ -14,7 +15,7 @@ def view_all_users() -> str:
     Return:
       - list of all User objects JSON represented
     """
-    all_users = [user.to_json() for user in User.all()]
+    all_users = [user.to_json() for user in User.query()]
     return jsonify(all_users)
 
 
@@ -31,13 +32,19 @@ def view_one_user(user_id: str = None) -> str:
     if user_id is None:
         abort(404)
 
+    context = auth_context()
+    current_user = context.current_user if context is not None else None
+
     if user_id == "me":
-        if request.current_user is None:
+        if current_user is None:
             abort(404)
 
-        return jsonify(request.current_user.to_json())
+        return jsonify(current_user.to_json())
 
-    user = User.get(user_id)
+    if current_user is not None and current_user.id == user_id:
+        user = current_user  # already looked up by the auth middleware
+    else:
+        user = User.get(user_id)
     if user is None:
         abort(404)
     return jsonify(user.to_json())
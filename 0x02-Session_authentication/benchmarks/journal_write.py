@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Write latency benchmark of the `journal` storage type
+
+Stores one object in a model already holding N records, the way the `file`
+storage type does, rewriting the whole JSON file, and the way the `journal`
+storage type does, appending one record to the journal (with `fsync` never
+and always), and reports the median latency of a write of each.
+
+Run from the root of the project:
+
+    python3 -m benchmarks.journal_write [N ...]
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from typing import Callable, List
+
+from models.base import Base
+from models.journal import Journal
+
+
+def record(i: int) -> dict:
+    """Return the JSON record of a user"""
+    return {
+        "id": str(uuid.UUID(int=i)),
+        "email": "user{}@example.com".format(i),
+        "_password": "$pbkdf2-sha256$1000${:032x}${:064x}".format(i, i),
+        "first_name": "First{}".format(i),
+        "last_name": "Last{}".format(i),
+        "created_at": "2024-05-01T12:00:00",
+        "updated_at": "2024-05-01T12:00:00",
+    }
+
+
+def median_latency(write: Callable[[int], None], repeat: int) -> float:
+    """Return the median latency of `repeat` writes, in milliseconds"""
+    latencies = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        write(i)
+        latencies.append(time.perf_counter() - start)
+    return 1000 * statistics.median(latencies)
+
+
+def rewrite_file(file_path: str, entries: List[tuple]) -> Callable:
+    """Return a write of the `file` storage type: the whole JSON file"""
+
+    def write(i: int):
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            Base._dump(f, entries)
+            f.flush()
+        os.replace(tmp_path, file_path)
+
+    return write
+
+
+def append_journal(journal: Journal) -> Callable:
+    """Return a write of the `journal` storage type: one record"""
+
+    def write(i: int):
+        obj = record(i)
+        journal.write([{"op": "save", "id": obj["id"], "obj": obj}])
+
+    return write
+
+
+def main(counts: List[int]):
+    """Print the latency of a write of each storage type, per count"""
+    row = "{:>9} {:>11} {:>14} {:>15}"
+    print(
+        row.format("records", "file (ms)", "journal (ms)", "+ fsync (ms)")
+    )
+    for n in counts:
+        entries = [(r["id"], json.dumps(r)) for r in map(record, range(n))]
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, ".db_User.json")
+            repeat = max(3, min(100, 100000 // n))
+            file_ms = median_latency(rewrite_file(file_path, entries), repeat)
+
+            journals = []
+            for fsync in ("never", "always"):
+                journal = Journal(
+                    os.path.join(tmp, ".db_User.journal." + fsync), fsync
+                )
+                with open(journal.file_path, "w") as f:
+                    for obj_id, obj in entries:
+                        f.write(
+                            '{{"op": "save", "id": "{}", "obj": {}}}\n'.format(
+                                obj_id, obj
+                            )
+                        )
+                journals.append(median_latency(append_journal(journal), 1000))
+                journal.close()
+
+        print(
+            row.format(
+                n,
+                "{:.3f}".format(file_ms),
+                "{:.3f}".format(journals[0]),
+                "{:.3f}".format(journals[1]),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1000, 10000, 100000, 1000000])
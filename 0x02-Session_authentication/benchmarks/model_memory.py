@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Memory benchmark of the User and UserSession objects
+
+Builds N users and N sessions as the models do now (slotted, timestamps as
+float seconds, session ID stored once as the ID) and as they did before
+(a `__dict__` per instance, two `datetime` objects, the session ID stored
+twice), and reports the memory they take, measured with tracemalloc.
+
+Run from the root of the project:
+
+    python3 -m benchmarks.model_memory [N ...]
+"""
+import gc
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime
+from typing import Callable, List
+
+from models.user import User
+from models.user_session import UserSession
+
+
+class DictBase:
+    """Base model as it was before `__slots__`"""
+
+    def __init__(self, **kwargs):
+        """Initialize the object with an ID and two datetime objects"""
+        self.id = kwargs.get("id", str(uuid.uuid4()))
+        self.created_at = datetime.utcnow()
+        self.updated_at = datetime.utcnow()
+
+
+class DictUser(DictBase):
+    """User model as it was before `__slots__`"""
+
+    def __init__(self, **kwargs):
+        """Initialize the user"""
+        super().__init__(**kwargs)
+        self.email = kwargs.get("email")
+        self._password = kwargs.get("_password")
+        self.first_name = kwargs.get("first_name")
+        self.last_name = kwargs.get("last_name")
+
+
+class DictUserSession(DictBase):
+    """UserSession model as it was before `__slots__`"""
+
+    def __init__(self, user_id: str, session_id: str, **kwargs):
+        """Initialize the session, keyed by a separate ID"""
+        super().__init__(**kwargs)
+        self.user_id = user_id
+        self.session_id = session_id
+
+
+def measure(build: Callable[[int], object], n: int) -> int:
+    """Return the bytes taken by `n` objects built by `build`"""
+    gc.collect()
+    tracemalloc.start()
+    objs: List[object] = [build(i) for i in range(n)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+    gc.collect()
+    return size
+
+
+def user(cls: type) -> Callable[[int], object]:
+    """Return a builder of users of a class"""
+    return lambda i: cls(
+        email="user{}@example.com".format(i),
+        _password="0" * 64,
+        first_name="First",
+        last_name="Last",
+    )
+
+
+def session(cls: type) -> Callable[[int], object]:
+    """Return a builder of sessions of a class"""
+    return lambda i: cls(user_id="user-id", session_id=str(uuid.uuid4()))
+
+
+def main(counts: List[int]):
+    """Print the memory of each model before and after, per count"""
+    row = "{:<12} {:>10} {:>12} {:>12} {:>8}"
+    print(row.format("model", "objects", "before (MB)", "after (MB)", "saved"))
+    models = (
+        ("User", user(DictUser), user(User)),
+        ("UserSession", session(DictUserSession), session(UserSession)),
+    )
+    for n in counts:
+        for name, before, after in models:
+            size_before = measure(before, n)
+            size_after = measure(after, n)
+            print(
+                row.format(
+                    name,
+                    n,
+                    "{:.1f}".format(size_before / 1024 ** 2),
+                    "{:.1f}".format(size_after / 1024 ** 2),
+                    "{:.0%}".format(1 - size_after / size_before),
+                )
+            )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [100000, 1000000])
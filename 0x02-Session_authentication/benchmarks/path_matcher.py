@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Benchmark of the matcher of the paths excluded from authentication
+
+Matches request paths against P excluded paths, half of them ending with
+`*`, with the linear scan `Auth.require_auth` did before, and with the
+`PathMatcher` trie, uncached and cached, and reports the time per path.
+About a third of the paths are excluded, the others go through the whole
+list with the scan; the paths repeat, as requests do, so most hit the
+cache.
+
+Run from the root of the project:
+
+    python3 -m benchmarks.path_matcher [P ...]
+"""
+import random
+import sys
+import time
+from typing import Callable, List
+
+from api.v1.auth.path_matcher import PathMatcher
+
+PATHS = 10000
+DISTINCT_PATHS = 500
+
+
+def linear_scan(path: str, excluded_paths: List[str]) -> bool:
+    """Tell whether a path is excluded, as `Auth.require_auth` did"""
+    path = path.rstrip("/") + "/"
+
+    for exc_path in excluded_paths:
+        if path.startswith(exc_path.rstrip("*")):
+            return True
+
+    return path in excluded_paths
+
+
+def excluded_paths(count: int) -> List[str]:
+    """Return `count` excluded paths, exact or ending with `*`"""
+    return [
+        "/api/v1/public/{}/{}".format(i, "*" if i % 2 else "")
+        for i in range(count)
+    ]
+
+
+def request_paths(patterns: int) -> List[str]:
+    """Return request paths drawn from a few hundred distinct ones, a third
+    of them excluded"""
+    rng = random.Random(0)
+    distinct = [
+        "/api/v1/public/{}/items".format(rng.randrange(patterns))
+        if rng.random() < 1 / 3
+        else "/api/v1/users/{}".format(rng.randrange(10 ** 6))
+        for _ in range(DISTINCT_PATHS)
+    ]
+    return [rng.choice(distinct) for _ in range(PATHS)]
+
+
+def per_path(run: Callable[[str], bool], paths: List[str]) -> float:
+    """Return the time to match a path, in microseconds"""
+    start = time.perf_counter()
+    for path in paths:
+        run(path)
+    return (time.perf_counter() - start) / len(paths) * 1e6
+
+
+def main(counts: List[int]):
+    """Print the time per path of each matcher, per number of patterns"""
+    row = "{:>8} {:>10} {:>15} {:>13} {:>8}"
+    print(
+        row.format(
+            "patterns",
+            "scan (us)",
+            "trie, no cache",
+            "trie, cached",
+            "speedup",
+        )
+    )
+    for count in counts:
+        patterns = excluded_paths(count)
+        paths = request_paths(count)
+        matcher = PathMatcher(patterns)
+        for path in paths:
+            assert linear_scan(path, patterns) == matcher.is_excluded(path)
+
+        scan = per_path(lambda p: linear_scan(p, patterns), paths)
+        trie = per_path(matcher._is_excluded, paths)
+        cached = per_path(matcher.is_excluded, paths)
+        print(
+            row.format(
+                count,
+                "{:.2f}".format(scan),
+                "{:.2f}".format(trie),
+                "{:.2f}".format(cached),
+                "{:.0f}x".format(scan / trie),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10, 100, 300, 1000])
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Contention benchmark of the in-memory session store
+
+Runs T threads doing a mix of session lookups (90%), creations and
+deletions (5% each) on the `SessionStore`, behind a single lock, and on
+the same mapping sharded over 16 locks, as the store was before, and
+reports the operations per second and the slowest operation of each.
+
+Run from the root of the project:
+
+    python3 -m benchmarks.session_store_contention [T ...]
+"""
+import random
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, List
+
+from api.v1.auth.session_store import SessionStore
+
+SESSIONS = 10000
+OPS_PER_THREAD = 50000
+
+
+class ShardedSessionStore:
+    """Sessions spread over shards, each behind its own lock, as the store
+    was before"""
+
+    def __init__(self, shards: int = 16):
+        """Initialize an empty store"""
+        self._shards: List[Dict[str, Any]] = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def _shard(self, session_id: str) -> int:
+        """Return the index of the shard of a session ID"""
+        return hash(session_id) % len(self._shards)
+
+    def get(self, session_id: str, default: Any = None) -> Any:
+        """Return the session of a session ID, or `default`"""
+        i = self._shard(session_id)
+        with self._locks[i]:
+            return self._shards[i].get(session_id, default)
+
+    def __setitem__(self, session_id: str, session: Any) -> None:
+        """Set the session of a session ID"""
+        i = self._shard(session_id)
+        with self._locks[i]:
+            self._shards[i][session_id] = session
+
+    def pop(self, session_id: str, default: Any = None) -> Any:
+        """Delete a session and return it"""
+        i = self._shard(session_id)
+        with self._locks[i]:
+            return self._shards[i].pop(session_id, default)
+
+
+def worker(store, session_ids: List[str], seed: int, slowest: list):
+    """Run the operations of a thread"""
+    rng = random.Random(seed)
+    ops = [rng.random() for _ in range(OPS_PER_THREAD)]
+    picks = [rng.choice(session_ids) for _ in range(OPS_PER_THREAD)]
+    worst = 0.0
+    for op, session_id in zip(ops, picks):
+        start = time.perf_counter()
+        if op < 0.9:
+            store.get(session_id)
+        elif op < 0.95:
+            store[session_id] = {"user_id": "user"}
+        else:
+            store.pop(session_id, None)
+        worst = max(worst, time.perf_counter() - start)
+    slowest.append(worst)
+
+
+def run(store, threads: int) -> tuple:
+    """Return the operations per second and the slowest operation (ms)"""
+    session_ids = [str(uuid.uuid4()) for _ in range(SESSIONS)]
+    for session_id in session_ids:
+        store[session_id] = {"user_id": "user"}
+
+    slowest: list = []
+    workers = [
+        threading.Thread(target=worker, args=(store, session_ids, i, slowest))
+        for i in range(threads)
+    ]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return threads * OPS_PER_THREAD / elapsed, 1000 * max(slowest)
+
+
+def main(thread_counts: List[int]):
+    """Print the throughput of each store, per number of threads"""
+    row = "{:>7} {:>14} {:>14} {:>12} {:>12}"
+    print(
+        row.format(
+            "threads", "1 lock (op/s)", "sharded (op/s)", "1 lock max",
+            "sharded max",
+        )
+    )
+    for threads in thread_counts:
+        locked, locked_max = run(SessionStore(), threads)
+        sharded, sharded_max = run(ShardedSessionStore(), threads)
+        print(
+            row.format(
+                threads,
+                "{:,.0f}".format(locked),
+                "{:,.0f}".format(sharded),
+                "{:.2f} ms".format(locked_max),
+                "{:.2f} ms".format(sharded_max),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1, 2, 4, 8, 16])
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Benchmark of the binary snapshot format against the JSON files
+
+Saves and loads N user records the way the models do, as a `.db_User.json`
+file and as a `.db_User.bin` snapshot with each compression available, and
+reports the save time, load time and file size of each.
+
+Run from the root of the project:
+
+    python3 -m benchmarks.snapshot_format [N ...]
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import time
+import uuid
+from typing import Callable, List
+
+from models import snapshot
+from models.base import Base
+from models.lazy_store import iter_json_object
+
+
+def record(i: int) -> dict:
+    """Return the JSON record of a user, with random-looking IDs and
+    hashes, which compress as poorly as real ones"""
+    digest = hashlib.sha256(b"%d" % i).hexdigest()
+    updated_at = "2024-05-01T12:{:02d}:{:02d}".format(i // 60 % 60, i % 60)
+    return {
+        "id": str(uuid.UUID(digest[:32])),
+        "email": "user{}@example.com".format(i),
+        "_password": "$pbkdf2-sha256$600000${}${}".format(
+            digest[32:], hashlib.sha256(digest.encode()).hexdigest()
+        ),
+        "first_name": "First{}".format(i),
+        "last_name": "Last{}".format(i),
+        "created_at": "2024-05-01T12:00:00",
+        "updated_at": updated_at,
+    }
+
+
+def best_of(run: Callable[[], object], repeat: int = 3) -> float:
+    """Return the fastest of a few runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return 1000 * best
+
+
+def json_format(file_path: str, records: List[tuple]) -> tuple:
+    """Return the save and load of a JSON file"""
+
+    def save():
+        with open(file_path, "w") as f:
+            Base._dump(f, records)
+
+    def load():
+        with open(file_path, "r") as f:
+            return list(iter_json_object(f))
+
+    return save, load
+
+
+def binary_format(
+    file_path: str, records: List[tuple], compression: str
+) -> tuple:
+    """Return the save and load of a snapshot"""
+
+    def save():
+        with open(file_path, "wb") as f:
+            snapshot.dump(f, records, compression=compression)
+
+    def load():
+        with open(file_path, "rb") as f:
+            return snapshot.load(f)
+
+    return save, load
+
+
+def main(counts: List[int]):
+    """Print the save time, load time and size of each format, per count"""
+    compressions = [
+        c
+        for c in snapshot.COMPRESSIONS
+        if c != "zstd" or snapshot.zstandard is not None
+    ]
+    row = "{:<12} {:>9} {:>11} {:>11} {:>10}"
+    print(row.format("format", "records", "save (ms)", "load (ms)", "size"))
+    for n in counts:
+        records = [(r["id"], r) for r in map(record, range(n))]
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, ".db_User.json")
+            formats = [("json", json_path, json_format(json_path, records))]
+            for compression in compressions:
+                bin_path = os.path.join(tmp, ".db_User.bin." + compression)
+                formats.append(
+                    (
+                        "bin/" + compression,
+                        bin_path,
+                        binary_format(bin_path, records, compression),
+                    )
+                )
+
+            for name, file_path, (save, load) in formats:
+                save_ms = best_of(save)
+                load_ms = best_of(load)
+                size = os.path.getsize(file_path)
+                print(
+                    row.format(
+                        name,
+                        n,
+                        "{:.1f}".format(save_ms),
+                        "{:.1f}".format(load_ms),
+                        "{:.1f} MB".format(size / 1024 ** 2),
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10000, 100000])
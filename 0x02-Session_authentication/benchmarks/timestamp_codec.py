@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Microbenchmark of the timestamp codec of the models
+
+Decodes and encodes N timestamps spread over a few days, as the records of
+a model are, with `models.timestamp` and with `datetime.strptime` and
+`strftime` as the models did before, and reports the time per timestamp.
+
+Run from the root of the project:
+
+    python3 -m benchmarks.timestamp_codec [N ...]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from models import timestamp
+from models.timestamp import TIMESTAMP_FORMAT
+
+
+def strings(n: int) -> List[str]:
+    """Return `n` timestamps within a week"""
+    rng = random.Random(0)
+    start = datetime(2024, 5, 1)
+    return [
+        (start + timedelta(seconds=rng.randrange(7 * 86400))).strftime(
+            TIMESTAMP_FORMAT
+        )
+        for _ in range(n)
+    ]
+
+
+def best_of(run: Callable[[], object], repeat: int = 3) -> float:
+    """Return the fastest of a few runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(counts: List[int]):
+    """Print the time per timestamp of each codec, per count"""
+    row = "{:<8} {:>10} {:>14} {:>13} {:>8}"
+    print(row.format("op", "count", "datetime (us)", "codec (us)", "speedup"))
+    for n in counts:
+        strs = strings(n)
+        datetimes = [datetime.strptime(v, TIMESTAMP_FORMAT) for v in strs]
+        seconds = [timestamp.decode(v) for v in strs]
+        ops = (
+            (
+                "decode",
+                lambda: [datetime.strptime(v, TIMESTAMP_FORMAT) for v in strs],
+                lambda: [timestamp.decode(v) for v in strs],
+            ),
+            (
+                "encode",
+                lambda: [d.strftime(TIMESTAMP_FORMAT) for d in datetimes],
+                lambda: [timestamp.encode(s) for s in seconds],
+            ),
+        )
+        for name, before, after in ops:
+            time_before = best_of(before) / n * 1e6
+            time_after = best_of(after) / n * 1e6
+            print(
+                row.format(
+                    name,
+                    n,
+                    "{:.2f}".format(time_before),
+                    "{:.2f}".format(time_after),
+                    "{:.1f}x".format(time_before / time_after),
+                )
+            )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10000, 100000])
@@ -2,38 +2,103 @@
 """ Base module
 """
 from datetime import datetime
-from typing import TypeVar, List, Iterable
-from os import path
+from typing import IO, TypeVar, Iterator, List, Iterable, Tuple, Union
+from os import getenv, path
+import atexit
 import json
+import os
+import threading
+import time
 import uuid
 
+from models.journal import Journal
+from models import snapshot, timestamp
+from models.file_lock import FileLock
+from models.lazy_store import LazyStore, iter_json_object
+from models.query import Query
+from models.unit_of_work import UnitOfWork
 
-TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+TIMESTAMP_FORMAT = timestamp.TIMESTAMP_FORMAT
 DATA = {}
+INDEXES = {}
+JOURNALS = {}
+FILE_STATES = {}
+_UNSET = object()
+
+# "file" rewrites `.db_<Class>.json` on every write, "journal" appends each
+# write to `.db_<Class>.journal` and folds it into the JSON file later on,
+# "sqlite" keeps the objects in the `STORAGE_SQLITE_PATH` database instead
+# of memory.
+STORAGE_TYPE = getenv("STORAGE_TYPE", "file")
+STORAGE_FSYNC = getenv("STORAGE_FSYNC", "never")
+try:
+    STORAGE_COMPACT_SIZE = int(getenv("STORAGE_COMPACT_SIZE", 4 * 1024 ** 2))
+except ValueError:
+    STORAGE_COMPACT_SIZE = 4 * 1024 ** 2
+
+# "json" keeps the objects in `.db_<Class>.json`, "binary" in a
+# `.db_<Class>.bin` snapshot compressed with `STORAGE_COMPRESSION`
+STORAGE_FORMAT = getenv("STORAGE_FORMAT", "json")
+STORAGE_COMPRESSION = getenv("STORAGE_COMPRESSION", "none")
+
+# when several processes share the `.db_<Class>.json` files, writes lock
+# them and merge into what other processes wrote, and reads reload them
+# once they changed
+STORAGE_SHARED = getenv("STORAGE_SHARED") == "True"
+
+# writes are flushed by a background thread every `STORAGE_FLUSH_INTERVAL`
+# milliseconds when it is set, and as soon as `STORAGE_BATCH_SIZE` objects
+# are pending when it is set
+try:
+    STORAGE_FLUSH_INTERVAL = int(getenv("STORAGE_FLUSH_INTERVAL", 0))
+except ValueError:
+    STORAGE_FLUSH_INTERVAL = 0
+try:
+    STORAGE_BATCH_SIZE = int(getenv("STORAGE_BATCH_SIZE", 0))
+except ValueError:
+    STORAGE_BATCH_SIZE = 0
+
+UNIT_OF_WORK = UnitOfWork(STORAGE_FLUSH_INTERVAL / 1000, STORAGE_BATCH_SIZE)
+atexit.register(UNIT_OF_WORK.flush)
+
+STORAGE = None
+if STORAGE_TYPE == "sqlite":
+    from models.sqlite_storage import SQLiteStorage
+
+    STORAGE = SQLiteStorage(getenv("STORAGE_SQLITE_PATH", ".db.sqlite3"))
 
 
 class Base:
-    """Base class"""
+    """Base class
+
+    Subclasses declare their attributes in `__slots__` so their instances
+    carry no `__dict__`; timestamps are kept as seconds since the epoch.
+    """
+
+    __slots__ = ("id", "_created_at", "_updated_at")
+
+    # attributes looked up through a hash index by `search`
+    indexed_attributes: Tuple[str, ...] = ()
+
+    # version of the attributes of the class, checked by binary snapshots
+    schema_version = 1
 
     def __init__(self, *args: list, **kwargs: dict):
         """Initialize a Base instance"""
         s_class = str(self.__class__.__name__)
         if DATA.get(s_class) is None:
-            DATA[s_class] = {}
+            DATA[s_class] = LazyStore(self.__class__._from_raw)
 
         self.id = kwargs.get("id", str(uuid.uuid4()))
         if kwargs.get("created_at") is not None:
-            self.created_at = datetime.strptime(
-                kwargs.get("created_at"), TIMESTAMP_FORMAT
-            )
+            self._created_at = timestamp.decode(kwargs.get("created_at"))
         else:
-            self.created_at = datetime.utcnow()
+            self._created_at = time.time()
         if kwargs.get("updated_at") is not None:
-            self.updated_at = datetime.strptime(
-                kwargs.get("updated_at"), TIMESTAMP_FORMAT
-            )
+            self._updated_at = timestamp.decode(kwargs.get("updated_at"))
         else:
-            self.updated_at = datetime.utcnow()
+            self._updated_at = time.time()
 
     def __eq__(self, other: TypeVar("Base")) -> bool:
         """Equality"""
@@ -43,63 +108,444 @@ class Base:
             return False
         return self.id == other.id
 
+    @property
+    def created_at(self) -> datetime:
+        """Creation time (UTC)"""
+        return timestamp.to_datetime(self._created_at)
+
+    @created_at.setter
+    def created_at(self, value: datetime):
+        """Set the creation time (UTC)"""
+        self._created_at = timestamp.from_datetime(value)
+
+    @property
+    def updated_at(self) -> datetime:
+        """Last update time (UTC)"""
+        return timestamp.to_datetime(self._updated_at)
+
+    @updated_at.setter
+    def updated_at(self, value: datetime):
+        """Set the last update time (UTC)"""
+        self._updated_at = timestamp.from_datetime(value)
+
+    def __setattr__(self, name: str, value):
+        """Keep the indexes of stored objects up to date"""
+        if name not in self.indexed_attributes or not self._is_stored():
+            super().__setattr__(name, value)
+            return
+
+        self.__class__._unindex(self.id, self._indexed_values())
+        super().__setattr__(name, value)
+        self.__class__._index(self.id, self._indexed_values())
+
+    def _is_stored(self) -> bool:
+        """Tell whether this exact object is in the store"""
+        objs = DATA.get(self.__class__.__name__)
+        if objs is None:
+            return False
+        return objs.peek(getattr(self, "id", None)) is self
+
+    def _indexed_values(self) -> dict:
+        """Return the values of the indexed attributes"""
+        return {k: getattr(self, k, None) for k in self.indexed_attributes}
+
+    @classmethod
+    def _stored_values(cls, obj_id: str) -> Union[dict, None]:
+        """Return the indexed values of a stored object without hydrating it"""
+        objs = DATA[cls.__name__]
+        obj = objs.peek(obj_id)
+        if obj is not None:
+            return obj._indexed_values()
+        return objs.raw(obj_id)
+
+    @classmethod
+    def _indexes(cls) -> dict:
+        """Return the indexes of the class: {attribute: {value: {id: None}}}"""
+        s_class = cls.__name__
+        if INDEXES.get(s_class) is None:
+            INDEXES[s_class] = {k: {} for k in cls.indexed_attributes}
+        return INDEXES[s_class]
+
+    @classmethod
+    def _index(cls, obj_id: str, values: dict):
+        """Add an object to the indexes"""
+        for k, index in cls._indexes().items():
+            index.setdefault(values.get(k), {})[obj_id] = None
+
+    @classmethod
+    def _unindex(cls, obj_id: str, values: dict):
+        """Remove an object from the indexes"""
+        for k, index in cls._indexes().items():
+            value = values.get(k)
+            bucket = index.get(value, {})
+            bucket.pop(obj_id, None)
+            if len(bucket) == 0:
+                index.pop(value, None)
+
+    @classmethod
+    def _record_id(cls, obj_id: str, values: dict) -> str:
+        """Return the ID a record of the JSON file is stored under"""
+        return obj_id
+
+    @classmethod
+    def _from_raw(cls, raw: Union[str, dict]) -> TypeVar("Base"):
+        """Build an object from a raw record of the store"""
+        if isinstance(raw, str):
+            raw = json.loads(raw)
+        return cls(**raw)
+
     def to_json(self, for_serialization: bool = False) -> dict:
         """Convert the object a JSON dictionary"""
         result = {}
-        for key, value in self.__dict__.items():
+        for key in self._attribute_names():
             if not for_serialization and key[0] == "_":
                 continue
+            if key in ("created_at", "updated_at"):
+                # encoded straight from the seconds since the epoch
+                value = getattr(self, "_" + key, _UNSET)
+                if value is not _UNSET:
+                    result[key] = timestamp.encode(value)
+                continue
+            value = getattr(self, key, _UNSET)
+            if value is _UNSET:
+                continue
             if type(value) is datetime:
-                result[key] = value.strftime(TIMESTAMP_FORMAT)
+                result[key] = timestamp.encode(timestamp.from_datetime(value))
             else:
                 result[key] = value
         return result
 
+    def _attribute_names(self) -> List[str]:
+        """Return the names of the attributes to convert to JSON"""
+        names = ["id", "created_at", "updated_at"]
+        for klass in reversed(self.__class__.__mro__):
+            if klass is not Base:
+                names.extend(klass.__dict__.get("__slots__", ()))
+        names.extend(getattr(self, "__dict__", ()))
+        return names
+
     @classmethod
     def load_from_file(cls):
         """Load all objects from file"""
+        UNIT_OF_WORK.flush()
+        if STORAGE is not None:
+            STORAGE.table(cls)
+            return
+
+        if STORAGE_TYPE == "journal":
+            with cls._journal().compacting:
+                cls._load_snapshot()
+                cls._replay_journal()
+        else:
+            cls._load_snapshot()
+
+    @classmethod
+    def _snapshot_path(cls) -> str:
+        """Return the path of the file holding the objects"""
+        if STORAGE_FORMAT == "binary":
+            return ".db_{}.bin".format(cls.__name__)
+        return ".db_{}.json".format(cls.__name__)
+
+    @classmethod
+    def _load_snapshot(cls):
+        """Load the raw records of the JSON file (or binary snapshot)
+
+        Objects are only built when first looked up.
+        """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
+        file_path = cls._snapshot_path()
+        objs = DATA[s_class] = LazyStore(cls._from_raw)
+        INDEXES[s_class] = None
+        FILE_STATES[s_class] = None
         if not path.exists(file_path):
             return
 
+        if STORAGE_FORMAT == "binary":
+            with open(file_path, "rb") as f:
+                FILE_STATES[s_class] = cls._file_state(os.fstat(f.fileno()))
+                schema_version, records = snapshot.load(f)
+            if records and schema_version != cls.schema_version:
+                raise ValueError(
+                    "{} has schema version {}, expected {}".format(
+                        file_path, schema_version, cls.schema_version
+                    )
+                )
+            for obj_id, obj_json in records:
+                obj_id = cls._record_id(obj_id, obj_json)
+                objs.add_raw(obj_id, obj_json)
+                cls._index(obj_id, obj_json)
+            return
+
         with open(file_path, "r") as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+            FILE_STATES[s_class] = cls._file_state(os.fstat(f.fileno()))
+            for obj_id, raw, obj_json in iter_json_object(f):
+                obj_id = cls._record_id(obj_id, obj_json)
+                objs.add_raw(obj_id, raw)
+                cls._index(obj_id, obj_json)
 
     @classmethod
     def save_to_file(cls):
         """Save all objects to file"""
+        if STORAGE is not None:
+            return  # every write is already stored
+        if STORAGE_TYPE == "journal":
+            cls.compact()
+            return
+
+        cls._write_snapshot(DATA[cls.__name__].entries(), sync=False)
+
+    @staticmethod
+    def _file_state(stat: os.stat_result) -> tuple:
+        """Return what tells a version of a file from another"""
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    @classmethod
+    def _is_stale(cls) -> bool:
+        """Tell whether another process rewrote the JSON file"""
+        file_path = cls._snapshot_path()
+        try:
+            state = cls._file_state(os.stat(file_path))
+        except FileNotFoundError:
+            state = None
+        return state != FILE_STATES.get(cls.__name__)
+
+    @classmethod
+    def _refresh(cls):
+        """Reload the objects if another process changed the JSON file
+
+        The whole file is read again, so a change made by another process
+        costs O(file) on the next read, whatever its size: the same order
+        as the write of the `file` storage type, which rewrites the whole
+        file. Records stay raw until looked up, so only the scan is paid.
+        """
+        if not STORAGE_SHARED or STORAGE is not None:
+            return
+        if STORAGE_TYPE == "journal" or cls.__name__ not in DATA:
+            return
+        if cls._is_stale():
+            cls._load_snapshot()
+
+    @classmethod
+    def _persist_shared(cls, changes: dict):
+        """Merge the changes into the JSON file shared with other processes
+
+        If another process wrote the file since it was loaded, it is
+        reloaded whole before the changes are applied again, as in
+        `_refresh`: O(file), on top of rewriting the file.
+        """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        with FileLock(".db_{}.lock".format(s_class)).exclusive():
+            if cls._is_stale():
+                cls._load_snapshot()
+                for obj_id, obj in changes.items():
+                    if obj is None:
+                        cls._unstore(obj_id)
+                    else:
+                        cls._store(obj)
+            cls._write_snapshot(DATA[s_class].entries(), sync=False)
 
-        with open(file_path, "w") as f:
-            json.dump(objs_json, f)
+    @classmethod
+    def _records(cls, entries: List[tuple]) -> List[Tuple[str, dict]]:
+        """Return (id, object or raw record) pairs as (id, dict) pairs"""
+        records = []
+        for obj_id, obj in entries:
+            if isinstance(obj, Base):
+                obj = obj.to_json(True)
+            elif isinstance(obj, str):
+                obj = json.loads(obj)
+            records.append((obj_id, obj))
+        return records
+
+    @classmethod
+    def _dump(cls, f: IO[str], entries: List[tuple]):
+        """Write (id, object or raw record) pairs as one JSON object"""
+        f.write("{")
+        for i, (obj_id, obj) in enumerate(entries):
+            if isinstance(obj, Base):
+                obj = obj.to_json(True)
+            if not isinstance(obj, str):
+                obj = json.dumps(obj)
+            f.write(
+                "{}{}: {}".format(", " if i else "", json.dumps(obj_id), obj)
+            )
+        f.write("}")
+
+    @classmethod
+    def _journal(cls) -> Journal:
+        """Return the journal of the class"""
+        s_class = cls.__name__
+        if JOURNALS.get(s_class) is None:
+            JOURNALS[s_class] = Journal(
+                ".db_{}.journal".format(s_class), fsync=STORAGE_FSYNC
+            )
+        return JOURNALS[s_class]
+
+    @classmethod
+    def _replay_journal(cls):
+        """Apply the journal records on top of the loaded snapshot"""
+        s_class = cls.__name__
+        journal = cls._journal()
+        objs = DATA[s_class]
+        for record in journal.replay():
+            obj_id = record["id"]
+            values = cls._stored_values(obj_id)
+            if values is not None:
+                cls._unindex(obj_id, values)
+                del objs[obj_id]
+            if record.get("op") == "save":
+                objs.add_raw(obj_id, record["obj"])
+                cls._index(obj_id, record["obj"])
+
+        # a compaction was interrupted: finish it now
+        if path.exists(journal.rotated_path):
+            with journal.lock:
+                cls._write_snapshot(objs.entries())
+                journal.discard_rotated()
+
+    @classmethod
+    def _write_snapshot(cls, entries: List[tuple], sync: bool = True):
+        """Atomically replace the JSON file with the given objects"""
+        s_class = cls.__name__
+        file_path = cls._snapshot_path()
+        tmp_path = "{}.{}.{}.tmp".format(
+            file_path, os.getpid(), threading.get_ident()
+        )
+        binary = STORAGE_FORMAT == "binary"
+        with open(tmp_path, "wb" if binary else "w") as f:
+            if binary:
+                snapshot.dump(
+                    f,
+                    cls._records(entries),
+                    cls.schema_version,
+                    STORAGE_COMPRESSION,
+                )
+            else:
+                cls._dump(f, entries)
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+        FILE_STATES[s_class] = cls._file_state(os.stat(file_path))
+
+    @classmethod
+    def compact(cls):
+        """Fold the journal into the JSON file"""
+        s_class = cls.__name__
+        journal = cls._journal()
+        with journal.compacting:
+            with journal.lock:
+                if not journal.rotate():
+                    return
+                entries = DATA[s_class].entries()
+
+            # writes made from now on go to a fresh journal, replayed on top
+            cls._write_snapshot(entries)
+            journal.discard_rotated()
+
+    @classmethod
+    def _compact_if_needed(cls):
+        """Compact the journal in the background once it grows too big"""
+        journal = cls._journal()
+        if journal.size < STORAGE_COMPACT_SIZE:
+            return
+        if journal.compacting.locked():
+            return
+
+        threading.Thread(target=cls.compact, daemon=True).start()
 
     def save(self):
         """Save current object"""
-        s_class = self.__class__.__name__
-        self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        self._updated_at = time.time()
+        if STORAGE is None:
+            self.__class__._store(self)
+        self.__class__._write(self.id, self)
 
     def remove(self):
         """Remove object"""
-        s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
-            del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+        if STORAGE is not None:
+            self.__class__._write(self.id, None)
+            return
+
+        if self.__class__._unstore(self.id):
+            self.__class__._write(self.id, None)
+
+    @classmethod
+    def _store(cls, obj: TypeVar("Base")):
+        """Put an object in the store and the indexes"""
+        values = cls._stored_values(obj.id)
+        if values is not None:
+            cls._unindex(obj.id, values)
+        DATA[cls.__name__][obj.id] = obj
+        cls._index(obj.id, obj._indexed_values())
+
+    @classmethod
+    def _unstore(cls, obj_id: str) -> bool:
+        """Take an object out of the store and the indexes"""
+        values = cls._stored_values(obj_id)
+        if values is None:
+            return False
+        cls._unindex(obj_id, values)
+        del DATA[cls.__name__][obj_id]
+        return True
+
+    @classmethod
+    def _write(cls, obj_id: str, obj: TypeVar("Base")):
+        """Persist a saved (or removed, if `obj` is None) object"""
+        if STORAGE_FLUSH_INTERVAL > 0:
+            UNIT_OF_WORK.start_flusher()
+
+        if UNIT_OF_WORK.deferring:
+            UNIT_OF_WORK.add(cls, obj_id, obj)
+        else:
+            cls._persist({obj_id: obj})
+
+    @classmethod
+    def _persist(cls, changes: dict):
+        """Persist the objects saved or removed: {id: obj or None}"""
+        if STORAGE is not None:
+            STORAGE.write(cls, changes)
+            return
+        if STORAGE_TYPE != "journal" and STORAGE_SHARED:
+            cls._persist_shared(changes)
+            return
+        if STORAGE_TYPE != "journal":
+            cls.save_to_file()
+            return
+
+        records = []
+        for obj_id, obj in changes.items():
+            if obj is None:
+                records.append({"op": "remove", "id": obj_id})
+            else:
+                records.append(
+                    {"op": "save", "id": obj_id, "obj": obj.to_json(True)}
+                )
+        cls._journal().write(records)
+        cls._compact_if_needed()
+
+    @classmethod
+    def batch(cls):
+        """Context manager deferring writes until it exits
+
+        All the objects saved or removed within it are persisted with one
+        write per class. It only defers writes, it is not a transaction:
+        objects are changed in memory as they are saved, and the writes
+        made before an exception are still persisted when it exits.
+        Pending writes are shared by every thread, so the batch also
+        persists the writes other threads made in the meantime.
+        """
+        return UNIT_OF_WORK.batch()
 
     @classmethod
     def count(cls) -> int:
         """Count all objects"""
+        if STORAGE is not None:
+            UNIT_OF_WORK.flush_pending()
+            return STORAGE.count(cls)
+
+        cls._refresh()
         s_class = cls.__name__
-        return len(DATA[s_class].keys())
+        return len(DATA[s_class])
 
     @classmethod
     def all(cls) -> Iterable[TypeVar("Base")]:
@@ -109,13 +555,22 @@ class Base:
     @classmethod
     def get(cls, id: str) -> TypeVar("Base"):
         """Return one object by ID"""
+        if STORAGE is not None:
+            UNIT_OF_WORK.flush_pending()
+            raw = STORAGE.get(cls, id)
+            return cls._from_raw(raw) if raw is not None else None
+
+        cls._refresh()
         s_class = cls.__name__
         return DATA[s_class].get(id)
 
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar("Base")]:
         """Search all objects with matching attributes"""
-        s_class = cls.__name__
+        if STORAGE is not None:
+            return cls._search_storage(attributes)
+
+        objs = cls._iter_candidates(attributes)
 
         def _search(obj):
             if len(attributes) == 0:
@@ -125,4 +580,55 @@ class Base:
                     return False
             return True
 
-        return list(filter(_search, DATA[s_class].values()))
+        return list(filter(_search, objs))
+
+    @classmethod
+    def query(cls) -> Query:
+        """Return a lazy query over all objects"""
+        return Query(cls)
+
+    @classmethod
+    def _iter_candidates(cls, attributes: dict) -> Iterator[TypeVar("Base")]:
+        """Iterate over the objects that may match attributes
+
+        The ID or an indexed attribute narrows the objects down when
+        possible, the other attributes are left to the caller.
+        """
+        if STORAGE is not None:
+            return iter(cls._search_storage(attributes))
+
+        cls._refresh()
+        objs = DATA[cls.__name__]
+        obj_ids = None
+        indexes = cls._indexes()
+        if "id" in attributes and isinstance(attributes["id"], str):
+            obj_ids = [attributes["id"]]
+        for k, v in attributes.items():
+            if obj_ids is not None:
+                break
+            if k not in indexes:
+                continue
+            try:
+                obj_ids = list(indexes[k].get(v, {}))
+            except TypeError:  # unhashable value, scan instead
+                continue
+
+        if obj_ids is None:
+            obj_ids = objs  # iterates over a snapshot of the IDs
+        return (obj for obj in map(objs.get, obj_ids) if obj is not None)
+
+    @classmethod
+    def _search_storage(cls, attributes: dict) -> List[TypeVar("Base")]:
+        """Search objects with matching attributes in the SQL storage"""
+        UNIT_OF_WORK.flush_pending()
+        query = {}
+        for k, v in attributes.items():
+            if type(v) is datetime:
+                v = timestamp.encode(timestamp.from_datetime(v))
+            query[k] = v
+
+        rows, leftover = STORAGE.search(cls, query)
+        objs = [cls._from_raw(raw) for raw in rows]
+        for k, v in leftover.items():
+            objs = [obj for obj in objs if getattr(obj, k) == v]
+        return objs
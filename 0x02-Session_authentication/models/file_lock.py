@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+"""This module implements an advisory lock shared between processes."""
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # not a POSIX system: locking is a no-op
+    fcntl = None
+
+
+class FileLock:
+    """Advisory lock held on a lock file with `flock`.
+
+    Every acquisition opens the lock file anew, so threads of a same
+    process exclude each other just like separate processes do.
+    """
+
+    def __init__(self, file_path: str):
+        """Initialize the lock.
+
+        Args:
+            file_path (str): The path of the lock file, created if needed.
+        """
+        self.file_path = file_path
+
+    @contextmanager
+    def _locked(self, operation: int) -> Iterator[None]:
+        """Hold the lock with the given `flock` operation."""
+        with open(self.file_path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), operation)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def exclusive(self):
+        """Context manager holding the lock for writing."""
+        return self._locked(fcntl.LOCK_EX if fcntl is not None else 0)
+
+    def shared(self):
+        """Context manager holding the lock for reading."""
+        return self._locked(fcntl.LOCK_SH if fcntl is not None else 0)
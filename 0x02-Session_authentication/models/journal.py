@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+"""This module implements an append-only journal for model persistence."""
+import json
+import os
+import threading
+import time
+from typing import Iterator, List, Tuple, Union
+
+
+class Journal:
+    """Append-only log of the `save` and `remove` operations of a model.
+
+    Each line of the journal file is one JSON record, either
+    ``{"op": "save", "id": ..., "obj": {...}}`` or
+    ``{"op": "remove", "id": ...}``. Replaying the records in order over the
+    last snapshot rebuilds the current state of the model.
+    """
+
+    def __init__(self, file_path: str, fsync: str = "never"):
+        """Initialize the journal.
+
+        Args:
+            file_path (str): The path of the journal file.
+            fsync (str): When to `fsync` the journal: "always", "never", or
+            a number of milliseconds between two syncs.
+        """
+        self.file_path = file_path
+        self.rotated_path = file_path + ".old"
+        self.fsync_policy, self.fsync_interval = self.parse_fsync(fsync)
+        self.lock = threading.RLock()
+        self.compacting = threading.Lock()
+        self.size = 0
+        self._file = None
+        self._dirty = False
+        self._syncer: Union[threading.Thread, None] = None
+
+    @staticmethod
+    def parse_fsync(fsync: str) -> Tuple[str, float]:
+        """Return the fsync policy and its interval (in seconds)."""
+        fsync = str(fsync or "never").strip().lower()
+        if fsync in ("always", "never"):
+            return fsync, 0.0
+
+        try:
+            interval = int(fsync)
+        except ValueError:
+            return "never", 0.0
+
+        if interval <= 0:
+            return "always", 0.0
+
+        return "interval", interval / 1000
+
+    def _open(self):
+        """Return the journal file opened for appending."""
+        if self._file is None:
+            self._file = open(self.file_path, "a")
+            self.size = self._file.tell()
+
+        return self._file
+
+    def write(self, records: List[dict]) -> None:
+        """Append records to the journal in a single write."""
+        data = "".join(json.dumps(record) + "\n" for record in records)
+
+        with self.lock:
+            f = self._open()
+            f.write(data)
+            f.flush()
+            self.size += len(data.encode())  # bytes, as `tell()` counts
+
+            if self.fsync_policy == "always":
+                os.fsync(f.fileno())
+            elif self.fsync_policy == "interval":
+                self._dirty = True
+                self._start_syncer()
+
+    def _start_syncer(self) -> None:
+        """Start the thread syncing the journal every `fsync_interval`."""
+        if self._syncer is not None and self._syncer.is_alive():
+            return
+
+        self._syncer = threading.Thread(target=self._sync_loop, daemon=True)
+        self._syncer.start()
+
+    def _sync_loop(self) -> None:
+        """Flush dirty writes to disk until the journal is closed."""
+        while True:
+            time.sleep(self.fsync_interval)
+            with self.lock:
+                if self._file is None:
+                    return
+
+                if self._dirty:
+                    os.fsync(self._file.fileno())
+                    self._dirty = False
+
+    def replay(self) -> Iterator[dict]:
+        """Yield the journal records in the order they were written.
+
+        Records left over from an interrupted compaction come first. A
+        truncated last line (a crash in the middle of a write) is ignored.
+        """
+        for file_path in (self.rotated_path, self.file_path):
+            if not os.path.exists(file_path):
+                continue
+
+            with open(file_path, "r") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        break
+
+    def rotate(self) -> bool:
+        """Move the current journal aside so a snapshot can replace it.
+
+        Must be called with `lock` held. Returns False if a previous
+        compaction has not completed yet.
+        """
+        if os.path.exists(self.rotated_path):
+            return False
+
+        self.close()
+        if os.path.exists(self.file_path):
+            os.replace(self.file_path, self.rotated_path)
+        self.size = 0
+
+        return True
+
+    def discard_rotated(self) -> None:
+        """Delete the journal moved aside by `rotate`."""
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+
+    def close(self) -> None:
+        """Close the journal file, syncing pending writes."""
+        with self.lock:
+            if self._file is None:
+                return
+
+            if self._dirty:
+                os.fsync(self._file.fileno())
+                self._dirty = False
+
+            self._file.close()
+            self._file = None
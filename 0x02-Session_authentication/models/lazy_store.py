@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+"""This module implements a store hydrating model objects on first access."""
+import json
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Callable, IO, Iterator, List, Tuple, Union
+
+CHUNK_SIZE = 64 * 1024
+
+
+class LazyStore(MutableMapping):
+    """Mapping of object IDs to model objects, built lazily from raw records.
+
+    Records loaded from a file are kept as raw JSON text (or as a decoded
+    dict when they come from the journal) and turned into objects by
+    `hydrate` the first time they are looked up.
+    """
+
+    def __init__(self, hydrate: Callable[[Union[str, dict]], Any]):
+        """Initialize the store.
+
+        Args:
+            hydrate (Callable): Builds a model object from a raw record.
+        """
+        self._hydrate = hydrate
+        self._objs = {}
+        self._raw = {}
+        self._lock = threading.RLock()
+
+    def add_raw(self, obj_id: str, raw: Union[str, dict]) -> None:
+        """Store a record that is hydrated on first access."""
+        self._objs.pop(obj_id, None)
+        self._raw[obj_id] = raw
+
+    def peek(self, obj_id: str) -> Any:
+        """Return the object if it is already hydrated, None otherwise."""
+        return self._objs.get(obj_id)
+
+    def raw(self, obj_id: str) -> Union[dict, None]:
+        """Return the decoded raw record of a not yet hydrated object."""
+        raw = self._raw.get(obj_id)
+        if isinstance(raw, str):
+            return json.loads(raw)
+        return raw
+
+    def entries(self) -> List[Tuple[str, Any]]:
+        """Return (id, object or raw record) pairs without hydrating."""
+        return list(self._objs.items()) + list(self._raw.items())
+
+    def __getitem__(self, obj_id: str) -> Any:
+        """Return an object, hydrating it if needed."""
+        obj = self._objs.get(obj_id)
+        if obj is not None:
+            return obj
+
+        with self._lock:
+            obj = self._objs.get(obj_id)
+            if obj is None:
+                obj = self._hydrate(self._raw[obj_id])
+                self._objs[obj_id] = obj
+                del self._raw[obj_id]
+        return obj
+
+    def __setitem__(self, obj_id: str, obj: Any) -> None:
+        """Store a hydrated object."""
+        self._raw.pop(obj_id, None)
+        self._objs[obj_id] = obj
+
+    def __delitem__(self, obj_id: str) -> None:
+        """Remove an object, hydrated or not."""
+        found = self._objs.pop(obj_id, None) is not None
+        found = self._raw.pop(obj_id, None) is not None or found
+        if not found:
+            raise KeyError(obj_id)
+
+    def __contains__(self, obj_id: object) -> bool:
+        """Tell whether an object is stored, without hydrating it."""
+        return obj_id in self._objs or obj_id in self._raw
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over a snapshot of the stored IDs."""
+        return iter(list(self._objs) + list(self._raw))
+
+    def __len__(self) -> int:
+        """Return the number of stored objects."""
+        return len(self._objs) + len(self._raw)
+
+
+def iter_json_object(
+    f: IO[str], chunk_size: int = CHUNK_SIZE
+) -> Iterator[Tuple[str, str, Any]]:
+    """Incrementally parse a file holding one JSON object.
+
+    Only `chunk_size` characters plus the member being parsed are kept in
+    memory at once.
+
+    Yields:
+        (key, raw JSON text of the value, decoded value) for each member.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        """Append the next chunk of the file to the buffer."""
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        eof = chunk == ""
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def next_char() -> str:
+        """Skip whitespace and return the next character ("" at EOF)."""
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\n\r":
+                pos += 1
+            if pos < len(buf) or eof:
+                return buf[pos:pos + 1]
+            fill()
+
+    def decode() -> Tuple[Any, str]:
+        """Decode the JSON value at the current position."""
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            if end == len(buf) and not eof:
+                fill()  # the value may go on in the next chunk
+                continue
+            text = buf[pos:end]
+            pos = end
+            return value, text
+
+    def expect(chars: str) -> str:
+        """Consume the next character, which must be one of `chars`."""
+        nonlocal pos
+        c = next_char()
+        if c == "" or c not in chars:
+            raise ValueError("Expecting one of {!r} at {}".format(chars, pos))
+        pos += 1
+        return c
+
+    if next_char() == "":
+        return  # empty file
+
+    expect("{")
+    if next_char() == "}":
+        return
+
+    while True:
+        next_char()
+        key, _ = decode()
+        expect(":")
+        next_char()
+        value, text = decode()
+        yield key, text, value
+        if expect(",}") == "}":
+            return
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+"""This module implements lazy queries over the objects of a model."""
+import heapq
+import operator
+from itertools import islice
+from typing import Any, Callable, Iterator, List, TypeVar, Union
+
+Base = TypeVar("Base")
+
+
+def _ordered(compare: Callable[[Any, Any], bool]) -> Callable:
+    """Build a lookup comparing values that may be None."""
+
+    def lookup(value: Any) -> Callable[[Any], bool]:
+        return lambda attr: attr is not None and compare(attr, value)
+
+    return lookup
+
+
+def _in(value: Any) -> Callable[[Any], bool]:
+    """Build the `in` lookup."""
+    try:
+        values = frozenset(value)
+    except TypeError:  # unhashable items
+        values = list(value)
+    return lambda attr: attr in values
+
+
+def _icontains(value: str) -> Callable[[Any], bool]:
+    """Build the `icontains` lookup."""
+    value = value.lower()
+    return lambda attr: isinstance(attr, str) and value in attr.lower()
+
+
+LOOKUPS = {
+    "exact": lambda value: lambda attr: attr == value,
+    "ne": lambda value: lambda attr: attr != value,
+    "lt": _ordered(operator.lt),
+    "lte": _ordered(operator.le),
+    "gt": _ordered(operator.gt),
+    "gte": _ordered(operator.ge),
+    "in": _in,
+    "contains": lambda value: (
+        lambda attr: attr is not None and value in attr
+    ),
+    "icontains": _icontains,
+    "startswith": lambda value: (
+        lambda attr: isinstance(attr, str) and attr.startswith(value)
+    ),
+    "endswith": lambda value: (
+        lambda attr: isinstance(attr, str) and attr.endswith(value)
+    ),
+    "isnull": lambda value: lambda attr: (attr is None) == bool(value),
+}
+
+
+class Query:
+    """Lazy query over the objects of a model class.
+
+    Conditions are given as `attribute__lookup=value` (`attribute=value`
+    for an exact match) and compiled once, when added. Exact matches are
+    handed to the model so it can use its indexes; the objects are then
+    filtered, ordered and sliced as they are iterated.
+
+    Example:
+        User.query().where(email__startswith="bob").order_by("-created_at")
+    """
+
+    def __init__(self, model: type):
+        """Initialize a query returning every object of `model`."""
+        self._model = model
+        self._exact = {}
+        self._predicates: List[Callable[[Base], bool]] = []
+        self._order: List[str] = []
+        self._offset = 0
+        self._limit: Union[int, None] = None
+
+    def _copy(self) -> "Query":
+        """Return a copy of the query to refine."""
+        query = Query(self._model)
+        query._exact = dict(self._exact)
+        query._predicates = list(self._predicates)
+        query._order = list(self._order)
+        query._offset = self._offset
+        query._limit = self._limit
+        return query
+
+    def where(self, **conditions: Any) -> "Query":
+        """Return the query restricted to objects matching all conditions.
+
+        Raises:
+            ValueError: If a lookup is unknown.
+        """
+        query = self._copy()
+        for key, value in conditions.items():
+            attribute, _, lookup = key.partition("__")
+            lookup = lookup or "exact"
+            if lookup not in LOOKUPS:
+                raise ValueError("Unknown lookup {!r}".format(lookup))
+            if lookup == "exact":
+                query._exact[attribute] = value
+
+            test = LOOKUPS[lookup](value)
+            query._predicates.append(
+                lambda obj, attribute=attribute, test=test: test(
+                    getattr(obj, attribute, None)
+                )
+            )
+        return query
+
+    def order_by(self, *attributes: str) -> "Query":
+        """Return the query ordered by attributes ("-name" for descending)."""
+        query = self._copy()
+        query._order = list(attributes)
+        return query
+
+    def offset(self, count: int) -> "Query":
+        """Return the query skipping the first `count` objects."""
+        query = self._copy()
+        query._offset = max(count, 0)
+        return query
+
+    def limit(self, count: Union[int, None]) -> "Query":
+        """Return the query stopping after `count` objects."""
+        query = self._copy()
+        query._limit = None if count is None else max(count, 0)
+        return query
+
+    def _matches(self) -> Iterator[Base]:
+        """Iterate over the objects matching every condition."""
+        predicates = self._predicates
+        for obj in self._model._iter_candidates(self._exact):
+            if all(predicate(obj) for predicate in predicates):
+                yield obj
+
+    def _ordered(self, objs: Iterator[Base]) -> Iterator[Base]:
+        """Order the objects, keeping only the needed ones if limited."""
+        # sort by the last attribute first, relying on sort stability
+        for attribute in reversed(self._order):
+            name = attribute.lstrip("-")
+
+            def key(obj, name=name):
+                value = getattr(obj, name, None)
+                return (value is not None, value)
+
+            reverse = attribute.startswith("-")
+            if self._limit is not None and len(self._order) == 1:
+                select = heapq.nlargest if reverse else heapq.nsmallest
+                return iter(select(self._offset + self._limit, objs, key=key))
+            objs = sorted(objs, key=key, reverse=reverse)
+        return iter(objs)
+
+    def __iter__(self) -> Iterator[Base]:
+        """Iterate lazily over the results."""
+        objs = self._matches()
+        if self._order:
+            objs = self._ordered(objs)
+
+        stop = None if self._limit is None else self._offset + self._limit
+        return islice(objs, self._offset, stop)
+
+    def all(self) -> List[Base]:
+        """Return the results as a list."""
+        return list(self)
+
+    def first(self) -> Union[Base, None]:
+        """Return the first result, or None."""
+        return next(iter(self.limit(1)), None)
+
+    def count(self) -> int:
+        """Return the number of results."""
+        return sum(1 for _ in self)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+"""This module implements the binary snapshot format of the models.
+
+A snapshot file starts with a fixed-size header followed by the body:
+
+    magic (4 bytes) | format version (uint16) | schema version (uint16)
+    | compression (uint8) | body length (uint64)
+
+The body is the pickle (protocol 5) of a list of ``(id, record)`` pairs,
+where a record is the `to_json(True)` dictionary of an object, optionally
+compressed. Records only hold strings, numbers, booleans, None, lists and
+dictionaries, so the body is unpickled by `RecordUnpickler`, which refuses
+any class or function: a crafted snapshot cannot run code when loaded.
+
+Run as a script to convert `.db_<Class>.json` files to snapshots:
+
+    python3 -m models.snapshot .db_User.json [--compression zlib]
+"""
+import argparse
+import io
+import json
+import lzma
+import os
+import pickle
+import struct
+import zlib
+from typing import IO, List, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"MDLS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHBQ")
+
+COMPRESSIONS = {"none": 0, "zlib": 1, "lzma": 2, "zstd": 3}
+
+
+def _compress(body: bytes, compression: str) -> bytes:
+    """Compress a snapshot body."""
+    if compression == "zlib":
+        return zlib.compress(body, 6)
+    if compression == "lzma":
+        return lzma.compress(body)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression requires `zstandard`")
+        return zstandard.ZstdCompressor().compress(body)
+    return body
+
+
+def _decompress(body: bytes, code: int) -> bytes:
+    """Decompress a snapshot body."""
+    if code == COMPRESSIONS["zlib"]:
+        return zlib.decompress(body)
+    if code == COMPRESSIONS["lzma"]:
+        return lzma.decompress(body)
+    if code == COMPRESSIONS["zstd"]:
+        if zstandard is None:
+            raise ValueError("zstd compression requires `zstandard`")
+        return zstandard.ZstdDecompressor().decompress(body)
+    return body
+
+
+class RecordUnpickler(pickle.Unpickler):
+    """Unpickler of plain data, which refuses to load any global."""
+
+    def find_class(self, module: str, name: str):
+        """Refuse the class or function a pickle refers to."""
+        raise pickle.UnpicklingError(
+            "Snapshot refers to {}.{}".format(module, name)
+        )
+
+
+def loads(body: bytes):
+    """Unpickle plain data, refusing any class or function.
+
+    Raises:
+        ValueError: If the pickle is corrupt or refers to a global.
+    """
+    try:
+        return RecordUnpickler(io.BytesIO(body)).load()
+    except (pickle.UnpicklingError, EOFError) as e:
+        raise ValueError("Invalid snapshot body: {}".format(e)) from e
+
+
+def dump(
+    f: IO[bytes],
+    records: List[Tuple[str, dict]],
+    schema_version: int = 1,
+    compression: str = "none",
+) -> None:
+    """Write records as a snapshot.
+
+    Args:
+        f (IO[bytes]): The file to write to.
+        records (list): The (id, record) pairs to write.
+        schema_version (int): The schema version of the model.
+        compression (str): One of "none", "zlib", "lzma" or "zstd".
+
+    Raises:
+        ValueError: If the compression is unknown or unavailable.
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError("Unknown compression {!r}".format(compression))
+
+    body = _compress(pickle.dumps(records, protocol=5), compression)
+    f.write(
+        HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            schema_version,
+            COMPRESSIONS[compression],
+            len(body),
+        )
+    )
+    f.write(body)
+
+
+def load(f: IO[bytes]) -> Tuple[int, List[Tuple[str, dict]]]:
+    """Read a snapshot.
+
+    Returns:
+        The schema version of the snapshot and its (id, record) pairs.
+
+    Raises:
+        ValueError: If the file is not a snapshot this module can read, or
+        its body holds anything but plain data.
+    """
+    size = os.fstat(f.fileno()).st_size
+    if size == 0:
+        return 0, []
+    if size < HEADER.size:
+        raise ValueError("Truncated snapshot header")
+
+    magic, version, schema_version, code, length = HEADER.unpack(
+        f.read(HEADER.size)
+    )
+    if magic != MAGIC:
+        raise ValueError("Not a snapshot file")
+    if version != FORMAT_VERSION:
+        raise ValueError("Unsupported snapshot version {}".format(version))
+    if HEADER.size + length > size:
+        raise ValueError("Truncated snapshot body")
+
+    return schema_version, loads(_decompress(f.read(length), code))
+
+
+def convert(json_path: str, compression: str = "none") -> str:
+    """Convert a `.db_<Class>.json` file to a `.db_<Class>.bin` snapshot.
+
+    Returns:
+        The path of the snapshot written.
+    """
+    with open(json_path, "r") as f:
+        records = list(json.load(f).items())
+
+    snapshot_path = os.path.splitext(json_path)[0] + ".bin"
+    with open(snapshot_path, "wb") as f:
+        dump(f, records, compression=compression)
+
+    return snapshot_path
+
+
+def main() -> None:
+    """Convert the JSON files given on the command line."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("json_files", nargs="+")
+    parser.add_argument(
+        "--compression", choices=list(COMPRESSIONS), default="none"
+    )
+    args = parser.parse_args()
+
+    for json_path in args.json_files:
+        snapshot_path = convert(json_path, args.compression)
+        print("{} -> {}".format(json_path, snapshot_path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+"""This module implements the SQLite storage of the models."""
+import json
+import sqlite3
+import threading
+from typing import List, Tuple, Union
+
+# values SQLite can compare directly, other values are matched in Python
+SQL_TYPES = (str, int, float, bool, type(None))
+
+
+class SQLiteStorage:
+    """Store the objects of each model class in a table of its own.
+
+    A table holds the object ID as primary key, the JSON serialization of
+    the object and one indexed column per attribute listed in the class
+    `indexed_attributes`. Other attributes are matched with `json_extract`.
+    """
+
+    def __init__(self, file_path: str):
+        """Initialize the storage.
+
+        Args:
+            file_path (str): The path of the SQLite database.
+        """
+        self.file_path = file_path
+        self._local = threading.local()
+        self._tables = set()
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Return the connection of the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.file_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _quote(name: str) -> str:
+        """Quote an SQL identifier."""
+        return '"{}"'.format(name.replace('"', '""'))
+
+    def table(self, cls: type) -> str:
+        """Return the quoted table name of a class, creating the table."""
+        s_class = cls.__name__
+        table = self._quote(s_class)
+        if s_class in self._tables:
+            return table
+
+        with self._lock, self.connection as conn:
+            columns = "".join(
+                ", {}".format(self._quote(k)) for k in cls.indexed_attributes
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS {} "
+                "(id TEXT PRIMARY KEY, data TEXT NOT NULL{})".format(
+                    table, columns
+                )
+            )
+            for k in cls.indexed_attributes:
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS {} ON {} ({})".format(
+                        self._quote("{}_{}".format(s_class, k)),
+                        table,
+                        self._quote(k),
+                    )
+                )
+            self._tables.add(s_class)
+
+        return table
+
+    def write(self, cls: type, changes: dict) -> None:
+        """Save or delete objects in one transaction: {id: obj or None}"""
+        table = self.table(cls)
+        columns = ["id", "data"] + list(cls.indexed_attributes)
+        upsert = (
+            "INSERT INTO {} ({}) VALUES ({}) ON CONFLICT(id) DO UPDATE SET {}"
+        ).format(
+            table,
+            ", ".join(self._quote(c) for c in columns),
+            ", ".join("?" for _ in columns),
+            ", ".join(
+                "{0} = excluded.{0}".format(self._quote(c))
+                for c in columns[1:]
+            ),
+        )
+        delete = "DELETE FROM {} WHERE id = ?".format(table)
+
+        rows, removed = [], []
+        for obj_id, obj in changes.items():
+            if obj is None:
+                removed.append((obj_id,))
+                continue
+            values = [getattr(obj, k, None) for k in cls.indexed_attributes]
+            rows.append([obj_id, json.dumps(obj.to_json(True))] + values)
+
+        with self.connection as conn:
+            if removed:
+                conn.executemany(delete, removed)
+            if rows:
+                conn.executemany(upsert, rows)
+
+    def count(self, cls: type) -> int:
+        """Return the number of objects of a class."""
+        table = self.table(cls)
+        query = "SELECT COUNT(*) FROM {}".format(table)
+        return self.connection.execute(query).fetchone()[0]
+
+    def get(self, cls: type, obj_id: str) -> Union[str, None]:
+        """Return the JSON serialization of an object."""
+        table = self.table(cls)
+        query = "SELECT data FROM {} WHERE id = ?".format(table)
+        row = self.connection.execute(query, (obj_id,)).fetchone()
+        return row[0] if row else None
+
+    def search(
+        self, cls: type, attributes: dict
+    ) -> Tuple[List[str], dict]:
+        """Return the JSON serializations of the objects matching attributes.
+
+        Returns:
+            The matching records, and the attributes that could not be
+            matched in SQL and still have to be checked on the objects.
+        """
+        table = self.table(cls)
+        clauses, params, leftover = [], [], {}
+        for k, v in attributes.items():
+            if not isinstance(v, SQL_TYPES):
+                leftover[k] = v
+                continue
+            if k == "id" or k in cls.indexed_attributes:
+                clauses.append("{} IS ?".format(self._quote(k)))
+            else:
+                clauses.append("json_extract(data, ?) IS ?")
+                params.append("$.{}".format(json.dumps(k)))
+            params.append(v)
+
+        query = "SELECT data FROM {}".format(table)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY rowid"
+
+        rows = self.connection.execute(query, params).fetchall()
+        return [row[0] for row in rows], leftover
+
+    def close(self) -> None:
+        """Close the connection of the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+"""This module implements a fast codec for the timestamps of the models.
+
+Timestamps are serialized as `TIMESTAMP_FORMAT` strings and kept in memory
+as seconds since the epoch (UTC). The date part of a timestamp is decoded
+and encoded through small caches, as most objects share a few dates, and
+the time part with plain integer arithmetic.
+"""
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+import math
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+EPOCH = datetime(1970, 1, 1)
+EPOCH_DATE = EPOCH.date()
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(value: str) -> int:
+    """Return the number of days between the epoch and a YYYY-MM-DD date."""
+    if value[4] != "-" or value[7] != "-":
+        raise ValueError("Invalid date {!r}".format(value))
+    year, month, day = value[:4], value[5:7], value[8:10]
+    if not (year + month + day).isdigit():
+        raise ValueError("Invalid date {!r}".format(value))
+
+    return (date(int(year), int(month), int(day)) - EPOCH_DATE).days
+
+
+@lru_cache(maxsize=4096)
+def _format_date(days: int) -> str:
+    """Return the YYYY-MM-DD date a number of days after the epoch."""
+    value = EPOCH_DATE + timedelta(days=days)
+    # not strftime, whose %Y is not padded before year 1000 on glibc
+    return "{:04d}-{:02d}-{:02d}".format(value.year, value.month, value.day)
+
+
+def decode(value: str) -> float:
+    """Return the seconds since the epoch of a `TIMESTAMP_FORMAT` string.
+
+    Raises:
+        ValueError: If the value does not match `TIMESTAMP_FORMAT`.
+    """
+    if (
+        len(value) == 19
+        and value[10] == "T"
+        and value[13] == ":"
+        and value[16] == ":"
+    ):
+        hours, minutes, seconds = value[11:13], value[14:16], value[17:19]
+        if (hours + minutes + seconds).isdigit():
+            hours, minutes, seconds = int(hours), int(minutes), int(seconds)
+            if hours < 24 and minutes < 60 and seconds < 60:
+                try:
+                    days = _parse_date(value[:10])
+                except ValueError:
+                    pass
+                else:
+                    return float(
+                        days * 86400 + hours * 3600 + minutes * 60 + seconds
+                    )
+
+    # anything else `strptime` accepts, such as unpadded fields
+    return from_datetime(datetime.strptime(value, TIMESTAMP_FORMAT))
+
+
+def encode(seconds: float) -> str:
+    """Return the `TIMESTAMP_FORMAT` string of seconds since the epoch."""
+    days, seconds = divmod(math.floor(seconds), 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+
+    return "{}T{:02d}:{:02d}:{:02d}".format(
+        _format_date(days), hours, minutes, seconds
+    )
+
+
+def from_datetime(value: datetime) -> float:
+    """Return the seconds since the epoch of a datetime, naive ones being
+    taken as UTC and aware ones converted to UTC."""
+    if value.utcoffset() is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value.replace(tzinfo=None) - EPOCH).total_seconds()
+
+
+def to_datetime(seconds: float) -> datetime:
+    """Return the naive UTC datetime of seconds since the epoch."""
+    return EPOCH + timedelta(seconds=seconds)
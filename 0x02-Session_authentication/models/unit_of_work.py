@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+"""This module implements the unit of work batching model writes."""
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Union
+
+
+class UnitOfWork:
+    """Collect the objects written by `save`/`remove` and persist them later.
+
+    Writes are deferred while a thread is inside `batch()` or while the
+    background flusher runs. Pending writes are kept per model class as
+    ``{obj_id: obj}`` (``None`` for a removed object), so several writes of
+    the same object coalesce, and flushing calls `cls._persist(changes)` once
+    per dirty class only.
+    """
+
+    def __init__(self, interval: float = 0.0, batch_size: int = 0):
+        """Initialize the unit of work.
+
+        Args:
+            interval (float): Seconds between two flushes of the background
+            flusher.
+            batch_size (int): Number of pending objects that triggers a flush
+            (0 means no limit).
+        """
+        self.interval = interval
+        self.batch_size = batch_size
+        self._pending = {}
+        self._size = 0
+        self._cond = threading.Condition()
+        self._flushing = threading.Lock()
+        self._local = threading.local()
+        self._flusher: Union[threading.Thread, None] = None
+        self._stopped = False
+
+    @property
+    def flusher_running(self) -> bool:
+        """Tell whether the background flusher is running."""
+        return self._flusher is not None and self._flusher.is_alive()
+
+    @property
+    def deferring(self) -> bool:
+        """Tell whether writes of the current thread must be deferred."""
+        return getattr(self._local, "depth", 0) > 0 or self.flusher_running
+
+    @contextmanager
+    def batch(self) -> Iterator["UnitOfWork"]:
+        """Defer writes until the outermost batch exits, then flush.
+
+        The batch depth is per thread but pending writes are shared, and
+        they are flushed even if the block raised: nothing is rolled back.
+        """
+        self._local.depth = getattr(self._local, "depth", 0) + 1
+        try:
+            yield self
+        finally:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                self.flush()
+
+    def add(self, cls: type, obj_id: str, obj=None) -> None:
+        """Record a pending write of an object (`None` if removed)."""
+        with self._cond:
+            changes = self._pending.setdefault(cls, {})
+            if obj_id not in changes:
+                self._size += 1
+            changes[obj_id] = obj
+            full = 0 < self.batch_size <= self._size
+
+            if full and self.flusher_running:
+                self._cond.notify()
+                return
+
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Persist every pending write, one call per dirty class.
+
+        If a class fails to persist its writes, they are put back in the
+        pending writes with those of the classes not persisted yet, under
+        the writes made since, and the error is raised.
+        """
+        with self._flushing:
+            with self._cond:
+                pending, self._pending, self._size = self._pending, {}, 0
+
+            persisted = []
+            try:
+                for cls, changes in pending.items():
+                    cls._persist(changes)
+                    persisted.append(cls)
+            except BaseException:
+                for cls in persisted:
+                    del pending[cls]
+                self._restore(pending)
+                raise
+
+    def _restore(self, pending: dict) -> None:
+        """Put writes that failed to persist back in the pending writes."""
+        with self._cond:
+            for cls, changes in pending.items():
+                newer = self._pending.get(cls, {})
+                changes = dict(changes)
+                changes.update(newer)
+                self._pending[cls] = changes
+            self._size = sum(len(c) for c in self._pending.values())
+
+    def flush_pending(self) -> None:
+        """Flush pending writes, if any, so they can be read back."""
+        if self._size > 0:
+            self.flush()
+
+    def start_flusher(self) -> None:
+        """Start the background thread flushing every `interval` seconds."""
+        with self._cond:
+            if self.flusher_running or self.interval <= 0:
+                return
+
+            self._stopped = False
+            self._flusher = threading.Thread(target=self._run, daemon=True)
+            self._flusher.start()
+
+    def stop_flusher(self) -> None:
+        """Stop the background flusher and flush what is left."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+            flusher = self._flusher
+
+        if flusher is not None:
+            flusher.join()
+        self._flusher = None
+        self.flush()
+
+    def _run(self) -> None:
+        """Flush pending writes until the flusher is stopped."""
+        while True:
+            with self._cond:
+                if not self._stopped and not (
+                    0 < self.batch_size <= self._size
+                ):
+                    self._cond.wait(self.interval)
+                if self._stopped:
+                    return
+
+            self.flush()
@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 """ User module
 """
-import hashlib
 from models.base import Base
+from models.password import check_password, make_password, needs_update
 
 
 class User(Base):
     """User class"""
 
+    __slots__ = ("email", "_password", "first_name", "last_name")
+
+    indexed_attributes = ("email",)
+
     def __init__(self, *args: list, **kwargs: dict):
         """Initialize a User instance"""
         super().__init__(*args, **kwargs)
@@ -23,11 +27,11 @@ class User(Base):
 
     @password.setter
     def password(self, pwd: str):
-        """Setter of a new password: encrypt in SHA256"""
+        """Setter of a new password: hash it with the default hasher"""
         if pwd is None or type(pwd) is not str:
             self._password = None
         else:
-            self._password = hashlib.sha256(pwd.encode()).hexdigest().lower()
+            self._password = make_password(pwd)
 
     def is_valid_password(self, pwd: str) -> bool:
         """Validate a password"""
@@ -35,8 +39,18 @@ class User(Base):
             return False
         if self.password is None:
             return False
-        pwd_e = pwd.encode()
-        return hashlib.sha256(pwd_e).hexdigest().lower() == self.password
+        return check_password(pwd, self.password)
+
+    def password_needs_update(self) -> bool:
+        """Tell whether the password hash was made with another algorithm
+        or other parameters than the default hasher's
+
+        The caller hashes the password again once it is validated, e.g.
+        `user.password = pwd` then `user.save()`.
+        """
+        if self.password is None:
+            return False
+        return needs_update(self.password)
 
     def display_name(self) -> str:
         """Display User name based on email/first_name/last_name"""
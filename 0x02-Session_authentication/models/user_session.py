@@ -6,12 +6,36 @@ from models.base import Base
 
 
 class UserSession(Base):
-    """Implement the user session model."""
+    """Implement the user session model.
+
+    The session ID is the ID of the object, so sessions are looked up with
+    `UserSession.get(session_id)`.
+    """
+
+    __slots__ = ("user_id",)
 
     def __init__(
         self, user_id: str, session_id: str, *args: list, **kwargs: dict
     ):
         """Initialize user session object."""
+        if session_id is not None:
+            kwargs["id"] = session_id
         super().__init__(*args, **kwargs)
         self.user_id: str = user_id
-        self.session_id: str = session_id
+
+    @classmethod
+    def _record_id(cls, obj_id: str, values: dict) -> str:
+        """Store the records of earlier versions, keyed by a separate ID,
+        under their session ID"""
+        return values.get("session_id") or obj_id
+
+    @property
+    def session_id(self) -> str:
+        """The session ID, stored as the object ID."""
+        return self.id
+
+    def to_json(self, for_serialization: bool = False) -> dict:
+        """Convert the object a JSON dictionary"""
+        result = super().to_json(for_serialization)
+        result["session_id"] = self.session_id
+        return result
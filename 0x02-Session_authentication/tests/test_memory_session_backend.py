@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Tests of the in-memory session backend"""
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+from api.v1.auth.memory_session_backend import MemorySessionBackend
+
+
+class TestMemorySessionBackend(unittest.TestCase):
+    """Tests of the in-memory session backend"""
+
+    def setUp(self):
+        """Create an empty backend"""
+        self.backend = MemorySessionBackend()
+        self.now = datetime.now()
+
+    def test_purge_expired(self):
+        """Expired sessions are evicted, the others kept"""
+        self.backend.create("s1", "u1", self.now, self.now + timedelta(1))
+        self.backend.create("s2", "u1", self.now, self.now + timedelta(2))
+        self.backend.create("s3", "u1", self.now)
+
+        self.assertEqual(
+            self.backend.purge_expired(self.now + timedelta(days=1, hours=1)),
+            1,
+        )
+        self.assertIsNone(self.backend.get("s1"))
+        self.assertIsNotNone(self.backend.get("s2"))
+        self.assertIsNotNone(self.backend.get("s3"))
+        self.assertEqual(self.backend.stats(), {"live": 2, "evicted": 1})
+
+    def test_lookups_skip_the_expiry_lock(self):
+        """Nothing due to expire, lookups never wait on the expiry lock"""
+        self.backend.create("s1", "u1", self.now, self.now + timedelta(1))
+        self.backend.create("s2", "u1", self.now)
+
+        def lookups():
+            self.backend.get("s1")
+            self.backend.create("s3", "u2", self.now)
+            self.backend.purge_expired()
+
+        with self.backend._expiry_lock:  # as if another thread held it
+            thread = threading.Thread(target=lookups, daemon=True)
+            thread.start()
+            thread.join(1)
+            self.assertFalse(thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Tests of the password hashes, and of their upgrade on login"""
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from api.v1.auth.basic_auth import BasicAuth
+from models import password
+from models.user import User
+
+
+class TestPassword(unittest.TestCase):
+    """Tests of the password hashes"""
+
+    def setUp(self):
+        """Hash with 1000 iterations of PBKDF2, in an empty directory"""
+        patcher = mock.patch.object(
+            password, "_hasher", password.PBKDF2Hasher(1000)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        User.load_from_file()
+
+    def tearDown(self):
+        """Go back to the original directory"""
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_malformed_hash(self):
+        """A truncated hash matches no password, and raises nothing"""
+        for encoded in ("pbkdf2_sha256$", "pbkdf2_sha256$x$y", "scrypt$1$2"):
+            self.assertFalse(password.check_password("pwd", encoded))
+        self.assertFalse(password.needs_update("pbkdf2_sha256$"))
+
+    @unittest.skipIf(password.bcrypt is None, "bcrypt is not installed")
+    def test_truncated_bcrypt_hash(self):
+        """A bcrypt hash missing its rounds raises no IndexError"""
+        with mock.patch.object(password, "_hasher", password.BCryptHasher(4)):
+            self.assertFalse(password.check_password("pwd", "bcrypt$$2b"))
+            self.assertFalse(password.needs_update("bcrypt$$2b"))
+
+    def test_hashers_implement_the_interface(self):
+        """A hasher missing `encode` or `verify` cannot be created"""
+
+        class Incomplete(password.PasswordHasher):
+            def encode(self, password: str) -> str:
+                return password
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_check_password(self):
+        """Hashes of any registered hasher, or of SHA-256, are checked"""
+        for encoded in (
+            password.make_password("pwd"),
+            password.ScryptHasher(16, 1, 1).encode("pwd"),
+            hashlib.sha256(b"pwd").hexdigest(),
+        ):
+            self.assertIs(password.check_password("pwd", encoded), True)
+            self.assertIs(password.check_password("nope", encoded), False)
+
+    def test_measure_memory(self):
+        """The memory of a hash is the growth of the peak RSS of a fresh
+        process, which tells scrypt from PBKDF2"""
+        scrypt = password.measure_memory(password.ScryptHasher(2 ** 14))
+        pbkdf2 = password.measure_memory(password.PBKDF2Hasher(1000))
+        self.assertGreaterEqual(scrypt, 128 * 8 * 2 ** 14)
+        self.assertLess(pbkdf2, 128 * 8 * 2 ** 14 // 2)
+
+    def test_needs_update(self):
+        """Hashes of other parameters, or of SHA-256, need an update"""
+        self.assertFalse(password.needs_update(password.make_password("pwd")))
+        self.assertTrue(
+            password.needs_update(password.PBKDF2Hasher(2000).encode("pwd"))
+        )
+        legacy = hashlib.sha256(b"pwd").hexdigest()
+        self.assertTrue(password.needs_update(legacy))
+
+    def test_is_valid_password_is_pure(self):
+        """Validating a password changes nothing"""
+        user = User(email="bob@hbtn.io")
+        user._password = hashlib.sha256(b"pwd").hexdigest()
+        self.assertTrue(user.is_valid_password("pwd"))
+        self.assertFalse(user.is_valid_password("nope"))
+        self.assertEqual(user.password, hashlib.sha256(b"pwd").hexdigest())
+        self.assertTrue(user.password_needs_update())
+
+    def test_basic_auth_upgrades_the_hash(self):
+        """A valid password of an outdated hash is hashed again on login"""
+        user = User(email="bob@hbtn.io")
+        user._password = hashlib.sha256(b"pwd").hexdigest()
+        user.save()
+
+        self.assertIsNone(
+            BasicAuth.user_object_from_credentials("bob@hbtn.io", "nope")
+        )
+        self.assertTrue(User.get(user.id).password_needs_update())
+
+        found = BasicAuth.user_object_from_credentials("bob@hbtn.io", "pwd")
+        self.assertEqual(found.id, user.id)
+        self.assertTrue(found.password.startswith("pbkdf2_sha256$1000$"))
+        self.assertFalse(User.get(user.id).password_needs_update())
+        self.assertTrue(User.get(user.id).is_valid_password("pwd"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""Tests of the RESP client and the Redis session backend, against a stub
+server speaking the Redis protocol"""
+import fnmatch
+import socket
+import socketserver
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from api.v1.auth.deny_list import DenyList
+from api.v1.auth.redis_session_backend import RedisSessionBackend
+from api.v1.auth.resp_client import RESPClient, RESPConnection, RESPError
+
+
+class StubRedis:
+    """In-memory implementation of the commands the backend runs"""
+
+    def __init__(self):
+        """Initialize an empty server"""
+        self.data = {}
+        self.expiries = {}
+        self.commands = []
+        self.lock = threading.Lock()
+
+    def _alive(self, key: str) -> bool:
+        """Expire a key if its time has come, and tell whether it exists"""
+        expiry = self.expiries.get(key)
+        if expiry is not None and expiry <= time.time() * 1000:
+            self.data.pop(key, None)
+            self.expiries.pop(key, None)
+        return key in self.data
+
+    def run(self, args: list):
+        """Run a command and return its reply"""
+        name, args = args[0].upper(), args[1:]
+        with self.lock:
+            self.commands.append([name] + args)
+            return getattr(self, "cmd_" + name.lower())(*args)
+
+    def cmd_ping(self):
+        return "PONG"
+
+    def cmd_select(self, db):
+        return "PONG" if db else "OK"
+
+    def cmd_garbage(self):
+        return b":not-a-number\r\n"
+
+    def cmd_del(self, *keys):
+        return sum(1 for k in keys if self._alive(k) and self.data.pop(k, 1))
+
+    def cmd_hset(self, key, *fields):
+        self._alive(key)
+        values = self.data.setdefault(key, {})
+        added = 0
+        for field, value in zip(fields[::2], fields[1::2]):
+            added += field not in values
+            values[field] = value
+        return added
+
+    def cmd_hget(self, key, field):
+        self._alive(key)
+        return self.data.get(key, {}).get(field)
+
+    def cmd_hgetall(self, key):
+        self._alive(key)
+        return [x for kv in self.data.get(key, {}).items() for x in kv]
+
+    def cmd_pexpireat(self, key, when):
+        if not self._alive(key):
+            return 0
+        self.expiries[key] = int(when)
+        return 1
+
+    def cmd_sadd(self, key, *members):
+        values = self.data.setdefault(key, set())
+        size = len(values)
+        values.update(members)
+        return len(values) - size
+
+    def cmd_srem(self, key, *members):
+        values = self.data.get(key, set())
+        size = len(values)
+        values.difference_update(members)
+        if not values:
+            self.data.pop(key, None)
+        return size - len(values)
+
+    def cmd_sscan(self, key, cursor, *_):
+        return ["0", sorted(self.data.get(key, set()))]
+
+    def cmd_hexists(self, key, field):
+        self._alive(key)
+        return int(field in self.data.get(key, {}))
+
+    def cmd_smembers(self, key):
+        return sorted(self.data.get(key, set()))
+
+    def cmd_exists(self, key):
+        return int(self._alive(key))
+
+    def cmd_scan(self, cursor, _match, pattern, *_):
+        keys = [k for k in list(self.data) if fnmatch.fnmatch(k, pattern)]
+        return ["0", keys]
+
+
+def encode(reply) -> bytes:
+    """Encode a reply in the Redis protocol"""
+    if isinstance(reply, bytes):  # raw, possibly invalid, reply
+        return reply
+    if isinstance(reply, Exception):
+        return "-ERR {}\r\n".format(reply).encode()
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(encode(x) for x in reply)
+    if reply in ("OK", "PONG"):
+        return "+{}\r\n".format(reply).encode()
+    reply = str(reply).encode()
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+class StubServer(socketserver.ThreadingTCPServer):
+    """TCP server of a StubRedis"""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        """Listen on a free port of the loopback interface"""
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.redis = StubRedis()
+        self.connections = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        """The URL of the server"""
+        return "redis://127.0.0.1:{}/0".format(self.server_address[1])
+
+
+class StubHandler(socketserver.StreamRequestHandler):
+    """Connection to the stub server"""
+
+    def handle(self):
+        """Answer the commands of a connection"""
+        self.server.connections += 1
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2].decode())
+            try:
+                reply = self.server.redis.run(args)
+            except Exception as e:
+                reply = e
+            self.wfile.write(encode(reply))
+
+
+class TestRESPClient(unittest.TestCase):
+    """Tests of the RESP client"""
+
+    def setUp(self):
+        """Start a stub server"""
+        self.server = StubServer()
+        self.client = RESPClient(self.server.url, pool_size=1, timeout=1)
+
+    def tearDown(self):
+        """Stop the stub server"""
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_encode(self):
+        """Commands are arrays of bulk strings"""
+        self.assertEqual(
+            RESPConnection.encode(["GET", 1]),
+            b"*2\r\n$3\r\nGET\r\n$1\r\n1\r\n",
+        )
+
+    def test_replies(self):
+        """Every kind of reply is decoded"""
+        self.assertEqual(self.client.execute("PING"), "PONG")
+        self.assertEqual(self.client.execute("HSET", "h", "a", "é"), 1)
+        self.assertEqual(self.client.execute("HGET", "h", "a"), "é")
+        self.assertIsNone(self.client.execute("HGET", "h", "b"))
+        self.assertEqual(self.client.execute("HGETALL", "h"), ["a", "é"])
+
+    def test_pipeline(self):
+        """A pipeline runs its commands in order, on one connection"""
+        replies = self.client.pipeline(
+            [("SADD", "s", "a", "b"), ("SREM", "s", "a"), ("SMEMBERS", "s")]
+        )
+        self.assertEqual(replies, [2, 1, ["b"]])
+        self.assertEqual(self.server.connections, 1)
+
+    def test_error_reply(self):
+        """An error reply is raised, and the connection reused"""
+        with self.assertRaises(RESPError):
+            self.client.execute("NOSUCHCOMMAND")
+        self.assertEqual(self.client.execute("PING"), "PONG")
+        self.assertEqual(self.server.connections, 1)
+
+    def test_protocol_error_releases_the_connection(self):
+        """A reply that cannot be parsed drops the connection, and frees
+        its slot of the pool"""
+        for _ in range(3):  # the pool holds a single connection
+            with self.assertRaises(ValueError):
+                self.client.pipeline([("GARBAGE",), ("PING",)])
+        self.assertEqual(self.client.execute("PING"), "PONG")
+        self.assertEqual(self.server.connections, 4)
+
+    def test_exception_in_borrower_releases_the_connection(self):
+        """Any exception raised while a connection is borrowed frees its
+        slot of the pool"""
+        for _ in range(3):
+            with self.assertRaises(KeyError):
+                with self.client.connection():
+                    raise KeyError("boom")
+        self.assertEqual(self.client.execute("PING"), "PONG")
+
+
+class TestRedisSessionBackend(unittest.TestCase):
+    """Tests of the Redis session backend"""
+
+    def setUp(self):
+        """Start a stub server"""
+        self.server = StubServer()
+        self.backend = RedisSessionBackend(self.server.url, pool_size=2)
+        self.now = datetime.now().replace(microsecond=0)
+
+    def tearDown(self):
+        """Stop the stub server"""
+        self.backend.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_create_and_get(self):
+        """A session is stored as a hash, with its expiry date"""
+        expires_at = self.now + timedelta(hours=1)
+        self.backend.create("s1", "u1", self.now, expires_at)
+        self.backend.create("s2", "u1", self.now)
+
+        self.assertEqual(
+            self.backend.get("s1"),
+            {
+                "user_id": "u1",
+                "created_at": self.now,
+                "expires_at": expires_at,
+            },
+        )
+        self.assertIsNone(self.backend.get("s2")["expires_at"])
+        self.assertIsNone(self.backend.get("nope"))
+        self.assertEqual(
+            self.server.redis.data["user_sessions:u1"], {"s1", "s2"}
+        )
+
+    def test_expired(self):
+        """An expired session is not returned"""
+        self.backend.create(
+            "s1", "u1", self.now, datetime.now() + timedelta(milliseconds=50)
+        )
+        self.assertIsNotNone(self.backend.get("s1"))
+        time.sleep(0.1)
+        self.assertIsNone(self.backend.get("s1"))
+
+    def test_touch(self):
+        """Touching a session moves its expiry date"""
+        self.backend.create("s1", "u1", self.now, self.now + timedelta(1))
+        later = self.now + timedelta(2)
+        with mock.patch.object(
+            self.backend.client, "execute", side_effect=AssertionError
+        ):  # a single pipeline
+            self.assertTrue(self.backend.touch("s1", later))
+        self.assertEqual(self.backend.get("s1")["expires_at"], later)
+        self.assertFalse(self.backend.touch("nope", later))
+        self.assertNotIn("session:nope", self.server.redis.data)
+
+    def test_delete(self):
+        """Deleting a session takes it out of the sessions of its user"""
+        self.backend.create("s1", "u1", self.now)
+        self.assertTrue(self.backend.delete("s1"))
+        self.assertFalse(self.backend.delete("s1"))
+        self.assertIsNone(self.backend.get("s1"))
+        self.assertNotIn("user_sessions:u1", self.server.redis.data)
+
+    def test_delete_for_user(self):
+        """Every session of a user is deleted at once"""
+        for session_id in ("s1", "s2", "s3"):
+            self.backend.create(session_id, "u1", self.now)
+        self.backend.create("s4", "u2", self.now)
+
+        self.assertEqual(self.backend.delete_for_user("u1"), 3)
+        self.assertEqual(self.backend.delete_for_user("u1"), 0)
+        self.assertIsNone(self.backend.get("s1"))
+        self.assertIsNotNone(self.backend.get("s4"))
+
+    def test_purge_expired(self):
+        """Purging trims the expired sessions from the users' sets"""
+        self.backend.create(
+            "s1", "u1", self.now, datetime.now() + timedelta(milliseconds=50)
+        )
+        self.backend.create("s2", "u1", self.now)
+        time.sleep(0.1)
+
+        self.assertEqual(self.backend.purge_expired(), 0)
+        self.assertEqual(self.server.redis.data["user_sessions:u1"], {"s2"})
+        self.assertNotIn("SCAN", [c[0] for c in self.server.redis.commands])
+
+    def test_deny_list_entries_have_no_user(self):
+        """Revoked tokens expire with their token, in no user's set"""
+        revoked = DenyList(self.backend)
+        self.assertTrue(revoked.add("t1", time.time() + 60))
+        self.assertFalse(revoked.add("t1", time.time() + 60))
+        self.assertIn("t1", revoked)
+        self.assertNotIn("t2", revoked)
+
+        data = self.server.redis.data
+        self.assertEqual(
+            sorted(data), ["session:revoked:t1"], "no set of sessions"
+        )
+        self.assertIn("session:revoked:t1", self.server.redis.expiries)
+
+    def test_purge_forgets_users_without_sessions(self):
+        """Purging drops the users whose sessions all expired"""
+        self.backend.create(
+            "s1", "u1", self.now, datetime.now() + timedelta(milliseconds=50)
+        )
+        self.backend.create("s2", "u2", self.now)
+        time.sleep(0.1)
+
+        self.backend.purge_expired()
+        self.assertNotIn("user_sessions:u1", self.server.redis.data)
+        self.assertEqual(self.server.redis.data["session_users"], {"u2"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Tests of the background writer of database sessions"""
+import contextlib
+import time
+import unittest
+from unittest import mock
+
+from api.v1.auth.session_writer import SessionWriter
+
+
+class Session:
+    """Session recording its saves"""
+
+    saved = []
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+
+    def save(self):
+        Session.saved.append(self.id)
+
+    @staticmethod
+    def batch():
+        return contextlib.nullcontext()
+
+
+class TestSessionWriter(unittest.TestCase):
+    """Tests of the session writer"""
+
+    def setUp(self):
+        """Start with no session saved"""
+        Session.saved = []
+
+    def wait_saved(self, count: int, timeout: float = 2.0):
+        """Wait until `count` sessions are saved"""
+        deadline = time.monotonic() + timeout
+        while len(Session.saved) < count and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def test_idle_writer_sleeps(self):
+        """With nothing pending, the writer does not wake up to flush"""
+        writer = SessionWriter(Session, interval=0.01)
+        writer.save(Session("s1"))
+        self.wait_saved(1)
+
+        with mock.patch.object(writer, "flush") as flush:
+            time.sleep(0.2)
+        self.assertEqual(flush.call_count, 0)
+
+        writer.save(Session("s2"))
+        self.wait_saved(2)
+        self.assertEqual(Session.saved, ["s1", "s2"])
+
+    def test_full_batch_is_flushed_at_once(self):
+        """A full batch is flushed without waiting for the interval"""
+        writer = SessionWriter(Session, interval=60, batch_size=3)
+        for session_id in ("s1", "s2", "s3"):
+            writer.save(Session(session_id))
+        self.wait_saved(3)
+        self.assertEqual(sorted(Session.saved), ["s1", "s2", "s3"])
+
+    def test_write_waits_for_the_interval(self):
+        """A write is flushed with the next ones, `interval` later"""
+        writer = SessionWriter(Session, interval=0.1)
+        writer.save(Session("s1"))
+        writer.save(Session("s2"))
+        self.assertEqual(Session.saved, [])
+        self.wait_saved(2)
+        self.assertEqual(Session.saved, ["s1", "s2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Tests of the signed session tokens and of their deny-list"""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from api.v1.auth.deny_list import DenyList
+from api.v1.auth.signed_session_auth import SignedSessionAuth
+from api.v1.auth.sqlite_session_backend import SQLiteSessionBackend
+
+
+class Request:
+    """Request carrying a session cookie"""
+
+    def __init__(self, token: str):
+        self.cookies = {"_my_session_id": token}
+
+
+class TestSignedSessionAuth(unittest.TestCase):
+    """Tests of the signed session tokens"""
+
+    def setUp(self):
+        """Keep the revocations in a SQLite backend shared by two deny-lists,
+        as if two processes used it"""
+        self.dir = tempfile.mkdtemp()
+        path = os.path.join(self.dir, "sessions.sqlite3")
+        self.other = DenyList(SQLiteSessionBackend(path))
+        patcher = mock.patch.multiple(
+            SignedSessionAuth, revoked=DenyList(SQLiteSessionBackend(path))
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        env = mock.patch.dict(os.environ, {"SESSION_NAME": "_my_session_id"})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def tearDown(self):
+        """Remove the session database"""
+        shutil.rmtree(self.dir)
+
+    def test_revocation_is_shared(self):
+        """A token revoked by a process is rejected by the others"""
+        auth = SignedSessionAuth()
+        token = auth.create_session("u1")
+        self.assertEqual(auth.user_id_for_session_id(token), "u1")
+
+        self.assertTrue(auth.destroy_session(Request(token)))
+        self.assertFalse(auth.destroy_session(Request(token)))
+        self.assertIsNone(auth.user_id_for_session_id(token))
+        token_id = SignedSessionAuth.signer.verify(token)["token_id"]
+        self.assertIn(token_id, self.other)
+
+    def test_max_age(self):
+        """Sessions live at most SESSION_MAX_AGE seconds"""
+        with mock.patch.dict(
+            os.environ, {"SESSION_DURATION": "0", "SESSION_MAX_AGE": "60"}
+        ):
+            auth = SignedSessionAuth()
+        self.assertEqual(auth.session_duration, 60)
+        claims = SignedSessionAuth.signer.verify(auth.create_session("u1"))
+        self.assertEqual(claims["expires_at"] - claims["issued_at"], 60)
+
+        # a token signed with no expiry time expires all the same
+        token = SignedSessionAuth.signer.sign("u1", 0)
+        self.assertEqual(auth.user_id_for_session_id(token), "u1")
+        with mock.patch("time.time", return_value=time.time() + 61):
+            self.assertIsNone(auth.user_id_for_session_id(token))
+            self.assertFalse(auth.destroy_session(Request(token)))
+
+
+if __name__ == "__main__":
+    unittest.main()
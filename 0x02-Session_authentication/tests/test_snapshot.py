@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Tests of the binary snapshot format"""
+import io
+import os
+import pickle
+import tempfile
+import unittest
+
+from models import snapshot
+from models.user import User
+
+
+class Exploit:
+    """Object running a command when unpickled"""
+
+    def __reduce__(self):
+        return (os.system, ("touch {}".format(Exploit.path),))
+
+
+class TestSnapshot(unittest.TestCase):
+    """Tests of the binary snapshot format"""
+
+    def load(self, data: bytes):
+        """Load a snapshot from bytes, through a real file"""
+        with tempfile.TemporaryFile() as f:
+            f.write(data)
+            f.seek(0)
+            return snapshot.load(f)
+
+    def test_round_trip(self):
+        """Records are read back as written, whatever the compression"""
+        user = User(email="bob@hbtn.io", first_name="Bob")
+        records = [(user.id, user.to_json(True)), ("x", {"n": [1, 2.5]})]
+        for compression in ("none", "zlib", "lzma"):
+            buffer = io.BytesIO()
+            snapshot.dump(buffer, records, 3, compression)
+            self.assertEqual(self.load(buffer.getvalue()), (3, records))
+
+    def test_refuses_globals(self):
+        """A snapshot referring to a function is refused, not run"""
+        with tempfile.TemporaryDirectory() as tmp:
+            Exploit.path = os.path.join(tmp, "pwned")
+            body = pickle.dumps([("x", {"a": Exploit()})], protocol=5)
+            header = snapshot.HEADER.pack(
+                snapshot.MAGIC, snapshot.FORMAT_VERSION, 1, 0, len(body)
+            )
+            with self.assertRaises(ValueError):
+                self.load(header + body)
+            self.assertFalse(os.path.exists(Exploit.path))
+
+    def test_truncated(self):
+        """A truncated snapshot is refused"""
+        buffer = io.BytesIO()
+        snapshot.dump(buffer, [("x", {"a": 1})])
+        with self.assertRaises(ValueError):
+            self.load(buffer.getvalue()[:-3])
+        with self.assertRaises(ValueError):
+            self.load(buffer.getvalue()[:5])
+
+
+if __name__ == "__main__":
+    unittest.main()
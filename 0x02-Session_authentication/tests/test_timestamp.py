@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Tests of the timestamp codec of the models"""
+import random
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from models import timestamp
+from models.timestamp import TIMESTAMP_FORMAT
+
+
+class TestTimestamp(unittest.TestCase):
+    """Tests of the timestamp codec"""
+
+    def test_round_trip(self):
+        """Decoding then encoding gives back the same string, and agrees
+        with strptime and strftime"""
+        rng = random.Random(7)
+        start = datetime(1900, 1, 1)
+        for _ in range(2000):
+            value = start + timedelta(seconds=rng.randrange(6 * 10 ** 9))
+            string = value.strftime(TIMESTAMP_FORMAT)
+            seconds = timestamp.decode(string)
+            self.assertEqual(seconds, timestamp.from_datetime(value))
+            self.assertEqual(timestamp.encode(seconds), string)
+            self.assertEqual(timestamp.to_datetime(seconds), value)
+
+    def test_edges(self):
+        """Leap days, the epoch and dates before it"""
+        for string in (
+            "1970-01-01T00:00:00",
+            "1969-12-31T23:59:59",
+            "2024-02-29T12:00:00",
+            "2000-02-29T23:59:59",
+            "0001-01-01T00:00:00",
+            "9999-12-31T23:59:59",
+        ):
+            self.assertEqual(
+                timestamp.encode(timestamp.decode(string)), string
+            )
+        self.assertEqual(timestamp.decode("1970-01-01T00:00:01"), 1.0)
+
+    def test_fractional_seconds(self):
+        """Encoding drops the fraction of a second"""
+        seconds = timestamp.decode("2024-05-01T10:20:30")
+        self.assertEqual(
+            timestamp.encode(seconds + 0.999), "2024-05-01T10:20:30"
+        )
+
+    def test_lenient_fallback(self):
+        """Unpadded fields are parsed as strptime parses them"""
+        self.assertEqual(
+            timestamp.decode("2024-5-1T1:2:3"),
+            timestamp.decode("2024-05-01T01:02:03"),
+        )
+
+    def test_invalid(self):
+        """Invalid timestamps raise ValueError"""
+        for string in (
+            "",
+            "2024-13-01T00:00:00",
+            "2024-02-30T00:00:00",
+            "2024-01-01T24:00:00",
+            "2024-01-01 00:00:00",
+            "abcd-ef-ghTij:kl:mn",
+        ):
+            with self.assertRaises(ValueError, msg=string):
+                timestamp.decode(string)
+
+    def test_aware_datetimes_are_converted_to_utc(self):
+        """An aware datetime is converted to UTC, not stripped"""
+        paris = timezone(timedelta(hours=2))
+        aware = datetime(2024, 6, 1, 12, 0, tzinfo=paris)
+        self.assertEqual(
+            timestamp.encode(timestamp.from_datetime(aware)),
+            "2024-06-01T10:00:00",
+        )
+        self.assertEqual(
+            timestamp.from_datetime(aware.astimezone(timezone.utc)),
+            timestamp.from_datetime(datetime(2024, 6, 1, 10, 0)),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
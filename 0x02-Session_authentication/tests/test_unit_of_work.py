@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Tests of the unit of work batching model writes"""
+import unittest
+
+from models.unit_of_work import UnitOfWork
+
+
+class Model:
+    """Model recording what it persists"""
+
+    fail = False
+    persisted = None
+
+    @classmethod
+    def _persist(cls, changes: dict):
+        if cls.fail:
+            raise OSError("disk full")
+        cls.persisted.update(changes)
+
+
+class Users(Model):
+    pass
+
+
+class Sessions(Model):
+    pass
+
+
+class TestUnitOfWork(unittest.TestCase):
+    """Tests of the unit of work"""
+
+    def setUp(self):
+        """Start with models persisting successfully"""
+        self.unit = UnitOfWork()
+        for cls in (Users, Sessions):
+            cls.fail, cls.persisted = False, {}
+
+    def test_batch(self):
+        """Writes are persisted once the batch exits, coalesced"""
+        with self.unit.batch():
+            self.unit.add(Users, "u1", "a")
+            self.unit.add(Users, "u1", "b")
+            self.unit.add(Sessions, "s1", None)
+            self.assertEqual(Users.persisted, {})
+        self.assertEqual(Users.persisted, {"u1": "b"})
+        self.assertEqual(Sessions.persisted, {"s1": None})
+
+    def test_failed_flush_keeps_the_writes(self):
+        """Writes a failed flush did not persist are flushed next time"""
+        Users.fail = True
+        with self.assertRaises(OSError):
+            with self.unit.batch():
+                self.unit.add(Sessions, "s1", "x")
+                self.unit.add(Users, "u1", "a")
+                self.unit.add(Users, "u2", "a")
+        self.assertEqual(Sessions.persisted, {"s1": "x"})
+        self.assertEqual(Users.persisted, {})
+
+        Users.fail = False
+        self.unit.add(Users, "u1", "b")  # newer than the failed write
+        self.unit.flush_pending()
+        self.assertEqual(Users.persisted, {"u1": "b", "u2": "a"})
+        self.assertEqual(Sessions.persisted, {"s1": "x"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Tests of the UserSession model"""
+import json
+import os
+import tempfile
+import unittest
+
+from models.user_session import UserSession
+
+
+class TestLegacyUserSessions(unittest.TestCase):
+    """Sessions saved by earlier versions, keyed by a separate ID"""
+
+    def setUp(self):
+        """Write a `.db_UserSession.json` file in the baseline format"""
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        self.records = {
+            "5d6e4a1c-uuid-1": {
+                "id": "5d6e4a1c-uuid-1",
+                "created_at": "2024-01-01T10:00:00",
+                "updated_at": "2024-01-01T10:00:00",
+                "user_id": "user-1",
+                "session_id": "session-1",
+            },
+            "9f0b2c3d-uuid-2": {
+                "id": "9f0b2c3d-uuid-2",
+                "created_at": "2024-01-01T11:00:00",
+                "updated_at": "2024-01-01T11:00:00",
+                "user_id": "user-2",
+                "session_id": "session-2",
+            },
+        }
+        with open(".db_UserSession.json", "w") as f:
+            json.dump(self.records, f)
+        UserSession.load_from_file()
+
+    def tearDown(self):
+        """Go back to the original directory"""
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_get_by_session_id(self):
+        """Legacy sessions are found by their session ID"""
+        session = UserSession.get("session-1")
+        self.assertIsNotNone(session)
+        self.assertEqual(session.session_id, "session-1")
+        self.assertEqual(session.user_id, "user-1")
+        self.assertIsNone(UserSession.get("5d6e4a1c-uuid-1"))
+
+    def test_remove(self):
+        """Legacy sessions can be removed, and stay removed once reloaded"""
+        UserSession.get("session-1").remove()
+        self.assertIsNone(UserSession.get("session-1"))
+
+        UserSession.load_from_file()
+        self.assertIsNone(UserSession.get("session-1"))
+        self.assertEqual(UserSession.get("session-2").user_id, "user-2")
+        self.assertEqual(UserSession.count(), 1)
+
+    def test_save_and_reload(self):
+        """Legacy and new sessions are all found after a rewrite"""
+        UserSession(user_id="user-3", session_id="session-3").save()
+        UserSession.load_from_file()
+        for i in (1, 2, 3):
+            session = UserSession.get("session-{}".format(i))
+            self.assertEqual(session.user_id, "user-{}".format(i))
+
+
+if __name__ == "__main__":
+    unittest.main()
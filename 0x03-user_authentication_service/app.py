@@ -2,7 +2,9 @@
 
 """App module."""
 
+import math
 import os
+import signal
 from typing import Tuple
 
 from flask import Flask, abort, jsonify, redirect, request
@@ -10,18 +12,51 @@ from werkzeug import Response
 
 import utils
 from auth import Auth
+from hashing import HashingUnavailable
+from throttle import LoginThrottle
 
 AUTH = Auth()
+THROTTLE = LoginThrottle.from_env()
 app = Flask(__name__)
 app.url_map.strict_slashes = False
 
 
+def rebuild_email_filter(signum: int, frame) -> None:
+    """Rebuild the email filter on SIGHUP, e.g. sent by
+    `./email_filter.py <pid>` once users were added to the database by
+    other means than the API."""
+    AUTH.rebuild_email_filter()
+
+
+signal.signal(signal.SIGHUP, rebuild_email_filter)
+
+
+@app.errorhandler(HashingUnavailable)
+def hashing_unavailable(_) -> Tuple[Response, int]:
+    """Turn requests away while password hashing is saturated."""
+    response = jsonify({"message": "service unavailable, try again later"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
 @app.route("/", methods=["GET"])
 def root():
     """API Root."""
     return jsonify({"message": "Bienvenue"})
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Metrics of the service."""
+    return jsonify(
+        {
+            "hashing": AUTH.hashing.stats(),
+            "email_filter": AUTH.email_filter.stats(),
+            "login_throttle": THROTTLE.stats(),
+        }
+    )
+
+
 @app.route("/users", methods=["POST"])
 def users() -> Tuple[Response, int]:
     """Register new user."""
@@ -54,6 +89,8 @@ def login() -> Tuple[Response, int]:
     authorization error with the code 401.
 
     Upon successful login, a session is created for the authenticated user.
+    Too many attempts for an email or from a client are turned away with
+    the code 429, before the credentials are checked.
     """
     success, err_msg = utils.request_body_provided(
         expected_fields={"email", "password"}
@@ -64,6 +101,12 @@ def login() -> Tuple[Response, int]:
     email = request.form.get("email")
     password = request.form.get("password")
 
+    wait = THROTTLE.check(email=email, ip=request.remote_addr)
+    if wait:
+        response = jsonify({"message": "too many login attempts"})
+        response.headers["Retry-After"] = str(math.ceil(wait))
+        return response, 429
+
     if not AUTH.valid_login(email=email, password=password):
         abort(401)
 
@@ -8,14 +8,23 @@ import bcrypt
 from sqlalchemy.orm.exc import NoResultFound
 
 from db import DB
+from email_filter import BloomFilter
+from hashing import (
+    HashingExecutor,
+    HashingUnavailable,
+    hash_cost,
+    load_rounds,
+)
 
 # noinspection PyCompatibility
 from user import User
 
 
-def _hash_password(password: str) -> bytes:
+def _hash_password(password: str, rounds: int = 12) -> bytes:
     """Hash plaintext passwords."""
-    return bcrypt.hashpw(password=password.encode(), salt=bcrypt.gensalt())
+    return bcrypt.hashpw(
+        password=password.encode(), salt=bcrypt.gensalt(rounds)
+    )
 
 
 class Auth:
@@ -24,6 +33,39 @@ class Auth:
     def __init__(self):
         """Initialize the Auth object."""
         self._db = DB()
+        self.hashing = HashingExecutor.from_env()
+        self.rounds = load_rounds()
+
+    @property
+    def email_filter(self) -> BloomFilter:
+        """The filter of the registered emails."""
+        return self._db.email_filter
+
+    def rebuild_email_filter(self) -> None:
+        """Rebuild the filter of the registered emails from the database."""
+        self._db.rebuild_email_filter()
+
+    def _find_user_by_email(self, email: str) -> User:
+        """Find a user by email, without a query if it is not registered.
+
+        Only registration uses it. The filter is fed by `DB.add_user`, so
+        it misses an email only if something else wrote it to the database,
+        after which `rebuild_email_filter` must be called. Logins, sessions
+        and password resets query the database, so a stale filter never
+        turns a registered user away.
+
+        Raises:
+            NoResultFound: If no user has that email.
+        """
+        email_filter = self._db.email_filter
+        if not email or email not in email_filter:
+            raise NoResultFound("No user found with the given parameters.")
+
+        try:
+            return self._db.find_user_by(email=email)
+        except NoResultFound:
+            email_filter.false_positive()
+            raise
 
     def register_user(self, email: str, password: str) -> User:
         """Register a new user with the provided email and password.
@@ -35,6 +77,7 @@ class Auth:
         Raises:
             ValueError: If the email or password is missing, or if the user
              already exists.
+            HashingUnavailable: If password hashing is saturated.
 
         Returns:
             User: The newly registered user object.
@@ -45,13 +88,15 @@ class Auth:
             raise ValueError("password missing")
 
         try:
-            self._db.find_user_by(email=email)
+            self._find_user_by_email(email)
         except NoResultFound:
             pass
         else:
             raise ValueError(f"User {email} already exists")
 
-        hashed_password = _hash_password(password=password).decode()
+        hashed_password = self.hashing.run(
+            _hash_password, password, self.rounds
+        ).decode()
         return self._db.add_user(email=email, hashed_password=hashed_password)
 
     def valid_login(self, email: str, password: str) -> bool:
@@ -62,6 +107,9 @@ class Auth:
             password (str): The plaintext password of the user attempting to
              log in.
 
+        Raises:
+            HashingUnavailable: If password hashing is saturated.
+
         Returns:
             bool: True if the login credentials are valid, False otherwise.
         """
@@ -70,11 +118,33 @@ class Auth:
         except NoResultFound:
             return False
 
-        return bcrypt.checkpw(
+        valid = self.hashing.run(
+            bcrypt.checkpw,
             password=password.encode(),
             hashed_password=db_user.hashed_password.encode(),
         )
+        if valid and hash_cost(db_user.hashed_password) != self.rounds:
+            self._rehash_password(db_user, password)
+        return valid
+
+    def _rehash_password(self, db_user: User, password: str) -> None:
+        """Rehash the password of a user at the current cost.
+
+        Done on a successful login, when the password is known, so that the
+        cost can change without resetting passwords. It is left for a later
+        login if password hashing is saturated.
+        """
+        try:
+            hashed_password = self.hashing.run(
+                _hash_password, password, self.rounds
+            ).decode()
+        except HashingUnavailable:
+            return
+        self._db.update_user(
+            user_id=db_user.id, hashed_password=hashed_password
+        )
 
+    @staticmethod
     def _generate_uuid() -> str:
         """Generate UUIDs."""
         return str(uuid.uuid4())
@@ -163,7 +233,9 @@ class Auth:
         except NoResultFound:
             raise ValueError("Reset token is invalid or expired")
 
-        hashed_password = _hash_password(password).decode()
+        hashed_password = self.hashing.run(
+            _hash_password, password, self.rounds
+        ).decode()
         self._db.update_user(
             user_id=db_user.id,
             hashed_password=hashed_password,
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 """DB module."""
+import threading
 from os import getenv
 
 from sqlalchemy import create_engine
@@ -9,6 +10,8 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.orm.session import Session
 
+from email_filter import BloomFilter
+
 # noinspection PyCompatibility
 from user import Base, User
 
@@ -25,6 +28,10 @@ class DB:
         Base.metadata.create_all(self._engine)
         self.__session = None
 
+        self.email_filter = BloomFilter()
+        self._email_filter_lock = threading.RLock()
+        self.rebuild_email_filter()
+
     @property
     def _session(self) -> Session:
         """Memoized session object."""
@@ -69,8 +76,38 @@ class DB:
         self._session.add(db_user)
 
         self._session.commit()
+        self._filter_email(email)
         return db_user
 
+    def _filter_email(self, email: str) -> None:
+        """Add an email to the email filter, growing it once it is full."""
+        with self._email_filter_lock:
+            self.email_filter.add(email)
+            if self.email_filter.full:
+                self.rebuild_email_filter()
+
+    def rebuild_email_filter(self) -> None:
+        """Rebuild the filter of the registered emails from the database.
+
+        It is sized for `EMAIL_FILTER_CAPACITY` emails (100000 by default)
+        with a false positive rate of `EMAIL_FILTER_ERROR_RATE` (0.01 by
+        default), or twice the registered emails if there are more.
+        """
+        try:
+            capacity = int(getenv("EMAIL_FILTER_CAPACITY", 100000))
+            error_rate = float(getenv("EMAIL_FILTER_ERROR_RATE", 0.01))
+        except ValueError:
+            capacity, error_rate = 100000, 0.01
+
+        with self._email_filter_lock:
+            emails = [email for email, in self._session.query(User.email)]
+            email_filter = BloomFilter(
+                max(capacity, 2 * len(emails)), error_rate
+            )
+            for email in emails:
+                email_filter.add(email)
+            self.email_filter = email_filter
+
     def find_user_by(self, **kwargs) -> User:
         """Search and return user by a given field.
 
@@ -117,3 +154,5 @@ class DB:
 
         self._session.add(db_user)
         self._session.commit()
+        if "email" in kwargs:
+            self._filter_email(kwargs["email"])
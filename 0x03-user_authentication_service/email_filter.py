@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""Email filter module."""
+import hashlib
+import math
+import os
+import signal
+import sys
+import threading
+from typing import Dict, Iterable, Union
+
+
+class BloomFilter:
+    """Bloom filter of the registered emails.
+
+    It tells that an email is not registered without querying the database;
+    an email it might contain still has to be looked up, as it may be a
+    false positive. Emails cannot be taken out of it, so it is rebuilt from
+    the database when it outgrows its capacity.
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.01):
+        """Initialize an empty filter.
+
+        Args:
+            capacity (int): The number of emails it is sized for.
+            error_rate (float): The false positive rate at that capacity.
+        """
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(
+            int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8
+        )
+        self.hashes = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+        self._checks = 0
+        self._negatives = 0
+        self._false_positives = 0
+
+    def _positions(self, email: str) -> Iterable[int]:
+        """Return the bits of an email, by double hashing."""
+        digest = hashlib.blake2b(email.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, email: str) -> None:
+        """Add an email to the filter."""
+        with self._lock:
+            for position in self._positions(email):
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, email: str) -> bool:
+        """Tell whether an email might be in the filter."""
+        with self._lock:
+            self._checks += 1
+            for position in self._positions(email):
+                if not self._bits[position >> 3] & (1 << (position & 7)):
+                    self._negatives += 1
+                    return False
+            return True
+
+    def false_positive(self) -> None:
+        """Record that an email the filter might contain was not found."""
+        with self._lock:
+            self._false_positives += 1
+
+    @property
+    def full(self) -> bool:
+        """Tell whether the filter holds more emails than it is sized for."""
+        return self.count > self.capacity
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return the fill and false positive rates of the filter."""
+        with self._lock:
+            count = self.count
+            checks = self._checks
+            false_positives = self._false_positives
+            absent = self._negatives + false_positives
+        expected = (1 - math.exp(-self.hashes * count / self.size)) ** (
+            self.hashes
+        )
+        return {
+            "emails": count,
+            "capacity": self.capacity,
+            "bits": self.size,
+            "hashes": self.hashes,
+            "checks": checks,
+            "false_positives": false_positives,
+            "false_positive_rate": (
+                false_positives / absent if absent else 0.0
+            ),
+            "expected_false_positive_rate": expected,
+        }
+
+
+if __name__ == "__main__":
+    # rebuild the filter of a running app from the database: the app
+    # rebuilds it on SIGHUP. ./email_filter.py <pid of the app>
+    if len(sys.argv) != 2 or not sys.argv[1].isdigit():
+        sys.exit("usage: {} <pid of the app>".format(sys.argv[0]))
+    os.kill(int(sys.argv[1]), signal.SIGHUP)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+"""Hashing module."""
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Union
+
+import bcrypt
+
+DEFAULT_ROUNDS = 12
+DEFAULT_TARGET_MS = 250.0
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+ROUNDS_FILE = ".bcrypt_rounds"
+_PROBE_ROUNDS = 8
+
+
+def _getenv_int(name: str) -> Union[int, None]:
+    """Return an integer environment variable, or None if unset or invalid."""
+    try:
+        return int(os.environ[name])
+    except (KeyError, ValueError):
+        return None
+
+
+class HashingUnavailable(Exception):
+    """Raised when no hashing slot frees up within the queue-wait timeout."""
+
+
+class HashingExecutor:
+    """Bounded executor for password hashing.
+
+    At most `concurrency` hashes run at once, each in the thread of its
+    caller (bcrypt releases the GIL while hashing). A caller waits at most
+    `queue_timeout` seconds for a slot, after which `HashingUnavailable` is
+    raised, so a burst of logins is turned away instead of tying up every
+    request thread.
+    """
+
+    def __init__(
+        self, concurrency: Union[int, None] = None, queue_timeout: float = 2.0
+    ):
+        """Initialize the executor.
+
+        Args:
+            concurrency (int): The maximum number of concurrent hashes,
+             the number of CPUs by default.
+            queue_timeout (float): The seconds to wait for a slot.
+        """
+        self.concurrency = max(concurrency or os.cpu_count() or 1, 1)
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._hash_time = 0.0
+        self._max_hash_time = 0.0
+        self._wait_time = 0.0
+
+    @classmethod
+    def from_env(cls) -> "HashingExecutor":
+        """Create an executor configured by the environment.
+
+        `HASH_CONCURRENCY` is the maximum number of concurrent hashes and
+        `HASH_QUEUE_TIMEOUT` the seconds to wait for a slot.
+        """
+        concurrency = _getenv_int("HASH_CONCURRENCY")
+        try:
+            queue_timeout = float(os.getenv("HASH_QUEUE_TIMEOUT", 2.0))
+        except ValueError:
+            queue_timeout = 2.0
+
+        return cls(concurrency=concurrency, queue_timeout=queue_timeout)
+
+    def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a hashing function and return its result.
+
+        Raises:
+            HashingUnavailable: If no slot frees up within the timeout.
+        """
+        queued_at = time.monotonic()
+        with self._lock:
+            self._waiting += 1
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        with self._lock:
+            self._waiting -= 1
+            if not acquired:
+                self._rejected += 1
+            else:
+                self._running += 1
+                self._wait_time += time.monotonic() - queued_at
+        if not acquired:
+            raise HashingUnavailable("Password hashing is saturated")
+
+        start = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._hash_time += elapsed
+                self._max_hash_time = max(self._max_hash_time, elapsed)
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return the queue depth and hash latency metrics."""
+        with self._lock:
+            completed = self._completed
+            admitted = completed + self._running
+            return {
+                "concurrency": self.concurrency,
+                "queue_depth": self._waiting,
+                "running": self._running,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_hash_ms": (
+                    1000 * self._hash_time / completed if completed else 0.0
+                ),
+                "max_hash_ms": 1000 * self._max_hash_time,
+                "avg_wait_ms": (
+                    1000 * self._wait_time / admitted if admitted else 0.0
+                ),
+            }
+
+
+def hash_cost(hashed_password: Union[bytes, str]) -> int:
+    """Return the cost (log2 of the rounds) of a bcrypt hash."""
+    if isinstance(hashed_password, bytes):
+        hashed_password = hashed_password.decode()
+    return int(hashed_password.split("$")[2])
+
+
+def _hash_ms(rounds: int, samples: int = 3) -> float:
+    """Return the fastest of a few bcrypt hashes at a cost, in ms."""
+    salt = bcrypt.gensalt(rounds)
+    best = float("inf")
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration", salt)
+        best = min(best, time.perf_counter() - start)
+    return 1000 * best
+
+
+def calibrate_rounds(
+    target_ms: float = DEFAULT_TARGET_MS,
+    min_rounds: int = MIN_ROUNDS,
+    max_rounds: int = MAX_ROUNDS,
+) -> Dict[str, Union[int, float]]:
+    """Find the highest bcrypt cost hashing within a target latency.
+
+    The time of a cheap hash is measured and doubled per extra round to
+    estimate the cost, which is then measured to settle it.
+
+    Args:
+        target_ms (float): The latency budget of a hash, in ms.
+        min_rounds (int): The lowest cost, used even if it is too slow.
+        max_rounds (int): The highest cost.
+
+    Returns:
+        dict: The `rounds` chosen, the `target_ms` and the `hash_ms`
+         measured at that cost.
+    """
+    probe_ms = _hash_ms(_PROBE_ROUNDS)
+    rounds = min_rounds
+    while (
+        rounds < max_rounds
+        and probe_ms * 2 ** (rounds + 1 - _PROBE_ROUNDS) <= target_ms
+    ):
+        rounds += 1
+
+    hash_ms = _hash_ms(rounds, samples=1)
+    while hash_ms > target_ms and rounds > min_rounds:
+        rounds -= 1
+        hash_ms = _hash_ms(rounds, samples=1)
+
+    return {"rounds": rounds, "target_ms": target_ms, "hash_ms": hash_ms}
+
+
+def _target_ms() -> float:
+    """Return the latency budget of a hash set by `BCRYPT_TARGET_MS`."""
+    try:
+        return float(os.getenv("BCRYPT_TARGET_MS", DEFAULT_TARGET_MS))
+    except ValueError:
+        return DEFAULT_TARGET_MS
+
+
+def save_calibration(calibration: Dict[str, Union[int, float]]) -> None:
+    """Save a calibration in `BCRYPT_ROUNDS_FILE`."""
+    with open(os.getenv("BCRYPT_ROUNDS_FILE", ROUNDS_FILE), "w") as file:
+        json.dump(calibration, file)
+
+
+def load_rounds(calibrate: bool = True) -> int:
+    """Return the bcrypt cost to hash passwords with.
+
+    `BCRYPT_ROUNDS` sets the cost. Otherwise it is read from the calibration
+    saved in `BCRYPT_ROUNDS_FILE`, unless `BCRYPT_TARGET_MS` asks for another
+    target. Without a calibration, the cost is calibrated against the target
+    and saved, or is `DEFAULT_ROUNDS` if `calibrate` is False.
+    """
+    try:
+        return int(os.environ["BCRYPT_ROUNDS"])
+    except (KeyError, ValueError):
+        pass
+
+    target_ms = _target_ms()
+    try:
+        with open(os.getenv("BCRYPT_ROUNDS_FILE", ROUNDS_FILE)) as file:
+            calibration = json.load(file)
+        if (
+            "BCRYPT_TARGET_MS" not in os.environ
+            or calibration["target_ms"] == target_ms
+        ):
+            return int(calibration["rounds"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    if not calibrate:
+        return DEFAULT_ROUNDS
+
+    calibration = calibrate_rounds(target_ms)
+    try:
+        save_calibration(calibration)
+    except OSError:
+        pass
+    return calibration["rounds"]
+
+
+if __name__ == "__main__":
+    # calibrate offline: ./hashing.py [target_ms]
+    target_ms = float(sys.argv[1]) if len(sys.argv) > 1 else _target_ms()
+    calibration = calibrate_rounds(target_ms)
+    save_calibration(calibration)
+    print(
+        f"bcrypt rounds: {calibration['rounds']}"
+        f" ({calibration['hash_ms']:.0f} ms per hash)"
+    )
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+"""Throttle module."""
+import threading
+import time
+from collections import OrderedDict
+from os import getenv
+from typing import Dict, List, Union
+
+
+class TokenBuckets:
+    """Token buckets of keys, e.g. emails or client IPs.
+
+    Each key may take `burst` tokens at once, refilled at `rate` tokens per
+    second. Buckets are kept from the least to the most recently used, so a
+    bucket idle long enough to be full again, which is the same as no
+    bucket, is dropped from the front in O(1); past `max_keys` buckets, the
+    least recently used are dropped too.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100000):
+        """Initialize the buckets.
+
+        Args:
+            rate (float): The tokens refilled per second.
+            burst (int): The tokens of a full bucket.
+            max_keys (int): The maximum number of buckets kept.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.rejected = 0
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str) -> float:
+        """Take a token for a key.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until one
+            is available.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = self.burst
+            else:
+                refilled = (now - bucket[1]) * self.rate
+                tokens = min(self.burst, bucket[0] + refilled)
+                self._buckets.move_to_end(key)
+
+            taken = tokens >= 1
+            self._buckets[key] = [tokens - 1 if taken else tokens, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+            if taken:
+                return 0.0
+            self.rejected += 1
+            return (1 - tokens) / self.rate if self.rate > 0 else 60.0
+
+    def _evict(self, now: float) -> None:
+        """Drop the least recently used buckets that are full again."""
+        refill = self.burst / self.rate if self.rate > 0 else float("inf")
+        while self._buckets:
+            updated_at = next(iter(self._buckets.values()))[1]
+            if now - updated_at < refill:
+                break
+            self._buckets.popitem(last=False)
+
+    def __len__(self) -> int:
+        """Return the number of buckets kept."""
+        return len(self._buckets)
+
+
+def _getenv_float(name: str, default: float) -> float:
+    """Return a numeric environment variable, or `default`."""
+    try:
+        return float(getenv(name, default))
+    except ValueError:
+        return default
+
+
+class LoginThrottle:
+    """Throttle of the login attempts, per email and per client IP."""
+
+    def __init__(self, per_email: TokenBuckets, per_ip: TokenBuckets):
+        """Initialize the throttle with the buckets of each key."""
+        self.per_email = per_email
+        self.per_ip = per_ip
+
+    @classmethod
+    def from_env(cls) -> "LoginThrottle":
+        """Create a throttle with the limits set by the environment.
+
+        An email may try `LOGIN_EMAIL_BURST` logins at once (5 by default),
+        then `LOGIN_EMAIL_PER_MINUTE` a minute (5 by default); a client IP
+        `LOGIN_IP_BURST` (20 by default), then `LOGIN_IP_PER_MINUTE` a minute
+        (60 by default). At most `LOGIN_THROTTLE_MAX_KEYS` emails and as
+        many IPs are tracked (100000 by default).
+        """
+        max_keys = int(_getenv_float("LOGIN_THROTTLE_MAX_KEYS", 100000))
+        return cls(
+            TokenBuckets(
+                _getenv_float("LOGIN_EMAIL_PER_MINUTE", 5) / 60,
+                int(_getenv_float("LOGIN_EMAIL_BURST", 5)),
+                max_keys,
+            ),
+            TokenBuckets(
+                _getenv_float("LOGIN_IP_PER_MINUTE", 60) / 60,
+                int(_getenv_float("LOGIN_IP_BURST", 20)),
+                max_keys,
+            ),
+        )
+
+    def check(self, email: str, ip: Union[str, None]) -> float:
+        """Take a login attempt of an email from a client IP.
+
+        Returns:
+            float: 0 if the attempt is allowed, otherwise the seconds to
+            wait before trying again.
+        """
+        wait = self.per_ip.take(ip or "")
+        if wait:
+            return wait
+        return self.per_email.take(email.strip().lower())
+
+    def stats(self) -> Dict[str, int]:
+        """Return the rejected attempts and the keys tracked."""
+        return {
+            "rejected_by_email": self.per_email.rejected,
+            "rejected_by_ip": self.per_ip.rejected,
+            "emails": len(self.per_email),
+            "ips": len(self.per_ip),
+        }